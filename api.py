@@ -0,0 +1,288 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+
+from cache import TTLCache
+from figure_cache import FigureCache
+from filters import DataFilters, TIME_RANGES
+from metrics import metrics
+from trending import TrendingRanking, TRENDING_K, TRENDING_METRICS
+from sketches import UserSketches
+from topic_graph import TopicGraph, TOPIC_NETWORK_NODES, TOPIC_NETWORK_EDGES
+from version_watch import VersionWatcher
+
+# Seconds a built response is served from the cache (and max-age sent to clients)
+RESPONSE_TTL = 300
+# Threads running the blocking pymongo/pandas/plotly work
+MAX_WORKERS = 16
+
+response_cache = TTLCache(maxsize=2048, ttl=RESPONSE_TTL)
+
+
+def _records(df, columns=None):
+    if df is None or len(df) == 0:
+        return []
+    if columns:
+        df = df[[c for c in columns if c in df.columns]]
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def _heatmap(preprocessor):
+    pivot = preprocessor.prepare_commit_heatmap()
+    if pivot.empty:
+        return {'days': [], 'hours': [], 'counts': []}
+    return {
+        'days': list(pivot.index),
+        'hours': [int(h) for h in pivot.columns],
+        'counts': pivot.values.astype(int).tolist()
+    }
+
+
+# name -> builder taking a DataPreprocessor and returning JSON-ready data
+AGGREGATES = {
+    'filter_options': lambda p: p.filter_options(),
+    'languages': lambda p: [{k: v for k, v in doc.items() if k != '_id'} for doc in p.get_languages()],
+    'repo_sizes': lambda p: _records(p.categorize_repo_sizes(), ['repo_name', 'size', 'size_category', 'language']),
+    'commit_heatmap': _heatmap,
+    'monthly_commits': lambda p: _records(p.prepare_monthly_commits()),
+    'top_repos': lambda p: _records(p.get_top_repos()),
+}
+
+
+@lru_cache(maxsize=None)
+def chart_names():
+    from visualizations import Visualizations
+    return tuple(sorted(
+        name for name, attr in vars(Visualizations).items()
+        # Chart methods are the decorated ones; the leaderboard returns tables
+        if hasattr(attr, '__wrapped__') and name != 'repo_leaderboard_table'
+    ))
+
+
+def _etag(body):
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+class AnalyticsService:
+    """Runs the synchronous preprocessing/chart code off the event loop
+
+    Identical concurrent requests share one in-flight build, and finished
+    bodies are cached with their ETag for RESPONSE_TTL seconds. Cache keys
+    carry the user's data version, so a write elsewhere in the fleet makes
+    the old entries unreachable as soon as the watcher sees it.
+    """
+
+    def __init__(self, db, max_workers=MAX_WORKERS):
+        self.db = db
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='api')
+        self._inflight = {}
+        self.figures = FigureCache(db)
+        self.versions = VersionWatcher(db)
+        # Profiles are cached per process too; drop them when another process writes
+        self.versions.subscribe(lambda username, version: db.invalidate_profile(username))
+        self.versions.start()
+
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def cached(self, key, build):
+        """(body, etag) for key, building it in the thread pool on a miss"""
+        hit = response_cache.get(key)
+        if hit is not None:
+            metrics.inc('api_cache_total', result='hit')
+            return hit
+
+        task = self._inflight.get(key)
+        if task is None:
+            metrics.inc('api_cache_total', result='miss')
+            task = asyncio.ensure_future(self._build(key, build))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            metrics.inc('api_cache_total', result='coalesced')
+        # A client disconnecting must not cancel a build other requests wait on
+        return await asyncio.shield(task)
+
+    async def _build(self, key, build):
+        body = await self.run(build)
+        entry = (body, _etag(body))
+        response_cache.set(key, entry)
+        return entry
+
+    async def require_user(self, username):
+        summary = await self.run(self.db.get_profile_summary, username)
+        if summary is None:
+            raise HTTPException(status_code=404, detail=f"User not found: {username}")
+        return summary
+
+    def aggregate(self, username, name, filters):
+        from preprocess import DataPreprocessor
+        data = AGGREGATES[name](DataPreprocessor(self.db, username, filters=filters))
+        return json.dumps(data, default=str).encode('utf-8')
+
+    def figure(self, username, chart, filters, version):
+        from visualizations import Visualizations
+        viz = Visualizations(self.db, username, filters=filters, figure_cache=self.figures, data_version=version)
+        return viz.chart_json(chart)
+
+    def topic_network(self, usernames, max_topics, max_edges, min_weight):
+        usernames = sorted(usernames or self.db.users.distinct('username'))
+        graph = TopicGraph.load(self.db, usernames, versions=[self.version(u) for u in usernames])
+        return {'users': len(usernames), **graph.to_dict(max_topics, max_edges, min_weight)}
+
+    def version(self, username):
+        return self.versions.version(username)
+
+    def close(self):
+        self.versions.stop()
+        self.executor.shutdown(wait=False)
+
+
+def _filters(time_range, languages, repos, event_types):
+    if time_range not in TIME_RANGES:
+        raise HTTPException(status_code=422, detail=f"time_range must be one of {', '.join(TIME_RANGES)}")
+    return DataFilters(time_range, languages=languages, repos=repos, event_types=event_types)
+
+
+def _respond(request, body, etag):
+    headers = {'ETag': etag, 'Cache-Control': f'private, max-age={RESPONSE_TTL}'}
+    if etag in request.headers.get('if-none-match', ''):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+def create_app(db=None, connection_string=None):
+    """FastAPI app serving one shared Database (opened from config unless given)"""
+
+    @asynccontextmanager
+    async def lifespan(app):
+        database = db
+        if database is None:
+            from db import Database
+            if connection_string is None:
+                from config import MONGODB_CONNECTION_STRING as uri
+            else:
+                uri = connection_string
+            database = Database(uri)
+        app.state.service = AnalyticsService(database)
+        yield
+        app.state.service.close()
+        if db is None:
+            database.close()
+
+    app = FastAPI(title="GitHub Analytics Pro API", lifespan=lifespan)
+
+    @app.middleware('http')
+    async def time_requests(request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get('route')
+        metrics.observe('api_request_seconds', time.perf_counter() - start,
+                        route=route.path if route else 'unmatched', status=response.status_code)
+        return response
+
+    @app.get('/health')
+    async def health():
+        return {'status': 'ok'}
+
+    @app.get('/trending/{metric}')
+    async def trending(metric: str, request: Request, limit: int = Query(default=TRENDING_K, ge=1, le=TRENDING_K)):
+        if metric not in TRENDING_METRICS:
+            raise HTTPException(status_code=404, detail=f"Unknown metric: {metric}")
+        service = request.app.state.service
+        return await service.run(TrendingRanking(service.db).leaderboard, metric, limit)
+
+    @app.get('/org/summary')
+    async def org_summary(request: Request, user: list[str] = Query(default=[])):
+        """Approximate rollup over the given users (every tracked user by default)"""
+        service = request.app.state.service
+        return await service.run(UserSketches(service.db).summary, user or None)
+
+    @app.get('/org/topics')
+    async def org_topics(request: Request, user: list[str] = Query(default=[]),
+                         limit: int = Query(default=TOPIC_NETWORK_NODES, ge=1, le=500),
+                         links: int = Query(default=TOPIC_NETWORK_EDGES, ge=0, le=5000),
+                         min_repos: int = Query(default=1, ge=1)):
+        """Topic co-occurrence network across the given users (every tracked user by default)"""
+        service = request.app.state.service
+        return await service.run(service.topic_network, user, limit, links, min_repos)
+
+    @app.get('/users/{username}')
+    async def profile(username: str, request: Request):
+        summary = await request.app.state.service.require_user(username)
+        body = json.dumps(summary, default=str).encode('utf-8')
+        return _respond(request, body, _etag(body))
+
+    @app.get('/users/{username}/aggregates')
+    async def list_aggregates(username: str):
+        return sorted(AGGREGATES)
+
+    @app.get('/users/{username}/aggregates/{name}')
+    async def aggregate(username: str, name: str, request: Request,
+                        time_range: str = 'all',
+                        language: list[str] = Query(default=[]),
+                        repo: list[str] = Query(default=[]),
+                        event_type: list[str] = Query(default=[])):
+        if name not in AGGREGATES:
+            raise HTTPException(status_code=404, detail=f"Unknown aggregate: {name}")
+        service = request.app.state.service
+        await service.require_user(username)
+        filters = _filters(time_range, language, repo, event_type)
+        body, etag = await service.cached(
+            ('aggregate', username, name, filters.key(), await service.run(service.version, username)),
+            lambda: service.aggregate(username, name, filters)
+        )
+        return _respond(request, body, etag)
+
+    @app.get('/users/{username}/charts')
+    async def list_charts(username: str):
+        return list(chart_names())
+
+    @app.get('/users/{username}/charts/{chart}')
+    async def chart(username: str, chart: str, request: Request,
+                    time_range: str = 'all',
+                    language: list[str] = Query(default=[]),
+                    repo: list[str] = Query(default=[]),
+                    event_type: list[str] = Query(default=[])):
+        if chart not in chart_names():
+            raise HTTPException(status_code=404, detail=f"Unknown chart: {chart}")
+        service = request.app.state.service
+        await service.require_user(username)
+        filters = _filters(time_range, language, repo, event_type)
+        version = await service.run(service.version, username)
+        body, etag = await service.cached(
+            ('chart', username, chart, filters.key(), version),
+            lambda: service.figure(username, chart, filters, version)
+        )
+        return _respond(request, body, etag)
+
+    @app.get('/metrics')
+    async def prometheus():
+        return Response(content=metrics.render_prometheus(), media_type='text/plain; version=0.0.4')
+
+    return app
+
+
+# `uvicorn api:app` entry point; the database is opened on startup
+app = create_app()
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve GitHub Analytics Pro aggregates and figures as JSON")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,609 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from db import Database, ACTIVITY_RETENTION_DAYS
+from commit_series import DailyCommitSeries
+from language_bytes import LanguageBytes
+from repo_snapshots import RepoSnapshots
+from sketches import UserSketches
+from records import EventRecord, RepoRecord, INSERT_BATCH_SIZE
+
+EVENT_TYPES = ['PushEvent', 'PullRequestEvent', 'IssuesEvent', 'WatchEvent',
+               'CreateEvent', 'ForkEvent', 'IssueCommentEvent', 'DeleteEvent']
+LANGUAGES = ['Python', 'JavaScript', 'TypeScript', 'Go', 'Rust', 'Java', 'C++', 'Shell', None]
+TOPICS = ['machine-learning', 'web', 'cli', 'data', 'api', 'devops', 'security',
+          'visualization', 'database', 'testing', 'compiler', 'game']
+# (days ago, share of today's stars and forks) of the seeded metric snapshots
+SNAPSHOT_HISTORY = [(90, 0.6), (30, 0.85), (7, 0.95), (0, 1.0)]
+# mongomock checks unique indexes by scanning the collection on every insert, so loading
+# grows quadratically (about 15 s at 1000, 90 s at 3000); larger scales need --mongo-uri
+MOCK_MAX_SCALE = 2000
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Modules the dashboard imports before it can show the empty state
+STARTUP_MODULES = ['db', 'fetch_data', 'preprocess', 'visualizations', 'filters', 'metrics', 'profiling']
+IMPORT_BUDGET_MS = 150
+
+PREPROCESSOR_METHODS = [
+    'get_clean_repos', 'aggregate_languages', 'categorize_repo_sizes',
+    'prepare_commit_heatmap', 'prepare_monthly_commits', 'get_top_repos'
+]
+
+
+class SyntheticDataset:
+    """Deterministic synthetic GitHub data for one user, in raw API response shapes"""
+
+    def __init__(self, username, scale, seed=0):
+        self.username = username
+        self.scale = scale
+        self.seed = seed
+        rnd = random.Random(seed)
+        start = datetime(2015, 1, 1)
+        span_hours = 24 * 365 * 10
+
+        n_repos = max(1, min(scale, scale // 10 or 1))
+        self.repos = []
+        for i in range(n_repos):
+            created = start + timedelta(hours=rnd.randrange(span_hours))
+            self.repos.append({
+                'name': f'repo-{i}',
+                'stargazers_count': int(rnd.paretovariate(1.2)) - 1,
+                'forks_count': int(rnd.paretovariate(1.5)) - 1,
+                'size': rnd.randrange(1, 50000),
+                'language': rnd.choice(LANGUAGES),
+                'created_at': _iso(created),
+                'updated_at': _iso(created + timedelta(days=rnd.randrange(1, 900))),
+                'fork': rnd.random() < 0.15,
+                'archived': rnd.random() < 0.05,
+                'topics': rnd.sample(TOPICS, rnd.randrange(0, 5)),
+                'open_issues_count': rnd.randrange(0, 30)
+            })
+            self.repos[-1]['pushed_at'] = self.repos[-1]['updated_at']
+
+        # Commits are spread across repos, skewed towards the first ones
+        self.commits = {repo['name']: [] for repo in self.repos}
+        for i in range(scale):
+            repo = self.repos[min(int(rnd.expovariate(3 / n_repos)), n_repos - 1)]
+            self.commits[repo['name']].append({
+                'sha': f'{i:040x}',
+                # Every fifth commit comes from another contributor
+                'author': {'login': username if i % 5 else f'contributor-{i % 7}'},
+                'commit': {
+                    'author': {'date': _iso(start + timedelta(minutes=rnd.randrange(span_hours * 60)))},
+                    'message': f'Commit {i}'
+                }
+            })
+
+        # Events stay inside the archive retention window so none expire on load
+        events_start = datetime.combine(date.today(), datetime.min.time()) - timedelta(days=ACTIVITY_RETENTION_DAYS - 30)
+        events_minutes = (ACTIVITY_RETENTION_DAYS - 30) * 24 * 60
+        self.events = []
+        for i in range(scale):
+            self.events.append({
+                'id': str(i),
+                'type': rnd.choice(EVENT_TYPES),
+                'repo': {'name': f"{username}/{rnd.choice(self.repos)['name']}"},
+                'created_at': _iso(events_start + timedelta(minutes=rnd.randrange(events_minutes)))
+            })
+        self.events.sort(key=lambda e: e['created_at'], reverse=True)
+
+    def languages(self, repo):
+        """/languages bytes for a repo: its primary language plus a few smaller ones"""
+        rnd = random.Random(f"{self.seed}-{repo['name']}")
+        others = rnd.sample([l for l in LANGUAGES if l and l != repo['language']], rnd.randrange(0, 3))
+        byte_counts = {repo['language']: repo['size'] * 600} if repo['language'] else {}
+        byte_counts.update({l: rnd.randrange(1, repo['size'] * 200 + 2) for l in others})
+        return byte_counts
+
+    def stargazers(self, repo):
+        """/stargazers entries (starred_at media type) for a repo, oldest first"""
+        rnd = random.Random(f"{self.seed}-stars-{repo['name']}")
+        created = datetime.strptime(repo['created_at'], '%Y-%m-%dT%H:%M:%SZ')
+        minutes = sorted(rnd.randrange(900 * 24 * 60) for _ in range(repo['stargazers_count']))
+        return [{'starred_at': _iso(created + timedelta(minutes=m)), 'user': {'login': f'fan-{i}'}}
+                for i, m in enumerate(minutes)]
+
+    def user(self):
+        return {
+            'login': self.username,
+            'followers': self.scale // 3,
+            'following': 42,
+            'public_repos': len(self.repos),
+            'avatar_url': f'https://avatars.example.com/{self.username}'
+        }
+
+    def documents(self):
+        """Database documents matching what GitHubFetcher stores"""
+        u = self.username
+        return {
+            'users': [{
+                'username': u,
+                'followers': self.user()['followers'],
+                'following': self.user()['following'],
+                'public_repos': len(self.repos),
+                'avatar': self.user()['avatar_url'],
+                'updated_at': datetime.utcnow()
+            }],
+            'repos': [{
+                'username': u,
+                'repo_name': r['name'],
+                'stars': r['stargazers_count'],
+                'forks': r['forks_count'],
+                'size': r['size'],
+                'language': r['language'],
+                'created_at': r['created_at'],
+                'updated_at': r['updated_at'],
+                'pushed_at': r['pushed_at'],
+                'is_fork': r['fork'],
+                'is_archived': r['archived'],
+                'topics': r['topics'],
+                'open_issues': r['open_issues_count']
+            } for r in self.repos],
+            'commits': [{
+                'username': u,
+                'repo': repo_name,
+                'sha': c['sha'],
+                'author': c['author']['login'].lower(),
+                'commit_timestamp': c['commit']['author']['date'],
+                'message': c['commit']['message']
+            } for repo_name, commits in self.commits.items() for c in commits],
+            'activity': [{
+                'username': u,
+                'event_id': e['id'],
+                'event_type': e['type'],
+                'repo': e['repo']['name'],
+                'created_at': e['created_at']
+            } for e in self.events],
+            'topics': [{
+                'username': u,
+                'repo': r['name'],
+                'topics': r['topics']
+            } for r in self.repos if r['topics']],
+            'repo_languages': [{
+                'username': u,
+                'repo': r['name'],
+                'pushed_at': r['pushed_at'],
+                'bytes': self.languages(r)
+            } for r in self.repos if not r['fork'] and not r['archived']],
+            'star_daily': [{
+                'username': u,
+                'repo': r['name'],
+                'date': datetime.strptime(day, '%Y-%m-%d'),
+                'count': count
+            } for r in self.repos if not r['fork']
+              for day, count in Counter(s['starred_at'][:10] for s in self.stargazers(r)).items()],
+            'stargazer_progress': [{
+                'username': u,
+                'repo': r['name'],
+                'page': r['stargazers_count'] // 100 + 1,
+                'seen': r['stargazers_count'] % 100,
+                'total': r['stargazers_count']
+            } for r in self.repos if not r['fork'] and r['stargazers_count']]
+        }
+
+
+def _iso(dt):
+    return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def load_dataset(db, dataset):
+    """Replace the user's data in db with the synthetic documents
+    
+    The user's collections are emptied first, so everything is bulk
+    inserted in batches, the archive included, instead of upserted.
+    """
+    db.clear_user_data(dataset.username)
+    db.activity_archive.delete_many({'username': dataset.username})
+    documents = dataset.documents()
+    documents_for = dict(documents, activity_archive=[
+        db.archive_document(dataset.username, EventRecord(**d)) for d in documents['activity']
+    ])
+    for name, docs in documents_for.items():
+        for start in range(0, len(docs), INSERT_BATCH_SIZE):
+            getattr(db, name).insert_many([dict(d) for d in docs[start:start + INSERT_BATCH_SIZE]])
+    DailyCommitSeries(db, dataset.username).rebuild()
+    LanguageBytes(db, dataset.username).rebuild()
+
+    db.repo_metrics.delete_many({'username': dataset.username})
+    snapshots = RepoSnapshots(db, dataset.username)
+    repos = [RepoRecord.from_api(dataset.username, r) for r in dataset.repos]
+    today = datetime.combine(date.today(), datetime.min.time())
+    for days_ago, share in SNAPSHOT_HISTORY:
+        snapshots.record([replace(r, stars=int(r.stars * share), forks=int(r.forks * share)) for r in repos],
+                         day=today - timedelta(days=days_ago))
+
+    sketches = UserSketches(db)
+    sketches.add(dataset.username, 'contributors', (c['author'] for c in documents['commits']), rebuild=True)
+    sketches.add(dataset.username, 'repos_touched', (e['repo'] for e in documents['activity']), rebuild=True)
+    sketches.replace_quantiles(dataset.username, 'repo_size', [r['size'] for r in documents['repos']])
+    db.mark_changed(dataset.username)
+
+
+def open_database(mongo_uri=None):
+    """Connect to a local MongoDB, or fall back to an in-memory mongomock client"""
+    if mongo_uri:
+        return Database(mongo_uri)
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("Install mongomock or pass --mongo-uri mongodb://localhost:27017")
+    return Database(None, client=mongomock.MongoClient())
+
+
+# ========== MOCK GITHUB SERVER ==========
+
+class FaultInjector:
+    """Fails a fraction of requests with 5xx errors or rate-limit responses carrying Retry-After"""
+
+    FAULTS = (502, 503, 500, 429, 403)
+
+    def __init__(self, rate=0.0, seed=0):
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.injected = 0
+        self._lock = threading.Lock()
+
+    def next_fault(self):
+        with self._lock:
+            if self.random.random() >= self.rate:
+                return None
+            self.injected += 1
+            return self.random.choice(self.FAULTS)
+
+
+class MockGitHubServer:
+    """Local HTTP server answering the GitHub endpoints GitHubFetcher uses"""
+
+    def __init__(self, datasets, fault_rate=0.0, seed=0):
+        self.datasets = {d.username: d for d in datasets}
+        self.faults = FaultInjector(fault_rate, seed)
+        handler = type('Handler', (_MockGitHubHandler,), {
+            'server_datasets': self.datasets,
+            'faults': self.faults
+        })
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _MockGitHubHandler(BaseHTTPRequestHandler):
+    server_datasets = {}
+    faults = None
+
+    def do_GET(self):
+        fault = self.faults.next_fault() if self.faults else None
+        if fault in (429, 403):
+            # Secondary rate limit: GitHub asks the client to back off
+            return self._send(fault, {'message': 'You have exceeded a secondary rate limit'},
+                              {'Retry-After': '0'})
+        if fault:
+            return self._send(fault, {'message': 'Server Error'})
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        per_page = int(query.get('per_page', ['30'])[0])
+        page = int(query.get('page', ['1'])[0])
+        parts = [p for p in url.path.split('/') if p]
+
+        dataset = self.server_datasets.get(parts[1]) if len(parts) > 1 else None
+        if dataset is None:
+            return self._send(404, {'message': 'Not Found'})
+
+        if parts[0] == 'users' and len(parts) == 2:
+            return self._send(200, dataset.user())
+        if parts[0] == 'users' and parts[2] == 'repos':
+            return self._send(200, _page(dataset.repos, page, per_page))
+        if parts[0] == 'users' and parts[2] == 'events':
+            # Like GitHub, only the latest 300 events are reachable
+            return self._send(200, _page(dataset.events[:300], page, per_page))
+        if parts[0] == 'repos' and len(parts) == 4 and parts[2] in dataset.commits:
+            if parts[3] == 'commits':
+                return self._send(200, _page(dataset.commits[parts[2]], page, per_page))
+            repo = next(r for r in dataset.repos if r['name'] == parts[2])
+            if parts[3] == 'topics':
+                return self._send(200, {'names': repo['topics']})
+            if parts[3] == 'languages':
+                return self._send(200, dataset.languages(repo))
+            if parts[3] == 'stargazers':
+                return self._send(200, _page(dataset.stargazers(repo), page, per_page))
+        return self._send(404, {'message': 'Not Found'})
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-RateLimit-Remaining', '5000')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _page(items, page, per_page):
+    return items[(page - 1) * per_page:page * per_page]
+
+
+# ========== TIMING ==========
+
+def time_call(func, repeat):
+    """Run func repeat times and summarize wall-clock timings in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'max_ms': round(max(samples), 3),
+        'repeat': repeat
+    }
+
+
+def measure_import_time(modules=STARTUP_MODULES, runs=5):
+    """Cold-import cost of modules in milliseconds (best of runs), via python -X importtime"""
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(modules)],
+            cwd=HERE, capture_output=True, text=True, check=True
+        )
+        total_us = 0
+        for line in proc.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"; top-level names are unindented
+            _, _, rest = line.partition(':')
+            fields = rest.split('|')
+            if len(fields) == 3 and fields[2].strip() in modules and not fields[2].startswith('  '):
+                total_us += int(fields[1])
+        best = total_us if best is None else min(best, total_us)
+    return round(best / 1000, 2)
+
+
+def chart_methods():
+    from visualizations import Visualizations
+    return sorted(
+        name for name, attr in vars(Visualizations).items()
+        if hasattr(attr, '__wrapped__')
+    )
+
+
+def run_fetch_pipeline(db, base_url, username):
+    from fetch_data import GitHubFetcher
+    from preprocess import DataPreprocessor
+
+    db.clear_user_data(username)
+    GitHubFetcher(db, base_url=base_url).refresh(username)
+    DataPreprocessor(db, username).aggregate_languages()
+
+
+def stored_counts(db, username):
+    return {name: getattr(db, name).count_documents({'username': username})
+            for name in ('repos', 'commits', 'activity', 'topics', 'repo_languages', 'languages', 'star_daily')}
+
+
+def run_fault_check(scale, fault_rate, mongo_uri=None, seed=0, rounds=5):
+    """Refresh a fully fetched user through a fault-injecting server and check nothing stored was lost
+
+    The stub serves the same data every time, so any drop in a stored count
+    means a partial fetch overwrote good data.
+    """
+    from contextlib import redirect_stdout
+    from io import StringIO
+    from fetch_data import GitHubFetcher
+    from retry import RetryPolicy, reset_breakers
+
+    username = f'fault-user-{scale}'
+    dataset = SyntheticDataset(username, scale, seed=seed)
+    db = open_database(mongo_uri)
+    rows = []
+    try:
+        with redirect_stdout(StringIO()):
+            with MockGitHubServer([dataset]) as server:
+                run_fetch_pipeline(db, server.base_url, username)
+        baseline = stored_counts(db, username)
+
+        for round_ in range(rounds):
+            reset_breakers()
+            error = None
+            with MockGitHubServer([dataset], fault_rate=fault_rate, seed=seed + round_) as server:
+                # Short delays keep the check fast; Retry-After from the stub is 0
+                fetcher = GitHubFetcher(db, base_url=server.base_url,
+                                        retry=RetryPolicy(base_delay=0.005, max_delay=0.05))
+                start = time.perf_counter()
+                with redirect_stdout(StringIO()):
+                    try:
+                        partial = fetcher.refresh(username)
+                    except Exception as e:
+                        partial, error = {}, str(e)
+                seconds = time.perf_counter() - start
+                injected = server.faults.injected
+
+            after = stored_counts(db, username)
+            rows.append({
+                'round': round_,
+                'faults_injected': injected,
+                'retries': fetcher.retries,
+                'seconds': round(seconds, 3),
+                'partial': sorted(partial),
+                'error': error,
+                'lost': {k: baseline[k] - after[k] for k in baseline if after[k] < baseline[k]}
+            })
+        db.clear_user_data(username)
+    finally:
+        db.close()
+    return {'baseline': baseline, 'rounds': rows}
+
+
+def run_benchmarks(scales, repeat=3, mongo_uri=None, include_fetch=True, seed=0):
+    """Benchmark every preprocessing step, chart and the fetch pipeline at each scale"""
+    from contextlib import redirect_stdout
+    from io import StringIO
+    from preprocess import DataPreprocessor
+    from visualizations import Visualizations
+
+    db = open_database(mongo_uri)
+    results = {}
+    try:
+        for scale in scales:
+            username = f'bench-user-{scale}'
+            dataset = SyntheticDataset(username, scale, seed=seed)
+            scale_results = {}
+
+            # Silence the fetchers' progress prints so they don't swamp the report
+            with redirect_stdout(StringIO()):
+                scale_results['load_dataset'] = time_call(lambda: load_dataset(db, dataset), 1)
+
+                preprocessor = DataPreprocessor(db, username)
+                for name in PREPROCESSOR_METHODS:
+                    scale_results[f'preprocess.{name}'] = time_call(getattr(preprocessor, name), repeat)
+
+                viz = Visualizations(db, username)
+                for name in chart_methods():
+                    scale_results[f'visualizations.{name}'] = time_call(getattr(viz, name), repeat)
+
+                if include_fetch:
+                    with MockGitHubServer([dataset]) as server:
+                        scale_results['fetch.pipeline'] = time_call(
+                            lambda: run_fetch_pipeline(db, server.base_url, username), 1
+                        )
+
+            db.clear_user_data(username)
+            results[str(scale)] = scale_results
+            print(f"✓ Benchmarked scale {scale}")
+    finally:
+        db.close()
+
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'commit': _git_commit(),
+            'backend': 'mongodb' if mongo_uri else 'mongomock',
+            'repeat': repeat,
+            'seed': seed
+        },
+        'import_ms': measure_import_time(),
+        'results': results
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(baseline, current, threshold=1.25):
+    """List benchmarks whose median got slower than threshold × baseline"""
+    regressions = []
+    for scale, benches in current['results'].items():
+        base_benches = baseline.get('results', {}).get(scale, {})
+        for name, stats in benches.items():
+            base = base_benches.get(name)
+            if not base or base['median_ms'] <= 0:
+                continue
+            ratio = stats['median_ms'] / base['median_ms']
+            if ratio > threshold:
+                regressions.append({
+                    'scale': scale,
+                    'benchmark': name,
+                    'baseline_ms': base['median_ms'],
+                    'current_ms': stats['median_ms'],
+                    'ratio': round(ratio, 2)
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GitHub Analytics Pro on synthetic datasets")
+    parser.add_argument('--scales', type=int, nargs='+',
+                        help="records per collection (commits/events) for each synthetic user, 10..1000000 "
+                             f"(10..{MOCK_MAX_SCALE} on mongomock); default 10 1000, plus 100000 with --mongo-uri")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mongo-uri', help="benchmark against a real local MongoDB instead of mongomock")
+    parser.add_argument('--skip-fetch', action='store_true', help="skip the mocked GitHub fetch pipeline")
+    parser.add_argument('--output', default='benchmark_report.json')
+    parser.add_argument('--compare', help="baseline report to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown ratio counted as a regression")
+    parser.add_argument('--import-budget', action='store_true',
+                        help=f"only check that startup imports stay under {IMPORT_BUDGET_MS} ms")
+    parser.add_argument('--fault-rate', type=float,
+                        help="only check that refreshes through a stub failing this fraction of requests lose no data")
+    args = parser.parse_args(argv)
+
+    if args.import_budget:
+        import_ms = measure_import_time()
+        print(f"Startup imports: {import_ms} ms (budget {IMPORT_BUDGET_MS} ms)")
+        return 0 if import_ms <= IMPORT_BUDGET_MS else 1
+
+    if args.scales is None:
+        args.scales = [10, 1000, 100000] if args.mongo_uri else [10, 1000]
+    for scale in args.scales:
+        if not 10 <= scale <= 1_000_000:
+            parser.error(f"scale {scale} outside 10..1000000")
+        if scale > MOCK_MAX_SCALE and not args.mongo_uri:
+            parser.error(f"scale {scale} is impractical on mongomock (max {MOCK_MAX_SCALE}); pass --mongo-uri")
+
+    if args.fault_rate is not None:
+        lost = False
+        for scale in args.scales:
+            check = run_fault_check(scale, args.fault_rate, mongo_uri=args.mongo_uri, seed=args.seed)
+            for row in check['rounds']:
+                status = '✗ lost ' + str(row['lost']) if row['lost'] else '✓ no data lost'
+                print(f"scale {scale} round {row['round']}: {row['faults_injected']} faults, "
+                      f"{row['retries']} retries, partial={row['partial'] or '-'}, "
+                      f"{row['seconds']}s {status}" + (f" (error: {row['error']})" if row['error'] else ''))
+                lost = lost or bool(row['lost'])
+        return 1 if lost else 0
+
+    report = run_benchmarks(args.scales, repeat=args.repeat, mongo_uri=args.mongo_uri,
+                            include_fetch=not args.skip_fetch, seed=args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Report written to {args.output}\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.threshold)
+        for r in regressions:
+            print(f"✗ {r['benchmark']} @ {r['scale']}: {r['baseline_ms']}ms → {r['current_ms']}ms ({r['ratio']}×)")
+        if regressions:
+            return 1
+        print("✓ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
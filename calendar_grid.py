@@ -0,0 +1,81 @@
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+
+WEEKS = 53
+DAYS = 7
+WEEKDAY_LABELS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def to_days(timestamps):
+    """ISO-8601 timestamps as a datetime64[D] array (no per-item parsing)"""
+    return np.asarray(timestamps, dtype='U10').astype('datetime64[D]')
+
+
+def _iso_parts(days):
+    """ISO year, week index (0-52) and weekday (Mon=0) for datetime64[D] values"""
+    offsets = days.astype('int64')
+    # 1970-01-01 was a Thursday
+    weekday = (offsets + 3) % 7
+    # A day belongs to the ISO year of its week's Thursday
+    thursday = (offsets - weekday + 3).astype('datetime64[D]')
+    iso_year = thursday.astype('datetime64[Y]')
+    week = (thursday - iso_year.astype('datetime64[D]')).astype('int64') // 7
+    return iso_year.astype('int64') + 1970, week, weekday
+
+
+def weeks_in_year(years):
+    """52 or 53 for each ISO year: the week holding 28 December is the last one"""
+    dec28 = np.array([f'{int(year):04d}-12-28' for year in years], dtype='datetime64[D]')
+    return _iso_parts(dec28)[1] + 1
+
+
+class ContributionCalendar:
+    """Daily counts binned into a dense (years × 53 weeks × 7 weekdays) array by ISO week
+
+    Every day maps to one cell through integer offsets from the epoch, so a
+    history of any length is binned with a single bincount.
+    """
+
+    def __init__(self, years, grid):
+        self.years = years
+        self.grid = grid
+
+    @classmethod
+    def from_days(cls, days, counts=None):
+        """Bin datetime64[D] days, optionally weighted by per-day counts"""
+        days = np.asarray(days, dtype='datetime64[D]')
+        if days.size == 0:
+            return cls(np.array([], dtype='int64'), np.zeros((0, WEEKS, DAYS)))
+
+        iso_year, week, weekday = _iso_parts(days)
+        first = iso_year.min()
+        n_years = int(iso_year.max() - first + 1)
+        cells = ((iso_year - first) * WEEKS + week) * DAYS + weekday
+        grid = np.bincount(cells, weights=counts, minlength=n_years * WEEKS * DAYS)
+        return cls(np.arange(first, first + n_years), grid.reshape(n_years, WEEKS, DAYS))
+
+    @classmethod
+    def from_timestamps(cls, timestamps):
+        return cls.from_days(to_days([ts for ts in timestamps if ts]))
+
+    def totals(self):
+        """Total count per year"""
+        return self.grid.sum(axis=(1, 2))
+
+    def recent(self, n):
+        """Calendar restricted to the last n years"""
+        return ContributionCalendar(self.years[-n:], self.grid[-n:])
+
+    def year_matrix(self, index):
+        """7 × 53 weekday-by-week matrix for one year, NaN where the year has no such week"""
+        matrix = self.grid[index].T.astype(float)
+        matrix[:, weeks_in_year([self.years[index]])[0]:] = np.nan
+        return matrix
+
+    def year_dates(self, index):
+        """7 × 53 matrix of the ISO dates behind each cell of year_matrix"""
+        jan4 = np.datetime64(f'{self.years[index]:04d}-01-04')
+        monday = jan4 - (jan4.astype('int64') + 3) % 7
+        offsets = np.arange(WEEKS)[None, :] * DAYS + np.arange(DAYS)[:, None]
+        return (monday + offsets).astype(str)
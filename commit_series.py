@@ -0,0 +1,143 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from filters import own_commits_query
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+pymongo = lazy_import('pymongo')
+
+
+def _day(timestamp):
+    """Midnight (UTC) of an ISO-8601 commit timestamp"""
+    return datetime.strptime(timestamp[:10], '%Y-%m-%d')
+
+
+class DailyCommitSeries:
+    """Per-user daily counts of the user's own commits with running prefix sums (commit_daily collection)
+
+    Each document holds one day's ``count`` and the ``cumulative`` number of
+    commits up to and including that day, so the commits in any window are
+    ``cumulative[end] - cumulative[start]`` without rescanning history.
+    """
+
+    def __init__(self, db, username):
+        self.db = db
+        self.username = username
+
+    def add_commits(self, timestamps):
+        """Add newly ingested commits, touching only the affected days"""
+        days = Counter(_day(ts) for ts in timestamps if ts)
+        if not days:
+            return 0
+
+        self.db.commit_daily.bulk_write([
+            pymongo.UpdateOne(
+                {'username': self.username, 'date': day},
+                {'$inc': {'count': count}, '$setOnInsert': {'cumulative': 0}},
+                upsert=True
+            )
+            for day, count in days.items()
+        ], ordered=False)
+        self._update_prefix_sums(min(days))
+        return len(days)
+
+    def _update_prefix_sums(self, start):
+        """Recompute cumulative counts from start onwards"""
+        previous = self.db.commit_daily.find_one(
+            {'username': self.username, 'date': {'$lt': start}},
+            sort=[('date', pymongo.DESCENDING)]
+        )
+        running = previous['cumulative'] if previous else 0
+
+        operations = []
+        cursor = self.db.commit_daily.find(
+            {'username': self.username, 'date': {'$gte': start}}
+        ).sort('date', pymongo.ASCENDING)
+        for doc in cursor:
+            running += doc['count']
+            if doc.get('cumulative') != running:
+                operations.append(pymongo.UpdateOne({'_id': doc['_id']}, {'$set': {'cumulative': running}}))
+        if operations:
+            self.db.commit_daily.bulk_write(operations, ordered=False)
+
+    def rebuild(self):
+        """Rebuild the whole series from the commits collection"""
+        self.db.commit_daily.delete_many({'username': self.username})
+        commits = self.db.commits.find(own_commits_query(self.username), {'commit_timestamp': 1, '_id': 0})
+        days = Counter(_day(c['commit_timestamp']) for c in commits if c.get('commit_timestamp'))
+        if not days:
+            return 0
+
+        # Starting from empty, every day and its prefix sum is known up front: one insert, no upserts
+        docs, running = [], 0
+        for day in sorted(days):
+            running += days[day]
+            docs.append({'username': self.username, 'date': day, 'count': days[day], 'cumulative': running})
+        self.db.commit_daily.insert_many(docs)
+        return len(docs)
+
+    def is_empty(self):
+        return self.db.commit_daily.find_one({'username': self.username}) is None
+
+    def daily_counts(self, start=None, end=None):
+        """Stored days in [start, end) as a DataFrame of date, commits, cumulative"""
+        query = {'username': self.username}
+        if start or end:
+            query['date'] = {}
+            if start:
+                query['date']['$gte'] = start
+            if end:
+                query['date']['$lt'] = end
+        docs = list(self.db.commit_daily.find(
+            query, {'date': 1, 'count': 1, 'cumulative': 1, '_id': 0}
+        ).sort('date', pymongo.ASCENDING))
+        if not docs:
+            return pd.DataFrame()
+        df = pd.DataFrame(docs).rename(columns={'count': 'commits'})
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def rolling(self, window=7, start=None, end=None):
+        """Daily commits in [start, end) with a calendar-day rolling average over window days
+
+        Only the requested range plus one window of look-back is read.
+        """
+        lookback = start - timedelta(days=window) if start else None
+        df = self.daily_counts(lookback, end)
+        if df.empty:
+            return df
+
+        dates = df['date'].values
+        cumulative = df['cumulative'].values
+        # Prefix sum just before the first row read
+        base = cumulative[0] - df['commits'].values[0]
+
+        # Cumulative count as of (date - window) for every row
+        cutoff = dates - np.timedelta64(window, 'D')
+        idx = np.searchsorted(dates, cutoff, side='right') - 1
+        before = np.where(idx >= 0, cumulative[np.clip(idx, 0, None)], base)
+
+        df['rolling_avg'] = (cumulative - before) / window
+        if start:
+            df = df[df['date'] >= pd.Timestamp(start)].reset_index(drop=True)
+        return df
+
+
+def rolling_from_timestamps(timestamps, window=7, start=None):
+    """Same frame as DailyCommitSeries.rolling, computed from an already filtered set of commits"""
+    days = Counter(_day(ts) for ts in timestamps if ts)
+    if not days:
+        return pd.DataFrame()
+    counts = pd.Series(days).sort_index()
+    dense = counts.asfreq('D', fill_value=0)
+    rolling = dense.rolling(window, min_periods=1).sum() / window
+    df = pd.DataFrame({
+        'date': counts.index,
+        'commits': counts.values,
+        'cumulative': counts.cumsum().values,
+        'rolling_avg': rolling.loc[counts.index].values
+    })
+    if start:
+        df = df[df['date'] >= pd.Timestamp(start)].reset_index(drop=True)
+    return df
@@ -1,13 +1,52 @@
+import os
 import streamlit as st
-import plotly.graph_objects as go
+from lazy import lazy_import
 from db import Database
 from fetch_data import GitHubFetcher
 from preprocess import DataPreprocessor
 from visualizations import Visualizations
+from figure_cache import FigureCache
+from filters import DataFilters, TIME_RANGES, TIME_RANGE_LABELS
+from metrics import metrics, start_metrics_server
+from profiling import RerunProfiler, list_traces, trace_summary
+from version_watch import VersionWatcher
 from config import MONGODB_CONNECTION_STRING
 
+# Only needed once a chart is drawn; the empty landing page never loads plotly
+go = lazy_import('plotly.graph_objects')
+
+try:
+    from config import METRICS_PORT
+except ImportError:
+    METRICS_PORT = None
+
+try:
+    from config import PROFILING_ENABLED
+except ImportError:
+    PROFILING_ENABLED = False
+
 st.set_page_config(page_title="GitHub Analytics Pro", layout="wide", initial_sidebar_state="expanded")
 
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
+
+
+@st.cache_resource
+def start_version_watcher():
+    """One watcher per process, evicting cached profile headers when any replica writes"""
+    db = Database(MONGODB_CONNECTION_STRING)
+    watcher = VersionWatcher(db)
+    watcher.subscribe(lambda username, version: db.invalidate_profile(username))
+    return watcher.start()
+
+
+start_version_watcher()
+
+# Opt-in per-section profiling of this rerun (config flag or sidebar toggle from the previous run)
+profiler = RerunProfiler(PROFILING_ENABLED or st.session_state.get('profile_reruns', False),
+                         st.session_state.get('username'))
+profiler.start('page_setup')
+
 def show_no_data_chart(title):
     """Create an empty chart with NO DATA message"""
     fig = go.Figure()
@@ -34,6 +73,22 @@ def show_no_data_chart(title):
     
     return fig
 
+def sidebar_filters(db, username):
+    """Render the filter widgets in the sidebar and return the selection"""
+    options = DataPreprocessor(db, username).filter_options()
+    
+    with st.sidebar:
+        st.divider()
+        st.markdown("### 🔎 Filters")
+        # Keys are per user so stale selections never point at another user's repos
+        time_range = st.selectbox("Time Range", list(TIME_RANGES), format_func=TIME_RANGE_LABELS.get,
+                                  key=f"filter_time_range_{username}")
+        languages = st.multiselect("Languages", options['languages'], key=f"filter_languages_{username}")
+        repos = st.multiselect("Repositories", options['repos'], key=f"filter_repos_{username}")
+        event_types = st.multiselect("Event Types", options['event_types'], key=f"filter_event_types_{username}")
+    
+    return DataFilters(time_range, languages, repos, event_types)
+
 # Professional Light Mode CSS
 st.markdown("""
 <style>
@@ -252,7 +307,7 @@ if 'section' not in st.session_state:
 
 
 # Sidebar
-with st.sidebar:
+with profiler.section('sidebar'), st.sidebar:
     st.markdown("### ⚙ Control Panel")
     
     username = st.text_input("GitHub Username", value=st.session_state.username)
@@ -263,7 +318,7 @@ with st.sidebar:
                 db = Database(MONGODB_CONNECTION_STRING)
                 
                 # Check if user already exists in database
-                existing_user = db.users.find_one({'username': username})
+                existing_user = db.get_profile_summary(username)
                 
                 if existing_user:
                     # User exists, load from database
@@ -273,12 +328,7 @@ with st.sidebar:
                 else:
                     # User doesn't exist, fetch from API
                     with st.spinner(f"Fetching {username} from GitHub..."):
-                        fetcher = GitHubFetcher(db)
-                        fetcher.fetch_user(username)
-                        repos = fetcher.fetch_repos(username)
-                        fetcher.fetch_events(username)
-                        fetcher.fetch_commits(username, repos)
-                        fetcher.fetch_repo_topics(username, repos)
+                        GitHubFetcher(db).refresh(username)
                         DataPreprocessor(db, username).aggregate_languages()
                         st.session_state.username = username
                         st.success("✅ Fetched and saved!")
@@ -304,15 +354,10 @@ with st.sidebar:
         if st.button("🔄 Refresh from GitHub", use_container_width=True):
             try:
                 db = Database(MONGODB_CONNECTION_STRING)
-                db.clear_user_data(st.session_state.username)
                 
+                # Stored data is only replaced by parts of the refresh that complete
                 with st.spinner(f"Refreshing {st.session_state.username}..."):
-                    fetcher = GitHubFetcher(db)
-                    fetcher.fetch_user(st.session_state.username)
-                    repos = fetcher.fetch_repos(st.session_state.username)
-                    fetcher.fetch_events(st.session_state.username)
-                    fetcher.fetch_commits(st.session_state.username, repos)
-                    fetcher.fetch_repo_topics(st.session_state.username, repos)
+                    GitHubFetcher(db).refresh(st.session_state.username)
                     DataPreprocessor(db, st.session_state.username).aggregate_languages()
                     st.success("✅ Data refreshed!")
                     st.rerun()
@@ -320,13 +365,28 @@ with st.sidebar:
                 db.close()
             except Exception as e:
                 st.error(f"Error: {str(e)}")
+    
+    st.divider()
+    show_debug = st.checkbox("🐞 Debug Metrics", value=False)
+    profile_reruns = st.checkbox("🔬 Profile Reruns", key='profile_reruns', disabled=PROFILING_ENABLED)
+    
+    selected_trace = None
+    if profile_reruns or PROFILING_ENABLED:
+        traces = list_traces(st.session_state.username or None)
+        if traces:
+            selected_trace = st.selectbox(
+                "Recorded Traces",
+                traces,
+                format_func=lambda t: f"{t['user']} · {t['section']} · {t['duration_ms']} ms · {t['recorded_at']:%H:%M:%S}"
+            )
 
 
 # Main Content
+profiler.start(f"render_{st.session_state.section}" if st.session_state.username else 'landing')
 if st.session_state.username:
     try:
         db = Database(MONGODB_CONNECTION_STRING)
-        user = db.users.find_one({'username': st.session_state.username})
+        user = db.get_profile_summary(st.session_state.username)
         
         if user:
             st.markdown("""
@@ -348,12 +408,16 @@ if st.session_state.username:
             with col4:
                 st.metric("Repositories", user['public_repos'])
             with col5:
-                repos = list(db.repos.find({'username': st.session_state.username, 'is_fork': False}))
-                st.metric("Total Stars", sum(r['stars'] for r in repos))
+                st.metric("Total Stars", user['total_stars'])
+            
+            if user['partial_results']:
+                st.warning(f"⚠️ The last GitHub fetch was incomplete ({', '.join(user['partial_results'])}); "
+                           "earlier data is shown where available. Refresh to retry.")
             
             st.divider()
             
-            viz = Visualizations(db, st.session_state.username)
+            filters = sidebar_filters(db, st.session_state.username)
+            viz = Visualizations(db, st.session_state.username, filters=filters, figure_cache=FigureCache(db))
             section = st.session_state.section
 
             
@@ -406,6 +470,12 @@ if st.session_state.username:
                     else:
                         st.plotly_chart(show_no_data_chart("Repository Topics"), use_container_width=True)
                 
+                fig = viz.repo_topics_network()
+                if fig:
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.plotly_chart(show_no_data_chart("Topic Co-occurrence"), use_container_width=True)
+                
                 # New: Repository & Language Relationship
                 fig = viz.repo_language_relationship()
                 if fig:
@@ -473,6 +543,12 @@ if st.session_state.username:
                         st.plotly_chart(fig, use_container_width=True)
                     else:
                         st.plotly_chart(show_no_data_chart("Issue Status"), use_container_width=True)
+                
+                fig = viz.productivity_coding_sessions()
+                if fig:
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.plotly_chart(show_no_data_chart("Peak Coding Sessions"), use_container_width=True)
             
             elif section == 'Growth':
                 st.markdown("## Growth Metrics")
@@ -507,3 +583,28 @@ else:
     </div>
     """, unsafe_allow_html=True)
     st.info("← Enter a GitHub username in the sidebar to begin")
+profiler.stop()
+
+# Optional debug panel with timings collected in this process
+if show_debug:
+    with st.expander("🐞 Performance Metrics", expanded=True):
+        rows = metrics.snapshot()
+        if rows:
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+        else:
+            st.caption("No timings recorded yet")
+        st.download_button("Download Prometheus metrics", metrics.render_prometheus(),
+                           file_name="metrics.prom", mime="text/plain")
+
+# Optional viewer for a trace picked in the sidebar
+if selected_trace:
+    with st.expander(f"🔬 Trace: {selected_trace['section']} ({selected_trace['duration_ms']} ms)", expanded=True):
+        summary = trace_summary(selected_trace['path'])
+        if summary:
+            st.code(summary)
+        else:
+            import streamlit.components.v1 as components
+            with open(selected_trace['path'], encoding='utf-8') as f:
+                components.html(f.read(), height=600, scrolling=True)
+        with open(selected_trace['path'], 'rb') as f:
+            st.download_button("Download trace", f.read(), file_name=os.path.basename(selected_trace['path']))
@@ -1,19 +1,158 @@
-from pymongo import MongoClient
+import time
+from functools import wraps
 from datetime import datetime
+from cache import TTLCache
+from figure_cache import FIGURE_CACHE_TTL
+from lazy import lazy_import
+from metrics import metrics
+
+pymongo = lazy_import('pymongo')
+
+# Archived activity events expire this long after they happened
+ACTIVITY_RETENTION_DAYS = 365 * 2
+
+# Profile header data (avatar, counts, total stars) shared by every Database in the process;
+# writes evict entries here, and a VersionWatcher subscription evicts them for other processes' writes
+profile_cache = TTLCache(maxsize=1024, ttl=600)
+
+# Connections whose indexes were already ensured in this process
+_indexed_clients = set()
+
+# Collection methods that hit the server and are worth timing
+TIMED_OPERATIONS = {
+    'find_one', 'insert_one', 'insert_many', 'delete_one', 'delete_many',
+    'update_one', 'update_many', 'replace_one', 'bulk_write', 'aggregate',
+    'count_documents', 'distinct', 'find_one_and_update', 'create_index'
+}
+
+
+class TimedCursor:
+    """Cursor wrapper that times the full iteration of a find() query"""
+
+    def __init__(self, cursor, collection_name):
+        self._cursor = cursor
+        self._collection_name = collection_name
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        @wraps(attr)
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # Keep chained calls like .sort().limit() wrapped
+            return self if result is self._cursor else result
+        return call
+
+    def __iter__(self):
+        start = time.perf_counter()
+        try:
+            yield from self._cursor
+        finally:
+            metrics.observe('mongo_query_seconds', time.perf_counter() - start,
+                            collection=self._collection_name, operation='find')
+
+
+class TimedCollection:
+    """Collection proxy recording per-query latency"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return TimedCursor(self._collection.find(*args, **kwargs), self._collection.name)
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in TIMED_OPERATIONS:
+            return attr
+
+        @wraps(attr)
+        def call(*args, **kwargs):
+            with metrics.timer('mongo_query_seconds', collection=self._collection.name, operation=name):
+                return attr(*args, **kwargs)
+        return call
+
 
 class Database:
-    def __init__(self, connection_string):
-        """Initialize MongoDB Atlas connection"""
-        self.client = MongoClient(connection_string)
+    def __init__(self, connection_string, client=None):
+        """Initialize MongoDB Atlas connection (or wrap an existing client)"""
+        self.client = client if client is not None else pymongo.MongoClient(connection_string)
+        self._index_key = connection_string or id(self.client)
         self.db = self.client['github_dashboard']
         
         # Collections
-        self.users = self.db['users']
-        self.repos = self.db['repos']
-        self.commits = self.db['commits']
-        self.languages = self.db['languages']
-        self.activity = self.db['activity']
-        self.topics = self.db['topics']
+        self.users = self.collection('users')
+        self.repos = self.collection('repos')
+        self.commits = self.collection('commits')
+        self.languages = self.collection('languages')
+        self.activity = self.collection('activity')
+        self.topics = self.collection('topics')
+        self.activity_archive = self.collection('activity_archive')
+        self.commit_daily = self.collection('commit_daily')
+        self.repo_languages = self.collection('repo_languages')
+        self.star_daily = self.collection('star_daily')
+        self.stargazer_progress = self.collection('stargazer_progress')
+        self.repo_metrics = self.collection('repo_metrics')
+        self.fetch_jobs = self.collection('fetch_jobs')
+        self.data_versions = self.collection('data_versions')
+        self.figure_cache = self.collection('figure_cache')
+        self.trending = self.collection('trending')
+        self.trending_users = self.collection('trending_users')
+        self.user_sketches = self.collection('user_sketches')
+        self.skill_percentiles = self.collection('skill_percentiles')
+        
+        self.ensure_indexes()
+    
+    def collection(self, name):
+        """Get an instrumented collection by name"""
+        return TimedCollection(self.db[name])
+    
+    def ensure_indexes(self):
+        """Create indexes once per cluster per process (Streamlit reruns reuse the process)"""
+        if self._index_key in _indexed_clients:
+            return
+        self.activity_archive.create_index(
+            [('username', pymongo.ASCENDING), ('event_id', pymongo.ASCENDING)], unique=True
+        )
+        self.activity_archive.create_index([('username', pymongo.ASCENDING), ('created_at', pymongo.DESCENDING)])
+        self.activity_archive.create_index(
+            'created_at', expireAfterSeconds=ACTIVITY_RETENTION_DAYS * 24 * 3600
+        )
+        self.commit_daily.create_index([('username', pymongo.ASCENDING), ('date', pymongo.ASCENDING)], unique=True)
+        # Filtered dashboard views: time range, repo and language predicates
+        self.commits.create_index([('username', pymongo.ASCENDING), ('commit_timestamp', pymongo.ASCENDING)])
+        self.commits.create_index([('username', pymongo.ASCENDING), ('repo', pymongo.ASCENDING), ('commit_timestamp', pymongo.ASCENDING)])
+        # Dedup on write; commits stored before SHAs were recorded are left out
+        self.commits.create_index(
+            [('username', pymongo.ASCENDING), ('repo', pymongo.ASCENDING), ('sha', pymongo.ASCENDING)],
+            unique=True, partialFilterExpression={'sha': {'$type': 'string'}}
+        )
+        # The user's own commits, for the user-scoped activity charts
+        self.commits.create_index([('username', pymongo.ASCENDING), ('author', pymongo.ASCENDING), ('commit_timestamp', pymongo.ASCENDING)])
+        self.repos.create_index([('username', pymongo.ASCENDING), ('language', pymongo.ASCENDING)])
+        self.topics.create_index([('username', pymongo.ASCENDING), ('repo', pymongo.ASCENDING)])
+        self.repo_languages.create_index([('username', pymongo.ASCENDING), ('repo', pymongo.ASCENDING)], unique=True)
+        self.languages.create_index([('username', pymongo.ASCENDING), ('language', pymongo.ASCENDING)])
+        self.star_daily.create_index(
+            [('username', pymongo.ASCENDING), ('repo', pymongo.ASCENDING), ('date', pymongo.ASCENDING)], unique=True
+        )
+        self.stargazer_progress.create_index([('username', pymongo.ASCENDING), ('repo', pymongo.ASCENDING)], unique=True)
+        # One delta-encoded bucket per repo per month; date ranges are bucket range scans
+        self.repo_metrics.create_index(
+            [('username', pymongo.ASCENDING), ('repo', pymongo.ASCENDING), ('bucket', pymongo.ASCENDING)], unique=True
+        )
+        # Job queue: idempotent enqueue per run stage, and the two claimable states
+        self.fetch_jobs.create_index([('run', pymongo.ASCENDING), ('endpoint', pymongo.ASCENDING)], unique=True)
+        self.fetch_jobs.create_index([('status', pymongo.ASCENDING), ('available_at', pymongo.ASCENDING)])
+        self.fetch_jobs.create_index([('status', pymongo.ASCENDING), ('lease_until', pymongo.ASCENDING)])
+        self.data_versions.create_index('username', unique=True)
+        self.data_versions.create_index('updated_at')
+        self.figure_cache.create_index('created_at', expireAfterSeconds=FIGURE_CACHE_TTL)
+        self.user_sketches.create_index([('name', pymongo.ASCENDING), ('username', pymongo.ASCENDING)], unique=True)
+        self.trending_users.create_index([('metric', pymongo.ASCENDING), ('username', pymongo.ASCENDING)], unique=True)
+        _indexed_clients.add(self._index_key)
     
     def clear_user_data(self, username):
         """Clear all data for a specific user (for refresh)"""
@@ -23,10 +162,112 @@ class Database:
         self.languages.delete_many({'username': username})
         self.activity.delete_many({'username': username})
         self.topics.delete_many({'username': username})
+        self.commit_daily.delete_many({'username': username})
+        self.repo_languages.delete_many({'username': username})
+        self.star_daily.delete_many({'username': username})
+        self.stargazer_progress.delete_many({'username': username})
+        self.mark_changed(username)
+        # activity_archive and repo_metrics are deliberately kept: they are the long-horizon history,
+        # and data_versions so versions keep increasing across a clear
+    
+    @staticmethod
+    def archive_document(username, event):
+        """activity_archive document for an EventRecord, or None without a timestamp"""
+        created_at = event.created_datetime
+        if created_at is None:
+            return None
+        return {
+            'username': username,
+            'event_id': event.event_id,
+            'event_type': event.event_type,
+            'repo': event.repo,
+            'created_at': created_at,
+            'partition': created_at.strftime('%Y-%m')
+        }
+    
+    def archive_events(self, username, events):
+        """Append EventRecords to the long-horizon archive, skipping ones already stored
+        
+        Events without a timestamp have no partition and are left out.
+        """
+        operations = []
+        skipped = 0
+        for event in events:
+            doc = self.archive_document(username, event)
+            if doc is None:
+                skipped += 1
+                continue
+            operations.append(pymongo.UpdateOne(
+                {'username': username, 'event_id': event.event_id},
+                {'$setOnInsert': doc},
+                upsert=True
+            ))
+        if skipped:
+            print(f"⚠️ Skipped archiving {skipped} events without a timestamp")
+        if not operations:
+            return 0
+        return self.activity_archive.bulk_write(operations, ordered=False).upserted_count
+    
+    def get_profile_summary(self, username):
+        """Profile header data for a user, read through the in-process cache"""
+        return profile_cache.get_or_compute(username, lambda: self._load_profile_summary(username))
+    
+    def _load_profile_summary(self, username):
+        user = self.users.find_one({'username': username})
+        if not user:
+            return None
+        
+        totals = list(self.repos.aggregate([
+            {'$match': {'username': username, 'is_fork': False}},
+            {'$group': {'_id': None, 'stars': {'$sum': '$stars'}}}
+        ]))
+        return {
+            'username': username,
+            'avatar': user.get('avatar', ''),
+            'followers': user.get('followers', 0),
+            'following': user.get('following', 0),
+            'public_repos': user.get('public_repos', 0),
+            'total_stars': totals[0]['stars'] if totals else 0,
+            'partial_results': user.get('partial_results', {})
+        }
+    
+    def set_fetch_status(self, username, partial):
+        """Record when a user was fetched and which parts of that fetch came back incomplete"""
+        update = {'$set': {'fetched_at': datetime.utcnow()}}
+        if partial:
+            update['$set']['partial_results'] = partial
+        else:
+            update['$unset'] = {'partial_results': ''}
+        self.users.update_one({'username': username}, update)
+        self.mark_changed(username)
+    
+    def mark_changed(self, username):
+        """Bump the user's data version after a write and return it
+        
+        Versions only ever increase, so caches keyed on them never serve data
+        older than the last write.
+        """
+        doc = self.data_versions.find_one_and_update(
+            {'username': username},
+            {'$inc': {'version': 1}, '$set': {'updated_at': datetime.utcnow()}},
+            upsert=True,
+            return_document=pymongo.ReturnDocument.AFTER
+        )
+        self.invalidate_profile(username)
+        return doc['version']
+    
+    def data_version(self, username):
+        """Current data version of a user (0 before anything was written)"""
+        doc = self.data_versions.find_one({'username': username}, {'version': 1})
+        return doc['version'] if doc else 0
+    
+    def invalidate_profile(self, username):
+        """Drop the cached profile summary after its data changed"""
+        profile_cache.invalidate(username)
     
     def user_exists(self, username):
         """Check if user data exists in database"""
-        return self.users.find_one({'username': username}) is not None
+        return self.get_profile_summary(username) is not None
     
     def close(self):
         """Close database connection"""
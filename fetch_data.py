@@ -1,17 +1,124 @@
-import requests
+import time
 from datetime import datetime
+from urllib.parse import urlparse
 from db import Database
+from lazy import lazy_import
+from metrics import metrics
+from commit_series import DailyCommitSeries
+from language_bytes import LanguageBytes
+from repo_snapshots import RepoSnapshots
+from trending import TrendingRanking
+from sketches import UserSketches
+from star_history import StarHistory, STARGAZERS_PER_PAGE
+from records import RepoRecord, CommitRecord, EventRecord, TopicRecord, insert_records, upsert_records
+from retry import RetryPolicy, CircuitOpenError, breaker_for
+from job_queue import LeaseLostError
+
+requests = lazy_import('requests')
+
+# GitHub only serves the latest 300 events of a user
+EVENTS_MAX_PAGES = 3
+# /languages requests per refresh; repos past this are picked up by the next one
+LANGUAGES_MAX_REQUESTS = 50
+# Stargazer pages per refresh; paging resumes where it stopped on the next one
+STARGAZERS_MAX_REQUESTS = 50
 
 class GitHubFetcher:
-    def __init__(self, db):
+    def __init__(self, db, base_url="https://api.github.com", retry=None):
         self.db = db
-        self.base_url = "https://api.github.com"
+        self.base_url = base_url.rstrip('/')
         self.headers = {'Accept': 'application/vnd.github.v3+json'}
+        self.retry = retry or RetryPolicy()
+        self.retries = 0
+        # endpoint -> reasons the last fetch of it came back incomplete
+        self.partial = {}
+        # Called before each write; a Worker sets it to raise LeaseLostError once its lease is gone
+        self.lease_guard = None
+    
+    def _get(self, url, endpoint, headers=None):
+        """GET with retries, backoff and the host's circuit breaker
+        
+        Returns the last response once it is final or retries run out; raises
+        CircuitOpenError while the host is failing, or the last connection error.
+        """
+        breaker = breaker_for(url)
+        for attempt in range(self.retry.max_attempts):
+            if not breaker.allow():
+                metrics.inc('github_circuit_rejections_total', endpoint=endpoint)
+                raise CircuitOpenError(f"{urlparse(url).netloc} is failing, skipped {endpoint} request")
+            
+            last_attempt = attempt + 1 == self.retry.max_attempts
+            try:
+                response = self._request(url, endpoint, headers)
+            except requests.RequestException:
+                self._record_failure(breaker, url)
+                if last_attempt:
+                    raise
+                reason, delay = 'error', self.retry.backoff(attempt)
+            else:
+                if response.status_code >= 500:
+                    self._record_failure(breaker, url)
+                else:
+                    breaker.record_success()
+                if last_attempt or not self.retry.is_retryable(response):
+                    return response
+                delay = self.retry.delay_for(response, attempt)
+                if delay is None:
+                    # Rate limit resets too far out to wait for
+                    return response
+                reason = response.status_code
+            
+            self.retries += 1
+            metrics.inc('github_retries_total', endpoint=endpoint, reason=reason)
+            self.retry.sleep(delay)
+    
+    def _request(self, url, endpoint, headers=None):
+        """Single GET, recording latency, status and remaining rate limit"""
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, headers=headers or self.headers, timeout=30)
+        except requests.RequestException:
+            metrics.inc('github_requests_total', endpoint=endpoint, status='error')
+            raise
+        finally:
+            metrics.observe('github_request_seconds', time.perf_counter() - start, endpoint=endpoint)
+        
+        metrics.inc('github_requests_total', endpoint=endpoint, status=response.status_code)
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is not None:
+            metrics.set_gauge('github_rate_limit_remaining', int(remaining))
+        return response
+    
+    def _record_failure(self, breaker, url):
+        if breaker.record_failure():
+            metrics.inc('github_circuit_opened_total', host=urlparse(url).netloc)
+    
+    def _mark_partial(self, endpoint, reason):
+        self.partial.setdefault(endpoint, []).append(reason)
+        print(f"⚠️ Incomplete {endpoint}: {reason}")
+    
+    def _check_lease(self):
+        if self.lease_guard is not None:
+            self.lease_guard()
+    
+    def _replace(self, collection, query, records, complete):
+        """Swap stored documents matching query for records
+        
+        An incomplete fetch only fills in missing data; it never replaces what
+        an earlier fetch stored.
+        """
+        self._check_lease()
+        if not complete and collection.find_one(query, {'_id': 1}) is not None:
+            return False
+        collection.delete_many(query)
+        if records:
+            insert_records(collection, records)
+        return True
     
     def fetch_user(self, username):
         """Fetch user profile data"""
         url = f"{self.base_url}/users/{username}"
-        response = requests.get(url, headers=self.headers)
+        response = self._get(url, 'user')
         
         if response.status_code == 403:
             error_msg = response.json().get('message', 'API rate limit exceeded')
@@ -34,7 +141,9 @@ class GitHubFetcher:
             'updated_at': datetime.utcnow()
         }
         
-        self.db.users.insert_one(user_doc)
+        self._check_lease()
+        self.db.users.update_one({'username': username}, {'$set': user_doc}, upsert=True)
+        self.db.mark_changed(username)
         print(f"✓ Fetched user: {username}")
         return user_doc
     
@@ -42,72 +151,100 @@ class GitHubFetcher:
         """Fetch all repositories with pagination"""
         repos = []
         page = 1
+        complete = True
         
         try:
             while True:
                 url = f"{self.base_url}/users/{username}/repos?per_page=100&page={page}"
-                response = requests.get(url, headers=self.headers)
+                try:
+                    response = self._get(url, 'repos')
+                except (requests.RequestException, CircuitOpenError) as e:
+                    self._mark_partial('repos', f"page {page}: {e}")
+                    complete = False
+                    break
                 
                 if response.status_code != 200:
+                    self._mark_partial('repos', f"page {page}: HTTP {response.status_code}")
+                    complete = False
                     break
                 
                 data = response.json()
                 if not data or not isinstance(data, list):
                     break
                 
-                for repo in data:
-                    repo_doc = {
-                        'username': username,
-                        'repo_name': repo['name'],
-                        'stars': repo.get('stargazers_count', 0),
-                        'forks': repo.get('forks_count', 0),
-                        'size': repo.get('size', 0),
-                        'language': repo.get('language'),
-                        'created_at': repo.get('created_at'),
-                        'updated_at': repo.get('updated_at'),
-                        'is_fork': repo.get('fork', False),
-                        'is_archived': repo.get('archived', False),
-                        'topics': repo.get('topics', []),
-                        'open_issues': repo.get('open_issues_count', 0)
-                    }
-                    repos.append(repo_doc)
+                repos.extend(RepoRecord.from_api(username, repo) for repo in data)
+                if len(data) < 100:
+                    break
                 
                 page += 1
             
+            if not self._replace(self.db.repos, {'username': username}, repos, complete):
+                print("Kept previously stored repositories")
             if repos:
-                self.db.repos.insert_many(repos)
+                RepoSnapshots(self.db, username).record(repos)
+                TrendingRanking(self.db).update_user(username)
+            if repos and complete:
+                UserSketches(self.db).replace_quantiles(username, 'repo_size', [r.size for r in repos])
+            self.db.mark_changed(username)
             print(f"✓ Fetched {len(repos)} repositories")
+        except LeaseLostError:
+            raise
         except Exception as e:
             print(f"Error fetching repos: {str(e)}")
         
         return repos
     
     def fetch_events(self, username):
-        """Fetch user activity events"""
-        url = f"{self.base_url}/users/{username}/events?per_page=100"
-        response = requests.get(url, headers=self.headers)
-        
-        if response.status_code != 200:
-            return []
-        
+        """Fetch user activity events (GitHub keeps at most 300, over 3 pages of 100)"""
         events = []
-        for event in response.json():
-            event_doc = {
-                'username': username,
-                'event_type': event.get('type'),
-                'repo': event.get('repo', {}).get('name'),
-                'created_at': event.get('created_at')
-            }
-            events.append(event_doc)
+        seen_ids = set()
+        complete = True
         
+        for page in range(1, EVENTS_MAX_PAGES + 1):
+            url = f"{self.base_url}/users/{username}/events?per_page=100&page={page}"
+            try:
+                response = self._get(url, 'events')
+            except (requests.RequestException, CircuitOpenError) as e:
+                self._mark_partial('events', f"page {page}: {e}")
+                complete = False
+                break
+            
+            if response.status_code != 200:
+                self._mark_partial('events', f"page {page}: HTTP {response.status_code}")
+                complete = False
+                break
+            
+            data = response.json()
+            if not data or not isinstance(data, list):
+                break
+            
+            for event in data:
+                # Pages shift while new events arrive, so the same event can show up twice
+                event_id = event.get('id')
+                if event_id in seen_ids:
+                    continue
+                seen_ids.add(event_id)
+                events.append(EventRecord.from_api(username, event))
+            
+            if len(data) < 100:
+                break
+        
+        self._replace(self.db.activity, {'username': username}, events, complete)
         if events:
-            self.db.activity.insert_many(events)
+            # The archive upserts by event id, so partial pages are always safe to keep
+            archived = self.db.archive_events(username, events)
+            print(f"✓ Archived {archived} new activity events")
+            UserSketches(self.db).add(username, 'repos_touched', (e.repo for e in events))
+        self.db.mark_changed(username)
         print(f"✓ Fetched {len(events)} activity events")
         return events
     
     def fetch_commits(self, username, repos):
-        """Fetch commits for each repository"""
+        """Fetch the latest commits of each repository, storing those not seen before (matched on SHA)"""
         commits = []
+        new_commits = []
+        fetched_repos = []
+        removed = 0
         
         if not repos or not isinstance(repos, list):
             print("No repos to fetch commits from")
@@ -115,38 +252,67 @@ class GitHubFetcher:
         
         try:
             for repo in repos[:10]:  # Limit to first 10 repos to avoid rate limits
-                if not isinstance(repo, dict):
+                if not isinstance(repo, RepoRecord):
                     continue
                     
-                if repo.get('is_fork') or repo.get('is_archived'):
+                if repo.is_fork or repo.is_archived:
                     continue
                 
-                repo_name = repo.get('repo_name')
+                repo_name = repo.repo_name
                 if not repo_name:
                     continue
                     
                 url = f"{self.base_url}/repos/{username}/{repo_name}/commits?per_page=100"
-                response = requests.get(url, headers=self.headers)
-                
-                if response.status_code != 200:
+                try:
+                    response = self._get(url, 'commits')
+                except (requests.RequestException, CircuitOpenError) as e:
+                    self._mark_partial('commits', f"{repo_name}: {e}")
                     continue
                 
-                commit_data = response.json()
-                if not isinstance(commit_data, list):
+                if response.status_code == 409:
+                    # Empty repository
+                    commit_data = []
+                elif response.status_code != 200:
+                    self._mark_partial('commits', f"{repo_name}: HTTP {response.status_code}")
                     continue
+                else:
+                    commit_data = response.json()
+                    if not isinstance(commit_data, list):
+                        continue
                 
-                for commit in commit_data:
-                    commit_doc = {
-                        'username': username,
-                        'repo': repo_name,
-                        'commit_timestamp': commit.get('commit', {}).get('author', {}).get('date'),
-                        'message': commit.get('commit', {}).get('message', '')[:100]
-                    }
-                    commits.append(commit_doc)
-            
-            if commits:
-                self.db.commits.insert_many(commits)
-            print(f"✓ Fetched {len(commits)} commits")
+                repo_commits = [CommitRecord.from_api(username, repo_name, commit) for commit in commit_data]
+                self._check_lease()
+                if repo_commits:
+                    new_commits.extend(upsert_records(self.db.commits, repo_commits, ('username', 'repo', 'sha')))
+                # Commits stored before SHAs were recorded can't be matched, so the refetch replaces them
+                removed += self.db.commits.delete_many(
+                    {'username': username, 'repo': repo_name, 'sha': {'$exists': False}}
+                ).deleted_count
+                commits.extend(repo_commits)
+                fetched_repos.append(repo_name)
+            
+            self._check_lease()
+            if not self.partial.keys() & {'repos', 'commits'}:
+                # Drop commits of repos that are no longer among the fetched ones
+                removed += self.db.commits.delete_many({'username': username, 'repo': {'$nin': fetched_repos}}).deleted_count
+            
+            series = DailyCommitSeries(self.db, username)
+            if removed or series.is_empty():
+                series.rebuild()
+            else:
+                login = username.lower()
+                series.add_commits(c.commit_timestamp for c in new_commits if c.author in (login, None))
+            
+            sketches = UserSketches(self.db)
+            if removed or sketches.load(username, 'contributors') is None:
+                authors = self.db.commits.distinct('author', {'username': username})
+                sketches.add(username, 'contributors', authors, rebuild=True)
+            else:
+                sketches.add(username, 'contributors', (c.author for c in new_commits))
+            self.db.mark_changed(username)
+            print(f"✓ Fetched {len(commits)} commits ({len(new_commits)} new)")
+        except LeaseLostError:
+            raise
         except Exception as e:
             print(f"Error fetching commits: {str(e)}")
         
@@ -155,6 +321,7 @@ class GitHubFetcher:
     def fetch_repo_topics(self, username, repos):
         """Fetch topics for repositories"""
         topics_data = []
+        fetched_repos = []
         
         if not repos or not isinstance(repos, list):
             print("No repos to fetch topics from")
@@ -162,55 +329,202 @@ class GitHubFetcher:
         
         try:
             for repo in repos[:20]:
-                if not isinstance(repo, dict):
+                if not isinstance(repo, RepoRecord):
                     continue
                     
-                if repo.get('is_fork') or repo.get('is_archived'):
+                if repo.is_fork or repo.is_archived:
                     continue
                 
-                repo_name = repo.get('repo_name')
+                repo_name = repo.repo_name
                 if not repo_name:
                     continue
                     
                 url = f"{self.base_url}/repos/{username}/{repo_name}/topics"
                 headers = {**self.headers, 'Accept': 'application/vnd.github.mercy-preview+json'}
-                response = requests.get(url, headers=headers)
+                try:
+                    response = self._get(url, 'topics', headers=headers)
+                except (requests.RequestException, CircuitOpenError) as e:
+                    self._mark_partial('topics', f"{repo_name}: {e}")
+                    continue
+                
+                if response.status_code != 200:
+                    self._mark_partial('topics', f"{repo_name}: HTTP {response.status_code}")
+                    continue
                 
-                if response.status_code == 200:
-                    topics = response.json().get('names', [])
-                    if topics:
-                        topics_data.append({
-                            'username': username,
-                            'repo': repo_name,
-                            'topics': topics
-                        })
-            
-            if topics_data:
-                self.db.topics.insert_many(topics_data)
+                topics = response.json().get('names', [])
+                records = [TopicRecord(username, repo_name, topics)] if topics else []
+                self._replace(self.db.topics, {'username': username, 'repo': repo_name}, records, True)
+                topics_data.extend(records)
+                fetched_repos.append(repo_name)
+            
+            self._check_lease()
+            if not self.partial.keys() & {'repos', 'topics'}:
+                self.db.topics.delete_many({'username': username, 'repo': {'$nin': fetched_repos}})
+            self.db.mark_changed(username)
             print(f"✓ Fetched topics for {len(topics_data)} repos")
+        except LeaseLostError:
+            raise
         except Exception as e:
             print(f"Error fetching topics: {str(e)}")
         
         return topics_data
+    
+    def fetch_repo_languages(self, username, repos):
+        """Fetch per-repo language bytes, skipping repos not pushed to since their bytes were cached"""
+        updates = {}
+        
+        if not repos or not isinstance(repos, list):
+            print("No repos to fetch languages for")
+            return updates
+        
+        try:
+            stats = LanguageBytes(self.db, username)
+            cached = stats.cached_pushed_at()
+            current = [
+                r for r in repos
+                if isinstance(r, RepoRecord) and r.repo_name and not r.is_fork and not r.is_archived
+            ]
+            stale = [r for r in current if r.repo_name not in cached or cached[r.repo_name] != r.pushed_at]
+            
+            for repo in stale[:LANGUAGES_MAX_REQUESTS]:
+                url = f"{self.base_url}/repos/{username}/{repo.repo_name}/languages"
+                try:
+                    response = self._get(url, 'languages')
+                except (requests.RequestException, CircuitOpenError) as e:
+                    self._mark_partial('languages', f"{repo.repo_name}: {e}")
+                    continue
+                
+                if response.status_code != 200:
+                    self._mark_partial('languages', f"{repo.repo_name}: HTTP {response.status_code}")
+                    continue
+                
+                updates[repo.repo_name] = (repo.pushed_at, response.json())
+            
+            if len(stale) > LANGUAGES_MAX_REQUESTS:
+                self._mark_partial('languages', f"{len(stale) - LANGUAGES_MAX_REQUESTS} repos left for the next refresh")
+            
+            removed = []
+            if 'repos' not in self.partial:
+                names = {r.repo_name for r in current}
+                removed = [name for name in cached if name not in names]
+            self._check_lease()
+            stats.apply(updates, removed)
+            self.db.mark_changed(username)
+            print(f"✓ Fetched language bytes for {len(updates)} repos ({len(current) - len(stale)} unchanged)")
+        except LeaseLostError:
+            raise
+        except Exception as e:
+            print(f"Error fetching languages: {str(e)}")
+        
+        return updates
+    
+    def fetch_stargazers(self, username, repos):
+        """Fetch star timestamps for repos that gained stars since the last fetch
+        
+        Paging resumes from each repo's last seen page; a repo with fewer
+        stars than already counted (someone unstarred) is re-read from page 1.
+        """
+        added = 0
+        
+        if not repos or not isinstance(repos, list):
+            print("No repos to fetch stargazers for")
+            return added
+        
+        try:
+            history = StarHistory(self.db, username)
+            progress = history.progress()
+            current = [r for r in repos if isinstance(r, RepoRecord) and r.repo_name and not r.is_fork]
+            headers = {**self.headers, 'Accept': 'application/vnd.github.star+json'}
+            
+            self._check_lease()
+            shrunk = [r.repo_name for r in current if r.stars < progress.get(r.repo_name, {}).get('total', 0)]
+            if shrunk:
+                history.reset(shrunk)
+                for name in shrunk:
+                    progress.pop(name)
+            if 'repos' not in self.partial:
+                names = {r.repo_name for r in current}
+                removed = [name for name in progress if name not in names]
+                if removed:
+                    history.reset(removed)
+            
+            budget = STARGAZERS_MAX_REQUESTS
+            exhausted = False
+            pending = [r for r in current if r.stars > progress.get(r.repo_name, {}).get('total', 0)]
+            for repo in pending:
+                state = progress.get(repo.repo_name, {})
+                page, seen = state.get('page', 1), state.get('seen', 0)
+                while True:
+                    if not budget:
+                        exhausted = True
+                        break
+                    budget -= 1
+                    url = (f"{self.base_url}/repos/{username}/{repo.repo_name}/stargazers"
+                           f"?per_page={STARGAZERS_PER_PAGE}&page={page}")
+                    try:
+                        response = self._get(url, 'stargazers', headers=headers)
+                    except (requests.RequestException, CircuitOpenError) as e:
+                        self._mark_partial('stargazers', f"{repo.repo_name} page {page}: {e}")
+                        break
+                    
+                    if response.status_code != 200:
+                        self._mark_partial('stargazers', f"{repo.repo_name} page {page}: HTTP {response.status_code}")
+                        break
+                    
+                    entries = response.json()
+                    if not isinstance(entries, list):
+                        break
+                    self._check_lease()
+                    added += history.add_page(repo.repo_name, page, entries, skip=seen)
+                    if len(entries) < STARGAZERS_PER_PAGE:
+                        break
+                    page, seen = page + 1, 0
+                if exhausted:
+                    break
+            
+            if exhausted:
+                self._mark_partial('stargazers', "request budget reached, resuming on the next refresh")
+            self.db.mark_changed(username)
+            print(f"✓ Fetched {added} new stars across {len(pending)} repos")
+        except LeaseLostError:
+            raise
+        except Exception as e:
+            print(f"Error fetching stargazers: {str(e)}")
+        
+        return added
+    
+    def refresh(self, username):
+        """Fetch everything for a user without clearing stored data first
+        
+        Each collection is only replaced by a complete fetch; whatever came
+        back incomplete is recorded on the user document as partial_results.
+        """
+        self.partial = {}
+        self.fetch_user(username)
+        repos = self.fetch_repos(username)
+        self.fetch_events(username)
+        self.fetch_commits(username, repos)
+        self.fetch_repo_topics(username, repos)
+        self.fetch_repo_languages(username, repos)
+        self.fetch_stargazers(username, repos)
+        self.db.set_fetch_status(username, self.partial)
+        return self.partial
 
 def main(username):
     """Main function to fetch all data"""
     from config import MONGODB_CONNECTION_STRING
     
     db = Database(MONGODB_CONNECTION_STRING)
-    db.clear_user_data(username)
-    
     fetcher = GitHubFetcher(db)
     
     print(f"\n🔄 Fetching data for: {username}")
-    fetcher.fetch_user(username)
-    repos = fetcher.fetch_repos(username)
-    fetcher.fetch_events(username)
-    fetcher.fetch_commits(username, repos)
-    fetcher.fetch_repo_topics(username, repos)
+    partial = fetcher.refresh(username)
     
     db.close()
-    print(f"\n✅ Data fetch complete!\n")
+    if partial:
+        print(f"\n⚠️ Data fetch incomplete ({', '.join(partial)}), kept earlier data for those parts\n")
+    else:
+        print(f"\n✅ Data fetch complete!\n")
 
 if __name__ == "__main__":
     username = input("Enter GitHub username: ")
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from functools import wraps
+from importlib.util import find_spec
+from lazy import lazy_import
+from metrics import metrics
+
+pio = lazy_import('plotly.io')
+
+# Cached figures expire after a day; entries for older data versions are never read again
+FIGURE_CACHE_TTL = 24 * 3600
+# Fast and still compact; figure JSON is mostly repeated keys and numbers
+COMPRESS_LEVEL = 1
+# Plotly serializes with orjson when it is installed
+JSON_ENGINE = 'orjson' if find_spec('orjson') else 'json'
+# Stay clear of MongoDB's 16 MB document limit
+MAX_FIGURE_BYTES = 15 * 1024 * 1024
+
+
+class FigureCache:
+    """Plotly figures shared by every dashboard and API replica (figure_cache collection)
+
+    Entries are keyed by user, chart, filters, day and the user's data
+    version, so a refresh makes older entries unreachable instead of
+    leaving them to be invalidated. Figures are stored as compressed JSON.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def key(username, chart, filters, version, args=(), kwargs=None):
+        # The day is part of the key: relative time ranges move with it
+        identity = [username, chart, filters.key(), filters.now.date().isoformat(), version,
+                    list(args), sorted((kwargs or {}).items())]
+        return hashlib.sha1(json.dumps(identity, default=str).encode('utf-8')).hexdigest()
+
+    def get_json(self, key):
+        """Figure JSON (b'null' for a chart without data), or None on a miss"""
+        doc = self.db.figure_cache.find_one({'_id': key}, {'figure': 1})
+        metrics.inc('figure_cache_total', result='hit' if doc else 'miss')
+        return zlib.decompress(doc['figure']) if doc else None
+
+    @staticmethod
+    def decode(body):
+        return None if body == b'null' else pio.from_json(body, engine=JSON_ENGINE)
+
+    def set(self, key, fig, username, chart):
+        """Store a built figure (or None) and return its JSON"""
+        body = pio.to_json(fig, validate=False, engine=JSON_ENGINE).encode('utf-8') if fig is not None else b'null'
+        packed = zlib.compress(body, COMPRESS_LEVEL)
+        if len(packed) <= MAX_FIGURE_BYTES:
+            self.db.figure_cache.replace_one(
+                {'_id': key},
+                {'username': username, 'chart': chart, 'figure': packed, 'created_at': datetime.utcnow()},
+                upsert=True
+            )
+        return body
+
+
+def cached_chart(func):
+    """Decorator serving a Visualizations chart from its figure_cache, building and storing it on a miss"""
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        cache = self.figure_cache
+        if cache is None:
+            return func(self, *args, **kwargs)
+        key = self.figure_key(func.__name__, args, kwargs)
+        body = cache.get_json(key)
+        if body is not None:
+            return cache.decode(body)
+        fig = func(self, *args, **kwargs)
+        cache.set(key, fig, self.username, func.__name__)
+        return fig
+    # chart_json only stores charts that carry this marker
+    wrapper.figure_cached = True
+    return wrapper
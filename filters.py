@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+TIME_RANGES = {'all': None, '7d': 7, '30d': 30, '90d': 90}
+TIME_RANGE_LABELS = {'all': 'All Time', '7d': 'Last 7 Days', '30d': 'Last 30 Days', '90d': 'Last 90 Days'}
+
+
+def own_commits_query(username):
+    """Commits in the user's repos authored by the user
+
+    Author logins are stored lowercased. Commits without one (no linked
+    GitHub account, or stored before authors were recorded) count as the
+    user's own.
+    """
+    return {'username': username, 'author': {'$in': [username.lower(), None]}}
+
+
+class DataFilters:
+    """Dashboard filter selection, translated into indexed Mongo predicates
+
+    The time range applies to time-series data (commits, events, daily
+    counts); languages and repos narrow repositories and everything that
+    belongs to them; event types narrow activity events.
+    """
+
+    def __init__(self, time_range='all', languages=None, repos=None, event_types=None, now=None):
+        if time_range not in TIME_RANGES:
+            raise ValueError(f"Unknown time range: {time_range}")
+        self.time_range = time_range
+        self.languages = list(languages or [])
+        self.repos = list(repos or [])
+        self.event_types = list(event_types or [])
+        self.now = now or datetime.utcnow()
+
+    @property
+    def since(self):
+        """Start of the selected time range (UTC midnight), or None for all time"""
+        days = TIME_RANGES[self.time_range]
+        if days is None:
+            return None
+        start = self.now - timedelta(days=days)
+        return start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @property
+    def is_default(self):
+        return self.time_range == 'all' and not (self.languages or self.repos or self.event_types)
+
+    def key(self):
+        """Hashable, order-independent identity of the selection"""
+        return (self.time_range, tuple(sorted(self.languages)), tuple(sorted(self.repos)),
+                tuple(sorted(self.event_types)))
+
+    def repo_query(self, username, **extra):
+        """Predicate for the repos collection"""
+        query = {'username': username, **extra}
+        if self.languages:
+            query['language'] = {'$in': self.languages}
+        if self.repos:
+            query['repo_name'] = {'$in': self.repos}
+        return query
+
+    def commit_query(self, username, repo_names=None, lookback_days=0):
+        """Predicate for the commits collection
+
+        repo_names is the set of repos matching the language filter, resolved
+        by the caller, since commits don't carry a language. lookback_days
+        widens the time range for rolling windows that start at its edge.
+        """
+        query = own_commits_query(username)
+        since = self.since
+        if since:
+            since -= timedelta(days=lookback_days)
+            # commit_timestamp is ISO-8601 UTC, so string order is time order
+            query['commit_timestamp'] = {'$gte': since.strftime('%Y-%m-%dT%H:%M:%SZ')}
+        if repo_names is not None:
+            query['repo'] = {'$in': list(repo_names)}
+        elif self.repos:
+            query['repo'] = {'$in': self.repos}
+        return query
+
+    def event_query(self, username):
+        """Predicate for the activity_archive collection"""
+        query = {'username': username}
+        since = self.since
+        if since:
+            query['created_at'] = {'$gte': since}
+        if self.event_types:
+            query['event_type'] = {'$in': self.event_types}
+        if self.repos:
+            query['repo'] = {'$in': [f"{username}/{repo}" for repo in self.repos]}
+        return query
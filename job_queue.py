@@ -0,0 +1,150 @@
+import uuid
+from datetime import datetime, timedelta
+from lazy import lazy_import
+from retry import RetryPolicy
+
+pymongo = lazy_import('pymongo')
+
+# A claimed task is invisible to other workers until its lease runs out
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 3
+
+# Refresh stages: the first ones run in parallel, the repo-based ones once the
+# repos are stored, and finish records the run's fetch status after all of them
+FIRST_STAGES = ('user', 'repos', 'events')
+REPO_STAGES = ('commits', 'topics', 'languages', 'stargazers')
+FINISH = 'finish'
+
+ACTIVE = ('queued', 'running')
+
+
+class LeaseLostError(Exception):
+    """Raised before a write by a worker whose lease on the task expired or was taken over"""
+
+
+class JobQueue:
+    """Fetch tasks in the fetch_jobs collection, claimed under expiring leases
+
+    A task is one endpoint of one refresh run. Claiming it sets a lease that
+    the worker extends with heartbeats; a task whose lease expires (the
+    worker crashed or stalled) becomes claimable again. Fetch stages call
+    check_lease before each write, so a stalled worker stops writing once
+    its lease is gone; a write already past that check can still land next
+    to the new holder's, which the idempotent fetch writes tolerate.
+    Enqueueing is idempotent per (run, endpoint), so follow-up stages are
+    never queued twice.
+    """
+
+    def __init__(self, db, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, retry=None):
+        self.db = db
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry = retry or RetryPolicy(base_delay=5.0, max_delay=300.0)
+
+    def enqueue(self, run_id, username, endpoint):
+        now = datetime.utcnow()
+        self.db.fetch_jobs.update_one(
+            {'run': run_id, 'endpoint': endpoint},
+            {'$setOnInsert': {
+                'username': username, 'status': 'queued', 'attempts': 0,
+                'available_at': now, 'created_at': now
+            }},
+            upsert=True
+        )
+
+    def enqueue_refresh(self, username):
+        """Queue a full refresh of a user and return its run id"""
+        run_id = uuid.uuid4().hex
+        for endpoint in FIRST_STAGES:
+            self.enqueue(run_id, username, endpoint)
+        return run_id
+
+    def claim(self, worker_id):
+        """Lease the oldest runnable task (queued, or running under an expired lease), or None"""
+        while True:
+            now = datetime.utcnow()
+            task = self.db.fetch_jobs.find_one_and_update(
+                {'$or': [
+                    {'status': 'queued', 'available_at': {'$lte': now}},
+                    {'status': 'running', 'lease_until': {'$lt': now}}
+                ]},
+                {
+                    '$set': {
+                        'status': 'running', 'worker': worker_id, 'lease': uuid.uuid4().hex,
+                        'lease_until': now + timedelta(seconds=self.lease_seconds)
+                    },
+                    '$inc': {'attempts': 1}
+                },
+                sort=[('available_at', pymongo.ASCENDING)],
+                return_document=pymongo.ReturnDocument.AFTER
+            )
+            if task is None or task['attempts'] <= self.max_attempts:
+                return task
+            # Its workers kept dying: give up on it rather than crash another
+            self._settle(task, 'failed', error='lease expired too often')
+
+    def heartbeat(self, task):
+        """Extend the lease; False once it has been lost to another worker"""
+        result = self.db.fetch_jobs.update_one(
+            {'_id': task['_id'], 'lease': task['lease']},
+            {'$set': {'lease_until': datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+        )
+        return result.matched_count == 1
+
+    def check_lease(self, task):
+        """Raise LeaseLostError unless the task's lease is still ours and unexpired"""
+        held = self.db.fetch_jobs.find_one(
+            {'_id': task['_id'], 'lease': task['lease'], 'lease_until': {'$gt': datetime.utcnow()}},
+            {'_id': 1}
+        )
+        if held is None:
+            raise LeaseLostError(f"lease on {task['username']}/{task['endpoint']} lost")
+
+    def _settle(self, task, status, **fields):
+        result = self.db.fetch_jobs.update_one(
+            {'_id': task['_id'], 'lease': task['lease']},
+            {
+                '$set': dict(fields, status=status, finished_at=datetime.utcnow()),
+                '$unset': {'lease': '', 'lease_until': ''}
+            }
+        )
+        return result.matched_count == 1
+
+    def complete(self, task, partial=None):
+        """Mark a task done with the partial-results reasons of its fetch"""
+        return self._settle(task, 'done', partial=partial or {})
+
+    def fail(self, task, error):
+        """Requeue a task with backoff, or fail it for good after max_attempts"""
+        if task['attempts'] >= self.max_attempts:
+            return self._settle(task, 'failed', error=error)
+        delay = self.retry.backoff(task['attempts'] - 1)
+        result = self.db.fetch_jobs.update_one(
+            {'_id': task['_id'], 'lease': task['lease']},
+            {
+                '$set': {
+                    'status': 'queued', 'error': error,
+                    'available_at': datetime.utcnow() + timedelta(seconds=delay)
+                },
+                '$unset': {'lease': '', 'lease_until': '', 'worker': ''}
+            }
+        )
+        return result.matched_count == 1
+
+    def pending(self, run_id):
+        """Tasks of a run not yet done or failed"""
+        return self.db.fetch_jobs.count_documents({'run': run_id, 'status': {'$in': list(ACTIVE)}})
+
+    def run_partial(self, run_id):
+        """Merged partial-results reasons of a run; failed tasks count as partial"""
+        partial = {}
+        for task in self.db.fetch_jobs.find({'run': run_id, 'endpoint': {'$ne': FINISH}}):
+            for endpoint, reasons in (task.get('partial') or {}).items():
+                partial.setdefault(endpoint, []).extend(reasons)
+            if task['status'] == 'failed':
+                partial.setdefault(task['endpoint'], []).append(f"task failed: {task.get('error')}")
+        return partial
+
+    def status(self, run_id):
+        """endpoint -> status for every task of a run"""
+        return {task['endpoint']: task['status'] for task in self.db.fetch_jobs.find({'run': run_id})}
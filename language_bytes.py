@@ -0,0 +1,106 @@
+from collections import Counter
+from lazy import lazy_import
+
+pymongo = lazy_import('pymongo')
+
+
+class LanguageBytes:
+    """Per-repo language bytes (repo_languages) and byte-weighted per-user totals (languages)
+
+    repo_languages doubles as a content cache: a repo whose ``pushed_at`` has
+    not changed since its bytes were stored is never fetched again. Totals in
+    languages are adjusted by the difference between a repo's old and new
+    bytes, so a refresh that touches a few repos doesn't re-sum all of them.
+    """
+
+    def __init__(self, db, username):
+        self.db = db
+        self.username = username
+
+    def cached_pushed_at(self):
+        """repo name -> pushed_at its stored bytes were fetched for"""
+        docs = self.db.repo_languages.find({'username': self.username}, {'repo': 1, 'pushed_at': 1, '_id': 0})
+        return {doc['repo']: doc.get('pushed_at') for doc in docs}
+
+    def has_data(self):
+        return self.db.repo_languages.find_one({'username': self.username}, {'_id': 1}) is not None
+
+    def apply(self, updates, removed=()):
+        """Store new bytes for repos (name -> (pushed_at, {language: bytes})) and drop removed repos
+
+        Returns the number of languages whose totals changed.
+        """
+        names = list(updates) + [name for name in removed if name not in updates]
+        if not names:
+            return 0
+
+        old = {
+            doc['repo']: doc.get('bytes', {})
+            for doc in self.db.repo_languages.find(
+                {'username': self.username, 'repo': {'$in': names}}, {'repo': 1, 'bytes': 1, '_id': 0}
+            )
+        }
+        delta_bytes = Counter()
+        delta_repos = Counter()
+        for name in names:
+            before = old.get(name, {})
+            after = updates[name][1] if name in updates else {}
+            for language in before.keys() | after.keys():
+                delta_bytes[language] += after.get(language, 0) - before.get(language, 0)
+                delta_repos[language] += (language in after) - (language in before)
+
+        operations = [
+            pymongo.ReplaceOne(
+                {'username': self.username, 'repo': name},
+                {'username': self.username, 'repo': name, 'pushed_at': pushed_at, 'bytes': byte_counts},
+                upsert=True
+            )
+            for name, (pushed_at, byte_counts) in updates.items()
+        ]
+        if operations:
+            self.db.repo_languages.bulk_write(operations, ordered=False)
+        if removed:
+            self.db.repo_languages.delete_many({'username': self.username, 'repo': {'$in': list(removed)}})
+
+        # Primary-language repo counts written before any bytes were stored
+        self.db.languages.delete_many({'username': self.username, 'bytes': {'$exists': False}})
+        changed = [lang for lang in delta_bytes.keys() | delta_repos.keys() if delta_bytes[lang] or delta_repos[lang]]
+        if changed:
+            self.db.languages.bulk_write([
+                pymongo.UpdateOne(
+                    {'username': self.username, 'language': language},
+                    {'$inc': {'bytes': delta_bytes[language], 'repo_count': delta_repos[language]}},
+                    upsert=True
+                )
+                for language in changed
+            ], ordered=False)
+        self._update_percentages()
+        return len(changed)
+
+    def _update_percentages(self):
+        docs = list(self.db.languages.find({'username': self.username}, {'language': 1, 'bytes': 1}))
+        self.db.languages.delete_many({'username': self.username, 'bytes': {'$lte': 0}})
+        docs = [doc for doc in docs if doc.get('bytes', 0) > 0]
+        if not docs:
+            return
+        total = sum(doc['bytes'] for doc in docs)
+        self.db.languages.bulk_write([
+            pymongo.UpdateOne({'_id': doc['_id']}, {'$set': {'percentage': round(doc['bytes'] / total * 100, 2)}})
+            for doc in docs
+        ], ordered=False)
+
+    def rebuild(self):
+        """Recompute the user's totals from every stored repo breakdown"""
+        self.db.languages.delete_many({'username': self.username})
+        stored = {
+            doc['repo']: (doc.get('pushed_at'), doc.get('bytes', {}))
+            for doc in self.db.repo_languages.find({'username': self.username})
+        }
+        self.db.repo_languages.delete_many({'username': self.username})
+        return self.apply(stored)
+
+    def totals(self):
+        """Byte-weighted language totals, largest first"""
+        return list(self.db.languages.find(
+            {'username': self.username}, {'_id': 0}
+        ).sort('bytes', pymongo.DESCENDING))
@@ -0,0 +1,218 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'github_request_seconds': 'GitHub API request latency',
+    'github_requests_total': 'GitHub API requests by status code',
+    'github_rate_limit_remaining': 'Remaining GitHub API rate limit',
+    'github_retries_total': 'GitHub API requests retried, by endpoint and reason',
+    'github_circuit_opened_total': 'Times a host circuit breaker opened',
+    'github_circuit_rejections_total': 'Requests skipped while a circuit breaker was open',
+    'mongo_query_seconds': 'MongoDB operation latency',
+    'chart_build_seconds': 'Chart build time',
+    'chart_errors_total': 'Chart build failures',
+    'api_request_seconds': 'JSON API request latency by route and status',
+    'api_cache_total': 'JSON API response cache lookups (hit, miss, coalesced)',
+    'figure_cache_total': 'Shared figure cache lookups (hit, miss)',
+    'fetch_jobs_total': 'Queued fetch tasks processed by workers, by endpoint and outcome',
+}
+
+# Series kept for the debug snapshot only: their labels (usernames) would grow without bound in Prometheus
+DEBUG_ONLY = {'chart_user_build_seconds'}
+# Debug-only series kept in memory; the least recently observed are dropped beyond this
+MAX_DEBUG_SERIES = 500
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + (extra or [])
+    if not pairs:
+        return ''
+    body = ','.join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return '{' + body + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+
+
+class Metrics:
+    """Thread-safe in-process registry of counters, gauges and latency histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        # DEBUG_ONLY histograms, least recently observed first
+        self._debug = OrderedDict()
+
+    def inc(self, name, value=1, **labels):
+        """Increment a counter"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge to its latest value"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, seconds, **labels):
+        """Record a latency observation in seconds"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            series = self._debug if name in DEBUG_ONLY else self._histograms
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram()
+            hist.observe(seconds)
+            if series is self._debug:
+                self._debug.move_to_end(key)
+                while len(self._debug) > MAX_DEBUG_SERIES:
+                    self._debug.popitem(last=False)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the enclosed block into a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        """Drop every recorded series"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._debug.clear()
+
+    def snapshot(self):
+        """Summarize latency histograms as rows, slowest total first"""
+        with self._lock:
+            rows = [
+                {
+                    'metric': name,
+                    **dict(labels),
+                    'count': hist.count,
+                    'total_ms': round(hist.sum * 1000, 2),
+                    'avg_ms': round(hist.sum / hist.count * 1000, 2) if hist.count else 0.0,
+                    'max_ms': round(hist.max * 1000, 2),
+                }
+                for (name, labels), hist in [*self._histograms.items(), *self._debug.items()]
+            ]
+        return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+    def render_prometheus(self):
+        """Render all series in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+
+            seen = set()
+
+            def header(name, kind):
+                if (name, kind) in seen:
+                    return
+                seen.add((name, kind))
+                if name in HELP:
+                    lines.append(f'# HELP {name} {HELP[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+
+            for (name, labels), value in counters:
+                header(name, 'counter')
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+            for (name, labels), value in gauges:
+                header(name, 'gauge')
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+            for (name, labels), hist in histograms:
+                header(name, 'histogram')
+                # Buckets are stored cumulatively, as Prometheus expects
+                for bound, count in zip(LATENCY_BUCKETS, hist.buckets):
+                    lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {hist.count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {hist.sum:.6f}')
+                lines.append(f'{name}_count{_format_labels(labels)} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry shared by the fetcher, database and charts
+metrics = Metrics()
+
+
+def timed_chart(func):
+    """Decorator recording build time and failures of a Visualizations chart method"""
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        except Exception:
+            metrics.inc('chart_errors_total', chart=func.__name__)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            metrics.observe('chart_build_seconds', seconds, chart=func.__name__)
+            metrics.observe('chart_user_build_seconds', seconds, chart=func.__name__, username=self.username)
+    return wrapper
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port, host='0.0.0.0'):
+    """Serve /metrics on a background thread (idempotent across Streamlit reruns)"""
+    global _server
+    # http.server is only imported when the endpoint is actually enabled
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
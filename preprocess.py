@@ -1,25 +1,94 @@
-import pandas as pd
 from datetime import datetime
 from db import Database
+from filters import DataFilters
+from language_bytes import LanguageBytes
+from topic_graph import TopicGraph
+from sessions import SESSION_GAP_MINUTES, detect_sessions, session_cache
+from lazy import lazy_import
+
+pd = lazy_import('pandas')
+pymongo = lazy_import('pymongo')
 
 class DataPreprocessor:
-    def __init__(self, db, username):
+    def __init__(self, db, username, filters=None):
         self.db = db
         self.username = username
+        self.filters = filters or DataFilters()
     
-    def get_clean_repos(self):
+    def get_clean_repos(self, apply_filters=True):
         """Get repos excluding forks and archived, with language"""
-        repos = list(self.db.repos.find({
-            'username': self.username,
-            'is_fork': False,
-            'is_archived': False,
-            'language': {'$ne': None}
-        }))
+        filters = self.filters if apply_filters else DataFilters()
+        query = filters.repo_query(self.username, is_fork=False, is_archived=False)
+        query.setdefault('language', {'$ne': None})
+        repos = list(self.db.repos.find(query))
         return pd.DataFrame(repos)
     
+    def _filtered_repo_names(self):
+        """Repos matching the language filter, or None when it isn't set"""
+        if not self.filters.languages:
+            return None
+        return self.db.repos.distinct('repo_name', self.filters.repo_query(self.username))
+    
+    def get_commits(self, lookback_days=0):
+        """Commits matching the filters, read with an indexed range query"""
+        query = self.filters.commit_query(self.username, self._filtered_repo_names(), lookback_days)
+        return list(self.db.commits.find(query))
+    
+    def get_events(self):
+        """Archived activity events matching the filters, newest first"""
+        query = self.filters.event_query(self.username)
+        return list(self.db.activity_archive.find(query).sort('created_at', pymongo.DESCENDING))
+    
+    def _topic_repo_names(self):
+        repo_names = self._filtered_repo_names()
+        if repo_names is None and self.filters.repos:
+            repo_names = self.filters.repos
+        return repo_names
+    
+    def topic_graph(self):
+        """Topic co-occurrence graph of the repos matching the filters, cached per data version"""
+        return TopicGraph.load(self.db, self.username, self._topic_repo_names(),
+                               versions=[self.db.data_version(self.username)])
+    
+    def coding_sessions(self, gap_minutes=SESSION_GAP_MINUTES):
+        """Coding sessions over the user's commits and archived events matching the filters, cached per data version"""
+        key = (self.username, self.filters.key(), self.filters.since, self.db.data_version(self.username), gap_minutes)
+        
+        def detect():
+            commits = self.db.commits.find(
+                self.filters.commit_query(self.username, self._filtered_repo_names()), {'_id': 0, 'commit_timestamp': 1}
+            )
+            events = self.db.activity_archive.find(self.filters.event_query(self.username), {'_id': 0, 'created_at': 1})
+            return detect_sessions([c.get('commit_timestamp') for c in commits],
+                                   [e.get('created_at') for e in events], gap_minutes)
+        return session_cache.get_or_compute(key, detect)
+    
+    def get_languages(self):
+        """Aggregated language stats, narrowed to the selected languages"""
+        query = {'username': self.username}
+        if self.filters.languages:
+            query['language'] = {'$in': self.filters.languages}
+        return list(self.db.languages.find(query))
+    
+    def filter_options(self):
+        """Values available to the dashboard's language, repo and event type filters"""
+        repo_query = {'username': self.username, 'is_fork': False}
+        return {
+            'languages': sorted(l for l in self.db.repos.distinct('language', repo_query) if l),
+            'repos': sorted(self.db.repos.distinct('repo_name', repo_query)),
+            'event_types': sorted(t for t in self.db.activity_archive.distinct('event_type', {'username': self.username}) if t)
+        }
+    
     def aggregate_languages(self):
-        """Calculate language percentages"""
-        df = self.get_clean_repos()
+        """Calculate language percentages, byte-weighted once per-repo language bytes are stored"""
+        stats = LanguageBytes(self.db, self.username)
+        if stats.has_data():
+            totals = stats.totals()
+            print(f"✓ Aggregated {len(totals)} languages by bytes")
+            return pd.DataFrame(totals)
+        
+        # No /languages data yet: count each repo's primary language
+        df = self.get_clean_repos(apply_filters=False)
         
         if df.empty:
             return pd.DataFrame()
@@ -40,6 +109,7 @@ class DataPreprocessor:
         self.db.languages.delete_many({'username': self.username})
         if lang_data:
             self.db.languages.insert_many(lang_data)
+        self.db.mark_changed(self.username)
         
         print(f"✓ Aggregated {len(lang_data)} languages")
         return pd.DataFrame(lang_data)
@@ -66,7 +136,7 @@ class DataPreprocessor:
     
     def prepare_commit_heatmap(self):
         """Prepare day-of-week × hour matrix for commits"""
-        commits = list(self.db.commits.find({'username': self.username}))
+        commits = self.get_commits()
         
         if not commits:
             return pd.DataFrame()
@@ -88,7 +158,7 @@ class DataPreprocessor:
     
     def prepare_monthly_commits(self):
         """Group commits by month"""
-        commits = list(self.db.commits.find({'username': self.username}))
+        commits = self.get_commits()
         
         if not commits:
             return pd.DataFrame()
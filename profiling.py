@@ -0,0 +1,134 @@
+import importlib.util
+import io
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from lazy import lazy_import
+
+cProfile = lazy_import('cProfile')
+# Resolved without importing it, so a disabled profiler costs nothing at startup
+pyinstrument = lazy_import('pyinstrument') if importlib.util.find_spec('pyinstrument') else None
+
+PROFILE_DIR = 'profiles'
+MAX_TRACES_PER_SECTION = 20
+
+
+def _safe(name):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name or 'anonymous')
+
+
+class RerunProfiler:
+    """Opt-in per-section profiler for a single Streamlit rerun
+
+    Each section is recorded with pyinstrument (HTML flamegraph) when it is
+    installed, otherwise with cProfile, and stored as
+    profiles/<user>/<section>/<timestamp>.<ext>.
+    """
+
+    def __init__(self, enabled, username, base_dir=PROFILE_DIR):
+        self.enabled = enabled
+        self.username = username
+        self.base_dir = base_dir
+        self._active = None
+
+    def start(self, section):
+        """Begin profiling a section (no-op when disabled)"""
+        if not self.enabled:
+            return
+        self.stop()
+        if pyinstrument is not None:
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        self._active = (section, profiler, time.perf_counter())
+
+    def stop(self):
+        """Finish the current section and save its trace"""
+        if self._active is None:
+            return None
+        section, profiler, started = self._active
+        self._active = None
+        if pyinstrument is not None:
+            profiler.stop()
+        else:
+            profiler.disable()
+        return self._save(section, profiler, time.perf_counter() - started)
+
+    @contextmanager
+    def section(self, name):
+        """Profile the enclosed block as one section"""
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def _save(self, section, profiler, seconds):
+        directory = os.path.join(self.base_dir, _safe(self.username), _safe(section))
+        os.makedirs(directory, exist_ok=True)
+        # Duration is encoded in the file name so listings don't have to open traces
+        stem = os.path.join(directory, f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{seconds * 1000:.0f}ms")
+
+        if pyinstrument is not None:
+            path = stem + '.html'
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+        else:
+            path = stem + '.prof'
+            profiler.dump_stats(path)
+
+        _prune(directory)
+        return path
+
+
+def _prune(directory, keep=MAX_TRACES_PER_SECTION):
+    traces = sorted(os.listdir(directory))
+    for name in traces[:-keep]:
+        os.remove(os.path.join(directory, name))
+
+
+def list_traces(username=None, base_dir=PROFILE_DIR):
+    """List stored traces, newest first, optionally for a single user"""
+    if not os.path.isdir(base_dir):
+        return []
+
+    users = [_safe(username)] if username else sorted(os.listdir(base_dir))
+    traces = []
+    for user in users:
+        user_dir = os.path.join(base_dir, user)
+        if not os.path.isdir(user_dir):
+            continue
+        for section in sorted(os.listdir(user_dir)):
+            section_dir = os.path.join(user_dir, section)
+            for name in os.listdir(section_dir):
+                stamp, _, rest = name.partition('_')
+                duration, _, ext = rest.partition('.')
+                try:
+                    recorded_at = datetime.strptime(stamp, '%Y%m%dT%H%M%S%f')
+                    duration_ms = int(duration.removesuffix('ms'))
+                except ValueError:
+                    continue
+                traces.append({
+                    'user': user,
+                    'section': section,
+                    'recorded_at': recorded_at,
+                    'duration_ms': duration_ms,
+                    'format': ext,
+                    'path': os.path.join(section_dir, name)
+                })
+    return sorted(traces, key=lambda t: t['recorded_at'], reverse=True)
+
+
+def trace_summary(path, limit=30):
+    """Top functions by cumulative time for a cProfile trace"""
+    if not path.endswith('.prof'):
+        return None
+    import pstats
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
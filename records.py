@@ -0,0 +1,141 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from lazy import lazy_import
+
+pymongo = lazy_import('pymongo')
+
+# Records are converted to BSON documents this many at a time, so a bulk
+# ingest never holds a dict per record for the whole batch
+INSERT_BATCH_SIZE = 1000
+
+
+@dataclass(slots=True)
+class RepoRecord:
+    """One repository as stored in the repos collection"""
+    username: str
+    repo_name: str
+    stars: int = 0
+    forks: int = 0
+    size: int = 0
+    language: str | None = None
+    created_at: str | None = None
+    updated_at: str | None = None
+    pushed_at: str | None = None
+    is_fork: bool = False
+    is_archived: bool = False
+    topics: list = field(default_factory=list)
+    open_issues: int = 0
+
+    @classmethod
+    def from_api(cls, username, repo):
+        return cls(
+            username=username,
+            repo_name=repo['name'],
+            stars=repo.get('stargazers_count', 0),
+            forks=repo.get('forks_count', 0),
+            size=repo.get('size', 0),
+            language=repo.get('language'),
+            created_at=repo.get('created_at'),
+            updated_at=repo.get('updated_at'),
+            pushed_at=repo.get('pushed_at'),
+            is_fork=repo.get('fork', False),
+            is_archived=repo.get('archived', False),
+            topics=repo.get('topics', []),
+            open_issues=repo.get('open_issues_count', 0)
+        )
+
+
+@dataclass(slots=True)
+class CommitRecord:
+    """One commit as stored in the commits collection"""
+    username: str
+    repo: str
+    sha: str | None = None
+    # Lowercased GitHub login, None when the commit email isn't linked to an account
+    author: str | None = None
+    commit_timestamp: str | None = None
+    message: str = ''
+
+    @classmethod
+    def from_api(cls, username, repo_name, commit):
+        details = commit.get('commit', {})
+        login = (commit.get('author') or {}).get('login')
+        return cls(
+            username=username,
+            repo=repo_name,
+            sha=commit.get('sha'),
+            author=login.lower() if login else None,
+            commit_timestamp=details.get('author', {}).get('date'),
+            message=(details.get('message') or '')[:100]
+        )
+
+
+@dataclass(slots=True)
+class EventRecord:
+    """One activity event as stored in the activity collection"""
+    username: str
+    event_id: str | None
+    event_type: str | None = None
+    repo: str | None = None
+    created_at: str | None = None
+
+    @classmethod
+    def from_api(cls, username, event):
+        return cls(
+            username=username,
+            event_id=event.get('id'),
+            event_type=event.get('type'),
+            repo=(event.get('repo') or {}).get('name'),
+            created_at=event.get('created_at')
+        )
+
+    @property
+    def created_datetime(self):
+        """created_at as a datetime, or None when the API sent no timestamp"""
+        if not self.created_at:
+            return None
+        return datetime.strptime(self.created_at, '%Y-%m-%dT%H:%M:%SZ')
+
+
+@dataclass(slots=True)
+class TopicRecord:
+    """One repository's topics as stored in the topics collection"""
+    username: str
+    repo: str
+    topics: list = field(default_factory=list)
+
+
+def to_document(record):
+    """BSON-ready document for a record"""
+    return {name: getattr(record, name) for name in record.__slots__}
+
+
+def insert_records(collection, records, batch_size=INSERT_BATCH_SIZE):
+    """insert_many records in batches, building documents only for the batch in flight"""
+    inserted = 0
+    for start in range(0, len(records), batch_size):
+        batch = [to_document(r) for r in records[start:start + batch_size]]
+        collection.insert_many(batch)
+        inserted += len(batch)
+    return inserted
+
+
+def upsert_records(collection, records, keys, batch_size=INSERT_BATCH_SIZE):
+    """Insert the records not stored yet, matched on keys, and return them
+
+    With a unique index on keys each duplicate check is a single index lookup.
+    """
+    inserted = []
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        result = collection.bulk_write([
+            pymongo.UpdateOne(
+                {key: getattr(r, key) for key in keys},
+                {'$setOnInsert': to_document(r)},
+                upsert=True
+            )
+            for r in batch
+        ], ordered=False)
+        inserted.extend(batch[i] for i in result.upserted_ids)
+    return inserted
+
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+from lazy import lazy_import
+
+pd = lazy_import('pandas')
+pymongo = lazy_import('pymongo')
+
+METRICS = ('stars', 'forks', 'size', 'open_issues')
+
+
+def _today():
+    now = datetime.utcnow()
+    return datetime(now.year, now.month, now.day)
+
+
+def _bucket(day):
+    return day.strftime('%Y-%m')
+
+
+class RepoSnapshots:
+    """Per-repo metric snapshots, delta-encoded in monthly buckets (repo_metrics collection)
+
+    Each bucket document holds the values carried in from the previous bucket
+    (``base``, from ``start``) and a ``changes`` list of
+    ``[day, Δstars, Δforks, Δsize, Δopen_issues]`` entries appended only on
+    days something changed. A repo that rarely changes costs one small
+    document a month, and any date range is read from the buckets it overlaps.
+    """
+
+    def __init__(self, db, username):
+        self.db = db
+        self.username = username
+
+    def _latest(self, repo_names):
+        """repo -> (bucket, last values) of each repo's most recent bucket"""
+        docs = self.db.repo_metrics.aggregate([
+            {'$match': {'username': self.username, 'repo': {'$in': repo_names}}},
+            {'$sort': {'bucket': -1}},
+            {'$group': {'_id': '$repo', 'bucket': {'$first': '$bucket'}, 'last': {'$first': '$last'}}}
+        ])
+        return {doc['_id']: (doc['bucket'], doc['last']) for doc in docs}
+
+    def record(self, repos, day=None):
+        """Snapshot today's values of RepoRecords, storing only what changed since the last snapshot"""
+        day = day or _today()
+        bucket = _bucket(day)
+        latest = self._latest([r.repo_name for r in repos])
+
+        operations = []
+        for repo in repos:
+            values = [getattr(repo, metric) or 0 for metric in METRICS]
+            update = {'$set': {'last': values, 'checked': day}}
+            previous = latest.get(repo.repo_name)
+            if previous is None:
+                update['$setOnInsert'] = {'base': values, 'start': day, 'changes': []}
+            else:
+                previous_bucket, last = previous
+                if previous_bucket != bucket:
+                    # New month: carry the last known values in as the base
+                    update['$setOnInsert'] = {'base': last, 'start': day.replace(day=1)}
+                delta = [value - before for value, before in zip(values, last)]
+                if any(delta):
+                    update['$push'] = {'changes': [day.day] + delta}
+            operations.append(pymongo.UpdateOne(
+                {'username': self.username, 'repo': repo.repo_name, 'bucket': bucket}, update, upsert=True
+            ))
+        if operations:
+            self.db.repo_metrics.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    def history(self, repo_names=None, start=None):
+        """Decoded change points as a DataFrame of repo, date and the METRICS values
+
+        Rows run from each read bucket's base to its last snapshot, so the value
+        in effect at start is the last row on or before it.
+        """
+        query = {'username': self.username}
+        if repo_names is not None:
+            query['repo'] = {'$in': list(repo_names)}
+        if start:
+            query['bucket'] = {'$gte': _bucket(start)}
+
+        rows = []
+        cursor = self.db.repo_metrics.find(query, {'_id': 0}).sort([('repo', pymongo.ASCENDING), ('bucket', pymongo.ASCENDING)])
+        for doc in cursor:
+            values = list(doc['base'])
+            first = doc['start']
+            rows.append((doc['repo'], first, *values))
+            for day, *delta in doc.get('changes', []):
+                values = [value + d for value, d in zip(values, delta)]
+                rows.append((doc['repo'], first.replace(day=day), *values))
+            # Values held until the last snapshot in the bucket
+            if doc['checked'] > rows[-1][1]:
+                rows.append((doc['repo'], doc['checked'], *values))
+        return pd.DataFrame(rows, columns=['repo', 'date', *METRICS])
+
+    def gains(self, window, repo_names=None, now=None):
+        """Change of every metric per repo over the last window days
+
+        Repos first seen inside the window count from their first snapshot;
+        ``days`` is how much of the window the snapshots actually cover.
+        """
+        now = now or _today()
+        since = now - timedelta(days=window)
+        df = self.history(repo_names, since)
+        if df.empty:
+            return df
+
+        df = df.sort_values(['repo', 'date'], kind='stable')
+        at_start = df[df['date'] <= since].groupby('repo').last()
+        first = df.groupby('repo').first()
+        last = df.groupby('repo').last()
+        start = first.copy()
+        start.loc[at_start.index] = at_start
+
+        result = (last[list(METRICS)] - start[list(METRICS)]).reset_index()
+        result['days'] = (now - start['date'].clip(lower=since)).dt.days.values
+        return result
+
+    def totals(self, metric, repo_names=None, start=None):
+        """Daily total of one metric across repos, each repo's last known value carried forward"""
+        df = self.history(repo_names, start)
+        if df.empty:
+            return pd.Series(dtype=float)
+        wide = df.pivot_table(index='date', columns='repo', values=metric, aggfunc='last').sort_index()
+        daily = wide.asfreq('D').ffill().fillna(0).sum(axis=1)
+        if start:
+            daily = daily[daily.index >= pd.Timestamp(start)]
+        return daily
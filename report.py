@@ -0,0 +1,201 @@
+import argparse
+import html
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from string import Template
+
+# Charts per section, in dashboard order
+SECTIONS = [
+    ('Overview', ['overview_star_growth_line', 'overview_monthly_commits_bar', 'overview_contribution_calendar']),
+    ('Repositories', ['repo_size_histogram', 'repo_topics_treemap', 'repo_topics_network', 'repo_language_relationship']),
+    ('Skills', ['skills_language_pie', 'skills_radar_chart', 'skills_language_horizontal_bar']),
+    ('Activity', ['activity_commit_heatmap', 'activity_timeline_scatter', 'activity_event_bars']),
+    ('Productivity', ['productivity_commit_trend', 'productivity_pr_donut', 'productivity_coding_sessions']),
+    ('Growth', ['growth_star_line', 'growth_fork_line', 'growth_trending_repos']),
+]
+
+DEFAULT_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>GitHub Analytics Pro · @$username</title>
+<script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>
+<style>
+    body { font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif; background: #f6f8fa; color: #24292f; margin: 0; padding: 30px; }
+    .project-header { background: #ffffff; padding: 30px 40px; border-radius: 12px; border: 1px solid #d0d7de; text-align: center; margin-bottom: 30px; }
+    .project-title { font-size: 36px; font-weight: 700; color: #1f6feb; }
+    .chart { background: #ffffff; border: 1px solid #d0d7de; border-radius: 12px; margin-bottom: 20px; padding: 10px; }
+    table { border-collapse: collapse; background: #ffffff; }
+    td, th { border: 1px solid #d0d7de; padding: 4px 10px; }
+</style>
+</head>
+<body>
+<div class="project-header">
+    <div class="project-title">GitHub Analytics Pro</div>
+    <div>@$username · generated $generated_at</div>
+</div>
+$body
+</body>
+</html>
+""")
+
+INDEX_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>GitHub Analytics Pro · Reports</title></head>
+<body style="font-family: sans-serif">
+<h1>Reports generated $generated_at</h1>
+<ul>
+$items
+</ul>
+</body>
+</html>
+""")
+
+# Per-worker state, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(connection_string, template_path, formats, time_range):
+    """Open one database connection and load templates/chart modules once per worker process"""
+    from db import Database
+    # Chart modules load lazily, so import plotly and pandas here to pay for them once per worker
+    import pandas  # noqa: F401
+    import plotly.express  # noqa: F401
+    import plotly.graph_objects  # noqa: F401
+    import visualizations  # noqa: F401
+
+    template = DEFAULT_TEMPLATE
+    if template_path:
+        with open(template_path, encoding='utf-8') as f:
+            template = Template(f.read())
+
+    _worker.update({
+        'db': Database(connection_string),
+        'template': template,
+        'formats': formats,
+        'time_range': time_range
+    })
+
+
+def render_user_report(username, output_dir):
+    """Build every chart for one user and write its HTML/PNG report"""
+    from filters import DataFilters
+    from visualizations import Visualizations
+
+    start = time.perf_counter()
+    db = _worker['db']
+    formats = _worker['formats']
+    user_dir = os.path.join(output_dir, username)
+    os.makedirs(user_dir, exist_ok=True)
+
+    viz = Visualizations(db, username, filters=DataFilters(_worker['time_range']))
+    parts = []
+    charts = 0
+    for section, methods in SECTIONS:
+        parts.append(f"<h2>{html.escape(section)}</h2>")
+        if section == 'Repositories':
+            leaderboards = viz.repo_leaderboard_table()
+            if leaderboards:
+                parts.append('<div class="chart"><h3>Top Repositories by Stars</h3>'
+                             + leaderboards['stars'].to_html(index=False) + '</div>')
+        for method in methods:
+            fig = getattr(viz, method)()
+            if fig is None:
+                continue
+            charts += 1
+            if 'html' in formats:
+                parts.append('<div class="chart">' + fig.to_html(full_html=False, include_plotlyjs=False) + '</div>')
+            if 'png' in formats:
+                fig.write_image(os.path.join(user_dir, f"{method}.png"))
+
+    if 'html' in formats:
+        page = _worker['template'].safe_substitute(
+            username=html.escape(username),
+            generated_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC'),
+            body='\n'.join(parts)
+        )
+        with open(os.path.join(user_dir, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(page)
+
+    return {'username': username, 'charts': charts, 'seconds': round(time.perf_counter() - start, 2)}
+
+
+def generate_reports(usernames, output_dir='reports', workers=None, formats=('html',),
+                     template_path=None, time_range='all', connection_string=None):
+    """Render reports for many users in a process pool and write a shared index page"""
+    if connection_string is None:
+        from config import MONGODB_CONNECTION_STRING as connection_string
+
+    if 'png' in formats:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            raise SystemExit("PNG export needs kaleido: pip install kaleido")
+
+    os.makedirs(output_dir, exist_ok=True)
+    results, failures = [], []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(connection_string, template_path, tuple(formats), time_range)
+    ) as pool:
+        futures = {pool.submit(render_user_report, u, output_dir): u for u in usernames}
+        for future in as_completed(futures):
+            username = futures[future]
+            try:
+                result = future.result()
+                results.append(result)
+                print(f"✓ Report for {username}: {result['charts']} charts in {result['seconds']}s")
+            except Exception as e:
+                failures.append(username)
+                print(f"Error generating report for {username}: {str(e)}")
+
+    items = '\n'.join(
+        f'<li><a href="{html.escape(r["username"])}/index.html">@{html.escape(r["username"])}</a>'
+        f' ({r["charts"]} charts)</li>'
+        for r in sorted(results, key=lambda r: r['username'])
+    )
+    with open(os.path.join(output_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(INDEX_TEMPLATE.substitute(generated_at=datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC'), items=items))
+
+    return results, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate static GitHub Analytics Pro reports without Streamlit")
+    parser.add_argument('usernames', nargs='*')
+    parser.add_argument('--users-file', help="file with one username per line")
+    parser.add_argument('--all', action='store_true', help="every user stored in the database")
+    parser.add_argument('--output-dir', default='reports')
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument('--format', dest='formats', nargs='+', choices=['html', 'png'], default=['html'])
+    parser.add_argument('--template', help="custom HTML template with $username, $generated_at and $body")
+    parser.add_argument('--time-range', default='all', choices=['all', '7d', '30d', '90d'])
+    args = parser.parse_args(argv)
+
+    usernames = list(args.usernames)
+    if args.users_file:
+        with open(args.users_file) as f:
+            usernames += [line.strip() for line in f if line.strip()]
+    if args.all:
+        from config import MONGODB_CONNECTION_STRING
+        from db import Database
+        db = Database(MONGODB_CONNECTION_STRING)
+        usernames += db.users.distinct('username')
+        db.close()
+    usernames = list(dict.fromkeys(usernames))
+    if not usernames:
+        parser.error("no usernames given")
+
+    print(f"\n🔄 Generating reports for {len(usernames)} users")
+    results, failures = generate_reports(usernames, args.output_dir, args.workers, args.formats,
+                                         args.template, args.time_range)
+    print(f"\n✅ {len(results)} reports written to {args.output_dir}/\n")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Statuses worth retrying; 403 only counts when GitHub marks it as a rate limit
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honouring Retry-After up to max_wait seconds"""
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=30.0, max_wait=60.0, sleep=time.sleep):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.sleep = sleep
+
+    def backoff(self, attempt):
+        """Jittered delay before retry number attempt (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def is_retryable(self, response):
+        if response.status_code in RETRY_STATUSES:
+            return True
+        # Secondary rate limits come back as 403 with Retry-After or an exhausted quota
+        return response.status_code == 403 and (
+            'Retry-After' in response.headers or response.headers.get('X-RateLimit-Remaining') == '0'
+        )
+
+    def delay_for(self, response, attempt):
+        """Seconds to wait before the next attempt, or None when the server asks for longer than max_wait"""
+        wait = server_wait(response) if response is not None else None
+        if wait is None:
+            return self.backoff(attempt)
+        return wait if wait <= self.max_wait else None
+
+
+def server_wait(response):
+    """Wait requested by Retry-After (seconds or HTTP date) or X-RateLimit-Reset, if any"""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                return None
+    if response.headers.get('X-RateLimit-Remaining') == '0' and response.headers.get('X-RateLimit-Reset'):
+        return max(0.0, int(response.headers['X-RateLimit-Reset']) - time.time())
+    return None
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures and lets one trial call through after reset_timeout"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'half-open':
+                # Re-arm so only one caller probes the host until it reports back
+                self.opened_at = time.monotonic()
+                return True
+            return state == 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        """Count a failure; True when this one opened the circuit"""
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                was_open = self.opened_at is not None
+                self.opened_at = time.monotonic()
+                return not was_open
+            return False
+
+
+# Breakers are per host and shared by every fetcher in the process
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(url):
+    host = urlparse(url).netloc
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+
+def reset_breakers():
+    with _breakers_lock:
+        _breakers.clear()
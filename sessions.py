@@ -0,0 +1,54 @@
+from cache import TTLCache
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# A pause longer than this between two commits/events ends a coding session
+SESSION_GAP_MINUTES = 90
+# Floor on session length for intensity, so a lone commit doesn't read as a burst
+MIN_SESSION_MINUTES = 15
+
+# Sessions per (user, filters, data version, gap); a refresh bumps the version and misses
+session_cache = TTLCache(maxsize=256, ttl=3600)
+
+SESSION_COLUMNS = ['start', 'end', 'size', 'commits', 'duration_minutes', 'intensity']
+
+
+def to_seconds(timestamps):
+    """ISO-8601 strings or datetimes as a datetime64[s] array"""
+    values = [ts for ts in timestamps if ts]
+    if values and isinstance(values[0], str):
+        return np.asarray(values, dtype='U19').astype('datetime64[s]')
+    return np.asarray(values, dtype='datetime64[s]')
+
+
+def detect_sessions(commit_times, event_times=(), gap_minutes=SESSION_GAP_MINUTES):
+    """Split commits and events into sessions wherever the gap between them exceeds gap_minutes
+
+    One sort and one diff over the combined datetime64 array find every
+    session boundary; sizes and commit counts per session are segment sums
+    (np.add.reduceat), so the cost is a sort, not a Python loop.
+    Returns a DataFrame of SESSION_COLUMNS, intensity in actions per hour.
+    """
+    commits, events = to_seconds(commit_times), to_seconds(event_times)
+    times = np.concatenate([commits, events])
+    if times.size == 0:
+        return pd.DataFrame(columns=SESSION_COLUMNS)
+
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    is_commit = (order < commits.size).astype('int64')
+
+    starts = np.r_[0, np.flatnonzero(np.diff(times) > np.timedelta64(gap_minutes, 'm')) + 1]
+    ends = np.r_[starts[1:], times.size] - 1
+    size = ends - starts + 1
+    duration = (times[ends] - times[starts]).astype('int64') / 60
+    return pd.DataFrame({
+        'start': times[starts],
+        'end': times[ends],
+        'size': size,
+        'commits': np.add.reduceat(is_commit, starts),
+        'duration_minutes': duration,
+        'intensity': size / np.maximum(duration, MIN_SESSION_MINUTES) * 60
+    })
@@ -0,0 +1,178 @@
+import hashlib
+import math
+from datetime import datetime
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# 2^12 registers: about 1.6% standard error in 4 KB per sketch
+HLL_PRECISION = 12
+# Quantiles are within 1% of the true value
+QUANTILE_ACCURACY = 0.01
+
+
+def _hash64(values):
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(str(v).encode('utf-8'), digest_size=8).digest(), 'big') for v in values),
+        dtype='uint64'
+    )
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch: merging is an element-wise max of the registers"""
+
+    def __init__(self, registers=None, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype='uint8')
+
+    def add(self, values):
+        hashes = _hash64(v for v in values if v is not None)
+        if hashes.size == 0:
+            return self
+        tail_bits = 64 - self.precision
+        index = (hashes >> np.uint64(tail_bits)).astype('int64')
+        tail = (hashes & np.uint64((1 << tail_bits) - 1)).astype('float64')
+        # frexp's exponent is the bit length (exact: tail_bits < 53); rank = leading zeros + 1
+        rank = np.where(tail > 0, tail_bits - np.frexp(tail)[1] + 1, tail_bits + 1).astype('uint8')
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype('int64')))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small cardinalities: linear counting over the empty registers
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_document(self):
+        return {'kind': 'hll', 'precision': self.precision, 'registers': self.registers.tobytes()}
+
+    @classmethod
+    def from_document(cls, doc):
+        return cls(np.frombuffer(doc['registers'], dtype='uint8').copy(), doc['precision'])
+
+
+class QuantileSketch:
+    """Mergeable relative-error quantile sketch (DDSketch-style log buckets)
+
+    A positive value x lands in bucket ceil(log_γ x) with γ = (1+α)/(1-α),
+    so any quantile is returned within a relative error α. Merging adds
+    bucket counts.
+    """
+
+    def __init__(self, counts=None, zeros=0, accuracy=QUANTILE_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.counts = counts if counts is not None else {}
+        self.zeros = zeros
+
+    def add(self, values):
+        values = np.asarray([v for v in values if v is not None], dtype='float64')
+        self.zeros += int(np.count_nonzero(values <= 0))
+        positive = values[values > 0]
+        keys, counts = np.unique(np.ceil(np.log(positive) / np.log(self.gamma)).astype('int64'), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.counts[key] = self.counts.get(key, 0) + count
+        return self
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.zeros += other.zeros
+        return self
+
+    @property
+    def total(self):
+        return self.zeros + sum(self.counts.values())
+
+    def quantiles(self, qs):
+        """Values at each quantile q in [0, 1], or None when empty"""
+        total = self.total
+        if not total:
+            return [None] * len(qs)
+        keys = sorted(self.counts)
+        cumulative = np.cumsum([self.zeros] + [self.counts[k] for k in keys])
+        results = []
+        for q in qs:
+            position = int(np.searchsorted(cumulative, q * (total - 1), side='right'))
+            if position == 0:
+                results.append(0.0)
+            else:
+                key = keys[min(position, len(keys)) - 1]
+                results.append(2 * self.gamma ** key / (self.gamma + 1))
+        return results
+
+    def to_document(self):
+        keys = sorted(self.counts)
+        return {'kind': 'quantiles', 'accuracy': self.accuracy, 'zeros': self.zeros,
+                'keys': keys, 'counts': [self.counts[k] for k in keys]}
+
+    @classmethod
+    def from_document(cls, doc):
+        return cls(dict(zip(doc['keys'], doc['counts'])), doc['zeros'], doc['accuracy'])
+
+
+SKETCH_TYPES = {'hll': HyperLogLog, 'quantiles': QuantileSketch}
+
+
+class UserSketches:
+    """Per-user sketches (user_sketches collection), updated at ingest and merged for any set of users
+
+    Each sketch has one writer, the fetch stage that feeds it:
+    - contributors: HyperLogLog of commit author logins
+    - repos_touched: HyperLogLog of repos in the user's activity events
+    - repo_size: QuantileSketch of the user's repository sizes (KB)
+    Team summaries read one document per user and sketch, never the raw data.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def load(self, username, name):
+        doc = self.db.user_sketches.find_one({'username': username, 'name': name})
+        return SKETCH_TYPES[doc['kind']].from_document(doc) if doc else None
+
+    def save(self, username, name, sketch):
+        self.db.user_sketches.replace_one(
+            {'username': username, 'name': name},
+            dict(sketch.to_document(), username=username, name=name, updated_at=datetime.utcnow()),
+            upsert=True
+        )
+
+    def add(self, username, name, values, rebuild=False):
+        """Add values to a distinct-count sketch (duplicates are free), or start it over with rebuild"""
+        sketch = None if rebuild else self.load(username, name)
+        self.save(username, name, (sketch or HyperLogLog()).add(values))
+
+    def replace_quantiles(self, username, name, values):
+        self.save(username, name, QuantileSketch().add(values))
+
+    def merged(self, name, usernames=None):
+        """One sketch merged over users (every tracked user for None), or None when none has it"""
+        query = {'name': name}
+        if usernames is not None:
+            query['username'] = {'$in': list(usernames)}
+        result = None
+        for doc in self.db.user_sketches.find(query):
+            sketch = SKETCH_TYPES[doc['kind']].from_document(doc)
+            result = sketch if result is None else result.merge(sketch)
+        return result
+
+    def summary(self, usernames=None, quantiles=(0.5, 0.9, 0.99)):
+        """Approximate team rollup: distinct contributors, distinct repos touched, repo size quantiles"""
+        contributors = self.merged('contributors', usernames)
+        touched = self.merged('repos_touched', usernames)
+        sizes = self.merged('repo_size', usernames)
+        return {
+            'distinct_contributors': contributors.count() if contributors else 0,
+            'distinct_repos_touched': touched.count() if touched else 0,
+            'repo_size_kb': dict(zip((f'p{round(q * 100)}' for q in quantiles),
+                                     sizes.quantiles(quantiles) if sizes else [None] * len(quantiles)))
+        }
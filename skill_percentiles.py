@@ -0,0 +1,184 @@
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from cache import TTLCache
+from filters import own_commits_query
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+pymongo = lazy_import('pymongo')
+
+RADAR_AXES = ('Stars', 'Forks', 'Repos', 'Commits', 'Languages', 'Followers')
+# Quantile points kept per axis; populations up to this size are stored exactly
+TABLE_POINTS = 1000
+# Tables older than this are rebuilt on the next lookup
+REFRESH_INTERVAL = timedelta(hours=6)
+# One process rebuilds at a time under this lease; the others keep serving the old table
+REBUILD_LEASE = timedelta(minutes=10)
+# Below this many tracked users percentiles say nothing, and the radar uses fixed scales
+MIN_POPULATION = 5
+
+# The population table, shared by every chart in the process
+table_cache = TTLCache(maxsize=1, ttl=300)
+# Held while this process rebuilds in the background, so it starts at most one rebuild
+_refreshing = threading.Lock()
+
+
+def skill_values(db, username):
+    """Raw radar values of one user, or None before the user and their repos are stored"""
+    user = db.users.find_one({'username': username}, {'followers': 1})
+    repos = list(db.repos.find({'username': username, 'is_fork': False}, {'stars': 1, 'forks': 1}))
+    if not user or not repos:
+        return None
+    return {
+        'Stars': sum(r['stars'] for r in repos),
+        'Forks': sum(r['forks'] for r in repos),
+        'Repos': len(repos),
+        'Commits': db.commits.count_documents(own_commits_query(username)),
+        'Languages': db.languages.count_documents({'username': username}),
+        'Followers': user.get('followers', 0)
+    }
+
+
+def population_values(db):
+    """Radar values of every tracked user as axis -> array, read with one aggregation per collection"""
+    followers = {u['username']: u.get('followers', 0) for u in db.users.find({}, {'username': 1, 'followers': 1})}
+    values = {axis: dict.fromkeys(followers, 0) for axis in RADAR_AXES}
+    values['Followers'] = followers
+
+    for doc in db.repos.aggregate([
+        {'$match': {'is_fork': False}},
+        {'$group': {'_id': '$username', 'stars': {'$sum': '$stars'}, 'forks': {'$sum': '$forks'}, 'repos': {'$sum': 1}}}
+    ]):
+        if doc['_id'] in followers:
+            values['Stars'][doc['_id']] = doc['stars']
+            values['Forks'][doc['_id']] = doc['forks']
+            values['Repos'][doc['_id']] = doc['repos']
+    for doc in db.commits.aggregate([
+        {'$group': {'_id': {'username': '$username', 'author': '$author'}, 'count': {'$sum': 1}}}
+    ]):
+        username, author = doc['_id']['username'], doc['_id'].get('author')
+        # The user's own commits, as in own_commits_query
+        if username in followers and author in (username.lower(), None):
+            values['Commits'][username] += doc['count']
+    for doc in db.languages.aggregate([{'$group': {'_id': '$username', 'count': {'$sum': 1}}}]):
+        if doc['_id'] in followers:
+            values['Languages'][doc['_id']] = doc['count']
+
+    return {axis: np.fromiter(by_user.values(), dtype='float64', count=len(by_user)) for axis, by_user in values.items()}
+
+
+class PercentileTables:
+    """Population quantile tables per radar axis (skill_percentiles collection)
+
+    Each axis keeps up to TABLE_POINTS sorted quantile points of the values
+    across every tracked user. A percentile is then two bisections, so a
+    radar render never scans the population and never builds a table: a
+    missing or stale one is rebuilt on a background thread by whichever
+    process takes the rebuild lease first (or by the cron main()), and the
+    old table, or fixed scales before the first build, is served meanwhile.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def rebuild(self):
+        values = population_values(self.db)
+        size = len(values['Followers'])
+        points = np.linspace(0, 1, min(size, TABLE_POINTS))
+        table = {
+            '_id': 'population',
+            'users': size,
+            'built_at': datetime.utcnow(),
+            'axes': {axis: np.quantile(v, points, method='lower').tolist() if size else [] for axis, v in values.items()}
+        }
+        self.db.skill_percentiles.replace_one({'_id': 'population'}, table, upsert=True)
+        table_cache.set('population', table)
+        return table
+
+    def _stale(self, table):
+        return table is None or datetime.utcnow() - table['built_at'] > REFRESH_INTERVAL
+
+    def _load(self):
+        table = self.db.skill_percentiles.find_one({'_id': 'population'})
+        if table is not None:
+            table_cache.set('population', table)
+        return table
+
+    def _acquire(self):
+        """Take the rebuild lease; False while another process holds it"""
+        now = datetime.utcnow()
+        try:
+            self.db.skill_percentiles.update_one(
+                {'_id': 'rebuild_lease', 'until': {'$lt': now}},
+                {'$set': {'until': now + REBUILD_LEASE}},
+                upsert=True
+            )
+        except pymongo.errors.DuplicateKeyError:
+            return False
+        return True
+
+    def _release(self):
+        self.db.skill_percentiles.update_one({'_id': 'rebuild_lease'}, {'$set': {'until': datetime.min}})
+
+    def refresh(self):
+        """Rebuild the table if it is missing or stale and this process takes the lease; the new table or None"""
+        if not self._stale(self._load()) or not self._acquire():
+            return None
+        try:
+            return self.rebuild()
+        finally:
+            self._release()
+
+    def _refresh_in_background(self):
+        if not _refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error rebuilding skill percentile tables: {str(e)}")
+            finally:
+                _refreshing.release()
+        threading.Thread(target=run, daemon=True).start()
+
+    def table(self):
+        """The current table, possibly stale, or None before the first build; only ever reads
+
+        A stale table is re-read first, since another process may have
+        rebuilt it; if it is still stale a background refresh is started.
+        """
+        table = table_cache.get('population')
+        if self._stale(table):
+            table = self._load() or table
+            if self._stale(table):
+                self._refresh_in_background()
+        return table
+
+    def percentiles(self, values):
+        """axis -> percentile (0-100) of each value, ties counted half below; None for a small population"""
+        table = self.table()
+        if table is None or table['users'] < MIN_POPULATION:
+            return None
+        result = {}
+        for axis, value in values.items():
+            points = table['axes'][axis]
+            rank = (bisect_left(points, value) + bisect_right(points, value)) / 2
+            result[axis] = round(100 * rank / len(points), 1)
+        return result
+
+
+def main():
+    """Rebuild the tables, e.g. from cron"""
+    from config import MONGODB_CONNECTION_STRING
+    from db import Database
+
+    db = Database(MONGODB_CONNECTION_STRING)
+    table = PercentileTables(db).rebuild()
+    db.close()
+    print(f"✓ Rebuilt skill percentile tables over {table['users']} users")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+from collections import Counter
+from datetime import datetime
+from lazy import lazy_import
+
+pd = lazy_import('pandas')
+pymongo = lazy_import('pymongo')
+
+# GitHub pages stargazers 100 at a time, oldest first
+STARGAZERS_PER_PAGE = 100
+
+
+class StarHistory:
+    """Per-repo daily new-star counts (star_daily) and stargazer paging progress (stargazer_progress)
+
+    Stargazers are listed oldest first, so new stars always land on the last
+    page. Progress records that page and how many of its entries were already
+    counted, so a refresh only requests the pages holding new stars.
+    """
+
+    def __init__(self, db, username):
+        self.db = db
+        self.username = username
+
+    def progress(self):
+        """repo name -> {'page', 'seen', 'total'} to resume paging from"""
+        docs = self.db.stargazer_progress.find({'username': self.username}, {'_id': 0, 'username': 0})
+        return {doc['repo']: doc for doc in docs}
+
+    def has_data(self):
+        return self.db.star_daily.find_one({'username': self.username}, {'_id': 1}) is not None
+
+    def add_page(self, repo, page, entries, skip=0):
+        """Count the new stars on one page (entries past skip) and move the resume point
+
+        Returns the number of stars added.
+        """
+        new = entries[skip:]
+        days = Counter(
+            datetime.strptime(e['starred_at'][:10], '%Y-%m-%d') for e in new if e.get('starred_at')
+        )
+        if days:
+            self.db.star_daily.bulk_write([
+                pymongo.UpdateOne(
+                    {'username': self.username, 'repo': repo, 'date': day},
+                    {'$inc': {'count': count}},
+                    upsert=True
+                )
+                for day, count in days.items()
+            ], ordered=False)
+
+        # A full page is done; a partial one is re-read next time for the stars after it
+        full = len(entries) >= STARGAZERS_PER_PAGE
+        self.db.stargazer_progress.update_one(
+            {'username': self.username, 'repo': repo},
+            {
+                '$set': {'page': page + 1 if full else page, 'seen': 0 if full else len(entries)},
+                '$inc': {'total': len(new)}
+            },
+            upsert=True
+        )
+        return len(new)
+
+    def reset(self, repos):
+        """Forget the history of repos so it is rebuilt from page 1"""
+        query = {'username': self.username, 'repo': {'$in': list(repos)}}
+        self.db.star_daily.delete_many(query)
+        self.db.stargazer_progress.delete_many(query)
+
+    def daily(self, repo_names=None):
+        """New stars per day across repos, with the running total, as date, stars, cumulative"""
+        match = {'username': self.username}
+        if repo_names is not None:
+            match['repo'] = {'$in': list(repo_names)}
+        docs = list(self.db.star_daily.aggregate([
+            {'$match': match},
+            {'$group': {'_id': '$date', 'stars': {'$sum': '$count'}}},
+            {'$sort': {'_id': 1}}
+        ]))
+        if not docs:
+            return pd.DataFrame()
+        df = pd.DataFrame(docs).rename(columns={'_id': 'date'})
+        df['date'] = pd.to_datetime(df['date'])
+        df['cumulative'] = df['stars'].cumsum()
+        return df
@@ -0,0 +1,11 @@
+import mongomock
+import pytest
+from db import Database
+
+
+@pytest.fixture
+def db():
+    """Database on a fresh in-memory mongomock client"""
+    database = Database(None, client=mongomock.MongoClient())
+    yield database
+    database.close()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from api import AnalyticsService, create_app
+from metrics import metrics
+
+
+async def _get(app, path, headers=None):
+    """(status, headers, body) of one GET through the ASGI app"""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        'client': ('test', 1), 'server': ('test', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = next(m for m in messages if m['type'] == 'http.response.start')
+    body = b''.join(m.get('body', b'') for m in messages if m['type'] == 'http.response.body')
+    return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, body
+
+
+@pytest.fixture
+def service(db):
+    db.users.insert_one({'username': 'alice', 'followers': 1})
+    db.repos.insert_many([
+        {'username': 'alice', 'repo_name': f'r{n}', 'size': n, 'stars': n, 'forks': 0,
+         'language': 'Python', 'is_fork': False, 'is_archived': False}
+        for n in range(1, 4)
+    ])
+    service = AnalyticsService(db, max_workers=4)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def app(service):
+    app = create_app(db=service.db)
+    app.state.service = service
+    return app
+
+
+def test_etag_revalidates_with_304(app):
+    async def requests():
+        status, headers, body = await _get(app, '/users/alice/aggregates/top_repos?time_range=30d')
+        assert status == 200 and json.loads(body)
+        etag = headers['etag']
+        assert headers['cache-control'].startswith('private')
+
+        status, headers, body = await _get(app, '/users/alice/aggregates/top_repos?time_range=30d',
+                                           {'If-None-Match': etag})
+        assert (status, headers['etag'], body) == (304, etag, b'')
+        # ETags follow the content: other filters build another body
+        status, _, body = await _get(app, '/users/alice/aggregates/top_repos?time_range=30d&language=Rust',
+                                     {'If-None-Match': etag})
+        assert (status, json.loads(body)) == (200, [])
+
+    asyncio.run(requests())
+
+
+def test_unknown_user_and_names_are_404(app):
+    async def requests():
+        assert (await _get(app, '/users/nobody'))[0] == 404
+        assert (await _get(app, '/users/alice/aggregates/nope'))[0] == 404
+        assert (await _get(app, '/users/alice/charts/nope'))[0] == 404
+        assert (await _get(app, '/users/alice/aggregates/top_repos?time_range=1y'))[0] == 422
+
+    asyncio.run(requests())
+
+
+def test_identical_requests_share_one_build(service):
+    builds = []
+    release = threading.Event()
+
+    def build():
+        builds.append(True)
+        release.wait(5)
+        return b'{}'
+
+    async def requests():
+        pending = [asyncio.ensure_future(service.cached(('coalesce-test', 1), build)) for _ in range(20)]
+        await asyncio.sleep(0.05)
+        release.set()
+        results = await asyncio.gather(*pending)
+        assert len({etag for _, etag in results}) == 1
+        # Finished builds are served from the response cache
+        assert await service.cached(('coalesce-test', 1), build) == results[0]
+
+    metrics.reset()
+    asyncio.run(requests())
+    assert len(builds) == 1
+    counts = {dict(labels)['result']: value for (name, labels), value in metrics._counters.items()
+              if name == 'api_cache_total'}
+    assert counts == {'miss': 1, 'coalesced': 19, 'hit': 1}
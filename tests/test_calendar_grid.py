@@ -0,0 +1,38 @@
+import numpy as np
+from calendar_grid import ContributionCalendar, weeks_in_year
+
+
+def test_weeks_in_year():
+    assert weeks_in_year([2015, 2019, 2020, 2021, 2024, 2026]).tolist() == [53, 52, 53, 52, 52, 53]
+
+
+def test_leap_year_week_53_is_kept():
+    # 2020-12-28 to 2021-01-03 is week 53 of ISO 2020
+    calendar = ContributionCalendar.from_timestamps(
+        ['2020-06-01T09:00:00Z', '2020-12-28T10:00:00Z', '2021-01-03T23:00:00Z']
+    )
+    assert calendar.years.tolist() == [2020]
+    assert calendar.totals().tolist() == [3]
+    assert np.nansum(calendar.year_matrix(0)) == 3
+
+
+def test_iso_year_boundaries():
+    # 2021-01-01 is in week 53 of 2020; 2024-12-30 is in week 1 of 2025
+    calendar = ContributionCalendar.from_timestamps(['2021-01-01T00:00:00Z', '2024-12-30T00:00:00Z', None])
+    assert calendar.years.tolist() == [2020, 2021, 2022, 2023, 2024, 2025]
+    assert calendar.totals().tolist() == [1, 0, 0, 0, 0, 1]
+    assert calendar.recent(1).years.tolist() == [2025]
+
+
+def test_year_dates_match_cells():
+    calendar = ContributionCalendar.from_days(np.array(['2020-03-04'], dtype='datetime64[D]'), counts=[5])
+    matrix, dates = calendar.year_matrix(0), calendar.year_dates(0)
+    row, col = np.argwhere(np.nan_to_num(matrix) == 5)[0]
+    assert dates[row, col] == '2020-03-04'
+    assert dates[0, 0] == '2019-12-30'
+
+
+def test_empty_calendar():
+    calendar = ContributionCalendar.from_timestamps([])
+    assert calendar.grid.shape == (0, 53, 7)
+    assert calendar.totals().tolist() == []
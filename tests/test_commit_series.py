@@ -0,0 +1,42 @@
+from datetime import datetime
+from commit_series import DailyCommitSeries
+
+
+def _commit(sha, timestamp, author='alice'):
+    return {'username': 'alice', 'repo': 'r', 'sha': sha, 'author': author, 'commit_timestamp': timestamp}
+
+
+def test_rebuild_counts_own_commits(db):
+    db.commits.insert_many([
+        _commit('1', '2024-01-01T09:00:00Z'),
+        _commit('2', '2024-01-01T18:00:00Z'),
+        _commit('3', '2024-01-03T09:00:00Z', author=None),
+        _commit('4', '2024-01-02T09:00:00Z', author='someone-else'),
+    ])
+    series = DailyCommitSeries(db, 'alice')
+    assert series.rebuild() == 2
+
+    daily = series.daily_counts()
+    assert daily['commits'].tolist() == [2, 1]
+    assert daily['cumulative'].tolist() == [2, 3]
+
+
+def test_add_commits_updates_later_prefix_sums(db):
+    series = DailyCommitSeries(db, 'alice')
+    series.add_commits(['2024-01-01T09:00:00Z', '2024-01-05T09:00:00Z'])
+    # A late commit on an earlier day shifts every cumulative count after it
+    series.add_commits(['2024-01-03T09:00:00Z', '2024-01-03T10:00:00Z'])
+
+    daily = series.daily_counts()
+    assert daily['commits'].tolist() == [1, 2, 1]
+    assert daily['cumulative'].tolist() == [1, 3, 4]
+
+
+def test_daily_counts_window(db):
+    series = DailyCommitSeries(db, 'alice')
+    assert series.is_empty()
+    series.add_commits(['2024-01-01T09:00:00Z', '2024-01-02T09:00:00Z', '2024-01-03T09:00:00Z'])
+
+    window = series.daily_counts(datetime(2024, 1, 2), datetime(2024, 1, 3))
+    assert window['commits'].tolist() == [1]
+    assert window['cumulative'].tolist() == [2]
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+from fetch_data import GitHubFetcher
+from filters import own_commits_query
+from records import RepoRecord
+
+
+def _api_commit(sha, day):
+    return {
+        'sha': sha,
+        'author': {'login': 'Alice'},
+        'commit': {'author': {'date': f'2024-01-{day:02d}T09:00:00Z'}, 'message': f'commit {sha}'}
+    }
+
+
+def _fetcher(db, pages):
+    """GitHubFetcher answering /commits from pages (repo -> API commits) without network"""
+    fetcher = GitHubFetcher(db)
+
+    def get(url, endpoint, headers=None):
+        repo = url.split('/repos/alice/')[1].split('/')[0]
+        return SimpleNamespace(status_code=200, json=lambda: pages[repo])
+    fetcher._get = get
+    return fetcher
+
+
+def test_refetch_replaces_commits_stored_without_sha(db):
+    # Stored before SHAs and authors were recorded
+    db.commits.insert_many([
+        {'username': 'alice', 'repo': 'r1', 'commit_timestamp': f'2024-01-{day:02d}T09:00:00Z', 'message': 'old'}
+        for day in (1, 2, 3)
+    ])
+    db.commits.insert_one({'username': 'alice', 'repo': 'r2', 'commit_timestamp': '2024-01-05T09:00:00Z'})
+    pages = {'r1': [_api_commit(f'{day:040x}', day) for day in (1, 2, 3)]}
+
+    _fetcher(db, pages).fetch_commits('alice', [RepoRecord(username='alice', repo_name='r1')])
+
+    assert db.commits.count_documents(own_commits_query('alice')) == 3
+    assert db.commits.count_documents({'sha': {'$exists': False}}) == 0
+
+
+def test_refetch_keeps_legacy_rows_of_unfetched_repos(db):
+    db.commits.insert_one({'username': 'alice', 'repo': 'r2', 'commit_timestamp': '2024-01-05T09:00:00Z'})
+    fetcher = _fetcher(db, {'r1': [_api_commit('a' * 40, 1)]})
+    # r2 failed to fetch, so its stored commits are all that is known about it
+    fetcher.partial = {'commits': ['r2: HTTP 502']}
+    fetcher.fetch_commits('alice', [RepoRecord(username='alice', repo_name='r1')])
+
+    assert db.commits.count_documents({'repo': 'r2'}) == 1
+    assert db.commits.count_documents({'repo': 'r1'}) == 1
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from figure_cache import FigureCache
+from skill_percentiles import PercentileTables
+from visualizations import Visualizations
+
+
+@pytest.fixture
+def alice(db, monkeypatch):
+    monkeypatch.setattr(PercentileTables, '_refresh_in_background', lambda self: None)
+    db.users.insert_one({'username': 'alice', 'followers': 3})
+    db.repos.insert_many([
+        {'username': 'alice', 'repo_name': f'r{n}', 'size': 100 * n, 'stars': n, 'forks': 0,
+         'language': 'Python', 'is_fork': False, 'is_archived': False}
+        for n in range(1, 4)
+    ])
+    return db
+
+
+def _viz(db, version):
+    return Visualizations(db, 'alice', figure_cache=FigureCache(db), data_version=version)
+
+
+def _sizes(body):
+    return sorted(json.loads(body)['data'][0]['x'])
+
+
+def test_chart_json_serves_the_stored_figure_until_the_version_moves(alice):
+    body = _viz(alice, 1).chart_json('repo_size_histogram')
+    assert _sizes(body) == [100, 200, 300]
+    assert alice.figure_cache.count_documents({}) == 1
+
+    alice.repos.update_one({'repo_name': 'r1'}, {'$set': {'size': 900}})
+    assert _viz(alice, 1).chart_json('repo_size_histogram') == body
+    # The decorated method reads the same entry
+    assert sorted(_viz(alice, 1).repo_size_histogram().data[0].x) == [100, 200, 300]
+
+    assert _sizes(_viz(alice, 2).chart_json('repo_size_histogram')) == [200, 300, 900]
+    assert alice.figure_cache.count_documents({}) == 2
+
+
+def test_empty_charts_are_cached_as_null(db):
+    assert _viz(db, 1).chart_json('repo_size_histogram') == b'null'
+    assert _viz(db, 1).repo_size_histogram() is None
+    assert db.figure_cache.count_documents({}) == 1
+
+
+def test_unmarked_charts_are_never_stored(alice):
+    body = _viz(alice, 1).chart_json('skills_radar_chart')
+    assert json.loads(body)['data'][0]['type'] == 'scatterpolar'
+    assert alice.figure_cache.count_documents({}) == 0
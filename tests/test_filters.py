@@ -0,0 +1,43 @@
+from datetime import datetime
+import pytest
+from filters import DataFilters, own_commits_query
+
+NOW = datetime(2024, 6, 15, 13, 45)
+
+
+def test_unknown_time_range():
+    with pytest.raises(ValueError):
+        DataFilters(time_range='1y')
+
+
+def test_since_is_midnight():
+    assert DataFilters(now=NOW).since is None
+    assert DataFilters(time_range='7d', now=NOW).since == datetime(2024, 6, 8)
+
+
+def test_key_ignores_order():
+    a = DataFilters(languages=['Go', 'Python'], repos=['b', 'a'], now=NOW)
+    b = DataFilters(languages=['Python', 'Go'], repos=['a', 'b'], now=NOW)
+    assert a.key() == b.key()
+    assert DataFilters(now=NOW).is_default and not a.is_default
+
+
+def test_commit_query():
+    filters = DataFilters(time_range='30d', repos=['r1'], now=NOW)
+    query = filters.commit_query('Alice', lookback_days=7)
+    assert query['author'] == own_commits_query('Alice')['author'] == {'$in': ['alice', None]}
+    assert query['commit_timestamp'] == {'$gte': '2024-05-09T00:00:00Z'}
+    assert query['repo'] == {'$in': ['r1']}
+    # Repos resolved from the language filter take precedence
+    assert filters.commit_query('Alice', repo_names=['r2'])['repo'] == {'$in': ['r2']}
+
+
+def test_repo_and_event_queries():
+    filters = DataFilters(time_range='7d', languages=['Go'], repos=['r1'], event_types=['PushEvent'], now=NOW)
+    assert filters.repo_query('alice', is_fork=False) == {
+        'username': 'alice', 'is_fork': False, 'language': {'$in': ['Go']}, 'repo_name': {'$in': ['r1']}
+    }
+    assert filters.event_query('alice') == {
+        'username': 'alice', 'created_at': {'$gte': datetime(2024, 6, 8)},
+        'event_type': {'$in': ['PushEvent']}, 'repo': {'$in': ['alice/r1']}
+    }
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from job_queue import JobQueue, LeaseLostError, FINISH, FIRST_STAGES, REPO_STAGES
+from worker import Worker
+
+
+class FakeFetcher:
+    """Records fetched endpoints and checks the lease before 'writing', like GitHubFetcher"""
+
+    def __init__(self, on_fetch=None):
+        self.partial = {}
+        self.lease_guard = None
+        self.fetched = []
+        self.on_fetch = on_fetch
+
+    def _fetch(self, endpoint, username):
+        if self.on_fetch:
+            self.on_fetch(endpoint)
+        if self.lease_guard:
+            self.lease_guard()
+        self.fetched.append((endpoint, username))
+
+    def __getattr__(self, name):
+        if name.startswith('fetch_'):
+            return lambda username, repos=None: self._fetch(name, username)
+        raise AttributeError(name)
+
+
+def _expire(db, task):
+    db.fetch_jobs.update_one({'_id': task['_id']}, {'$set': {'lease_until': datetime.utcnow() - timedelta(seconds=1)}})
+
+
+def test_expired_lease_is_reclaimed_and_old_holder_loses_it(db):
+    queue = JobQueue(db)
+    queue.enqueue('run', 'alice', 'user')
+    first = queue.claim('w1')
+    assert queue.claim('w2') is None
+
+    _expire(db, first)
+    with pytest.raises(LeaseLostError):
+        queue.check_lease(first)
+    second = queue.claim('w2')
+    assert second['_id'] == first['_id'] and second['attempts'] == 2
+
+    queue.check_lease(second)
+    assert not queue.heartbeat(first)
+    assert not queue.complete(first)
+    assert queue.complete(second)
+    assert queue.status('run') == {'user': 'done'}
+
+
+def test_task_fails_after_max_attempts(db):
+    queue = JobQueue(db, max_attempts=2)
+    queue.enqueue('run', 'alice', 'user')
+    for _ in range(2):
+        _expire(db, queue.claim('w'))
+    assert queue.claim('w') is None
+    assert queue.status('run') == {'user': 'failed'}
+    assert queue.run_partial('run') == {'user': ['task failed: lease expired too often']}
+
+
+def test_worker_runs_every_stage_then_finish(db):
+    db.users.insert_one({'username': 'alice'})
+    queue = JobQueue(db)
+    fetcher = FakeFetcher()
+    run = queue.enqueue_refresh('alice')
+    Worker(db, queue, fetcher, worker_id='w').run(burst=True)
+
+    assert queue.status(run) == {endpoint: 'done' for endpoint in (*FIRST_STAGES, *REPO_STAGES, FINISH)}
+    assert len(fetcher.fetched) == len(FIRST_STAGES) + len(REPO_STAGES)
+    assert 'fetched_at' in db.users.find_one({'username': 'alice'})
+
+
+def test_worker_abandons_task_whose_lease_expired(db):
+    queue = JobQueue(db)
+    queue.enqueue('run', 'alice', 'user')
+    task = queue.claim('w1')
+    # The worker stalls past its lease before its first write
+    fetcher = FakeFetcher(on_fetch=lambda endpoint: _expire(db, task))
+
+    Worker(db, queue, fetcher, worker_id='w1').process(task)
+
+    assert fetcher.fetched == []
+    stored = db.fetch_jobs.find_one({'_id': task['_id']})
+    # Neither completed nor requeued: the lease is left to expire for the next claim
+    assert stored['status'] == 'running' and stored['attempts'] == 1
+    assert queue.claim('w2')['_id'] == task['_id']
@@ -0,0 +1,36 @@
+from language_bytes import LanguageBytes
+
+
+def _totals(stats):
+    return {doc['language']: (doc['bytes'], doc['repo_count'], doc['percentage']) for doc in stats.totals()}
+
+
+def test_apply_adjusts_totals_by_difference(db):
+    stats = LanguageBytes(db, 'alice')
+    stats.apply({'web': ('t1', {'Python': 600, 'HTML': 200}), 'cli': ('t1', {'Python': 200})})
+    assert _totals(stats) == {'Python': (800, 2, 80.0), 'HTML': (200, 1, 20.0)}
+
+    # Only web changed: HTML leaves it, Go arrives
+    assert stats.apply({'web': ('t2', {'Python': 700, 'Go': 300})}) == 3
+    assert _totals(stats) == {'Python': (900, 2, 75.0), 'Go': (300, 1, 25.0)}
+    assert stats.cached_pushed_at() == {'web': 't2', 'cli': 't1'}
+
+
+def test_removed_repos_leave_the_totals(db):
+    stats = LanguageBytes(db, 'alice')
+    stats.apply({'web': ('t1', {'Python': 600, 'HTML': 200}), 'cli': ('t1', {'Rust': 200})})
+    stats.apply({}, removed=['cli'])
+    assert _totals(stats) == {'Python': (600, 1, 75.0), 'HTML': (200, 1, 25.0)}
+    assert stats.cached_pushed_at() == {'web': 't1'}
+
+
+def test_incremental_totals_match_a_rebuild(db):
+    stats = LanguageBytes(db, 'alice')
+    # Counts from before bytes were stored are replaced on the first apply
+    db.languages.insert_one({'username': 'alice', 'language': 'Python', 'repo_count': 5})
+    stats.apply({'a': ('t1', {'Python': 100, 'C': 50}), 'b': ('t1', {'C': 10})})
+    stats.apply({'b': ('t2', {'C': 30, 'Go': 5}), 'c': ('t1', {'Go': 15})}, removed=['a'])
+    incremental = _totals(stats)
+
+    stats.rebuild()
+    assert _totals(stats) == incremental == {'C': (30, 1, 60.0), 'Go': (20, 2, 40.0)}
@@ -0,0 +1,42 @@
+import pytest
+from metrics import MAX_DEBUG_SERIES, Metrics, timed_chart
+
+
+class Charts:
+    def __init__(self, username):
+        self.username = username
+
+    @timed_chart
+    def ok(self):
+        return 'figure'
+
+    @timed_chart
+    def broken(self):
+        raise ValueError('bad data')
+
+
+def test_timed_chart_exports_no_usernames(monkeypatch):
+    registry = Metrics()
+    monkeypatch.setattr('metrics.metrics', registry)
+    Charts('alice').ok()
+    with pytest.raises(ValueError):
+        Charts('bob').broken()
+
+    exported = registry.render_prometheus()
+    assert 'chart_build_seconds_count{chart="ok"} 1' in exported
+    assert 'chart_errors_total{chart="broken"} 1' in exported
+    assert 'username' not in exported
+    assert {row['username'] for row in registry.snapshot() if row['metric'] == 'chart_user_build_seconds'} == {'alice', 'bob'}
+
+
+def test_debug_series_are_bounded():
+    registry = Metrics()
+    for i in range(MAX_DEBUG_SERIES + 10):
+        registry.observe('chart_user_build_seconds', 0.01, chart='ok', username=f'user-{i}')
+    registry.observe('chart_user_build_seconds', 0.01, chart='ok', username='user-10')
+    registry.observe('chart_user_build_seconds', 0.01, chart='ok', username='newest')
+
+    users = [row['username'] for row in registry.snapshot()]
+    assert len(users) == MAX_DEBUG_SERIES
+    # Least recently observed go first
+    assert 'user-10' in users and 'newest' in users and 'user-11' not in users
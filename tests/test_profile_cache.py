@@ -0,0 +1,57 @@
+import time
+import pytest
+import db as db_module
+from version_watch import VersionWatcher
+
+
+class Unreachable:
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected database call: {name}")
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    db_module.profile_cache.clear()
+    yield
+    db_module.profile_cache.clear()
+
+
+def _add_user(db, followers):
+    db.users.update_one({'username': 'alice'}, {'$set': {'followers': followers}}, upsert=True)
+
+
+def test_cached_header_needs_no_database(db, monkeypatch):
+    _add_user(db, 3)
+    assert db.get_profile_summary('alice')['followers'] == 3
+    for name in ('users', 'repos', 'data_versions'):
+        monkeypatch.setattr(db, name, Unreachable())
+    assert db.get_profile_summary('alice')['followers'] == 3
+
+
+def test_local_write_evicts(db):
+    _add_user(db, 3)
+    db.get_profile_summary('alice')
+    _add_user(db, 4)
+    db.mark_changed('alice')
+    assert db.get_profile_summary('alice')['followers'] == 4
+
+
+def test_watcher_push_evicts_after_another_process_writes(db):
+    _add_user(db, 3)
+    db.get_profile_summary('alice')
+
+    watcher = VersionWatcher(db, poll_interval=0.01)
+    watcher.subscribe(lambda username, version: db.invalidate_profile(username))
+    watcher.start()
+    try:
+        # Another replica's write: the data and its version change, this process's cache is untouched
+        _add_user(db, 4)
+        db.data_versions.update_one(
+            {'username': 'alice'}, {'$inc': {'version': 1}, '$currentDate': {'updated_at': True}}, upsert=True
+        )
+        deadline = time.monotonic() + 5
+        while db.get_profile_summary('alice')['followers'] != 4 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert db.get_profile_summary('alice')['followers'] == 4
+    finally:
+        watcher.stop()
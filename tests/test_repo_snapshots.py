@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from records import RepoRecord
+from repo_snapshots import RepoSnapshots
+
+
+def _record(snapshots, day, **stars):
+    snapshots.record([RepoRecord('alice', name, stars=count) for name, count in stars.items()], day=day)
+
+
+def test_unchanged_days_store_nothing(db):
+    snapshots = RepoSnapshots(db, 'alice')
+    for day in range(1, 6):
+        _record(snapshots, datetime(2024, 1, day), web=10)
+    _record(snapshots, datetime(2024, 1, 6), web=12)
+
+    doc = db.repo_metrics.find_one({'repo': 'web'})
+    assert doc['changes'] == [[6, 2, 0, 0, 0]]
+    history = snapshots.history()
+    assert list(history['stars']) == [10, 12]
+    assert list(history['date']) == [datetime(2024, 1, 1), datetime(2024, 1, 6)]
+
+
+def test_history_spans_monthly_buckets(db):
+    snapshots = RepoSnapshots(db, 'alice')
+    _record(snapshots, datetime(2024, 1, 20), web=10)
+    _record(snapshots, datetime(2024, 2, 3), web=15)
+    _record(snapshots, datetime(2024, 2, 9), web=15)
+
+    assert db.repo_metrics.count_documents({'repo': 'web'}) == 2
+    history = snapshots.history(start=datetime(2024, 2, 1))
+    assert list(zip(history['date'], history['stars'])) == [
+        (datetime(2024, 2, 1), 10), (datetime(2024, 2, 3), 15), (datetime(2024, 2, 9), 15),
+    ]
+
+
+def test_gains_over_window(db):
+    snapshots = RepoSnapshots(db, 'alice')
+    _record(snapshots, datetime(2024, 1, 1), web=10)
+    _record(snapshots, datetime(2024, 1, 10), web=20)
+    _record(snapshots, datetime(2024, 1, 25), web=50, cli=3)
+    _record(snapshots, datetime(2024, 1, 30), web=55, cli=8)
+
+    gains = snapshots.gains(7, now=datetime(2024, 1, 31)).set_index('repo')
+    assert gains.loc['web', 'stars'] == 35
+    assert gains.loc['web', 'days'] == 7
+    # First seen inside the window: counted from its first snapshot
+    assert gains.loc['cli', 'stars'] == 5
+    assert gains.loc['cli', 'days'] == 6
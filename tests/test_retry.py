@@ -0,0 +1,56 @@
+import time
+from types import SimpleNamespace
+from retry import CircuitBreaker, RetryPolicy, breaker_for, reset_breakers, server_wait
+
+
+def _response(status, **headers):
+    return SimpleNamespace(status_code=status, headers=headers)
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    assert all(0 <= policy.backoff(attempt) <= 4.0 for attempt in range(10))
+
+
+def test_retryable_statuses():
+    policy = RetryPolicy()
+    assert policy.is_retryable(_response(503))
+    assert policy.is_retryable(_response(403, **{'Retry-After': '5'}))
+    assert policy.is_retryable(_response(403, **{'X-RateLimit-Remaining': '0'}))
+    assert not policy.is_retryable(_response(403))
+    assert not policy.is_retryable(_response(404))
+
+
+def test_server_wait():
+    assert server_wait(_response(429, **{'Retry-After': '7'})) == 7.0
+    assert server_wait(_response(429, **{'Retry-After': 'not a date'})) is None
+    reset = str(int(time.time()) + 100)
+    assert 90 < server_wait(_response(403, **{'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': reset})) <= 100
+    assert server_wait(_response(500)) is None
+
+
+def test_delay_for_gives_up_on_long_waits():
+    policy = RetryPolicy(max_wait=60)
+    assert policy.delay_for(_response(429, **{'Retry-After': '30'}), 0) == 30.0
+    assert policy.delay_for(_response(429, **{'Retry-After': '600'}), 0) is None
+
+
+def test_circuit_breaker_opens_and_probes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    time.sleep(0.06)
+    # One probe in half-open, then closed again once it succeeds
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_breakers_are_per_host():
+    reset_breakers()
+    assert breaker_for('https://api.github.com/users/a') is breaker_for('https://api.github.com/repos/b')
+    assert breaker_for('https://api.github.com/x') is not breaker_for('http://localhost:8080/x')
+    reset_breakers()
@@ -0,0 +1,38 @@
+from sessions import SESSION_COLUMNS, detect_sessions
+
+
+def test_no_activity():
+    sessions = detect_sessions([], [])
+    assert sessions.empty
+    assert list(sessions.columns) == SESSION_COLUMNS
+
+
+def test_split_on_gaps():
+    commits = ['2024-03-01T09:00:00Z', '2024-03-01T09:30:00Z', '2024-03-01T14:00:00Z']
+    events = ['2024-03-01T10:00:00Z']
+    sessions = detect_sessions(commits, events, gap_minutes=90)
+
+    assert sessions['size'].tolist() == [3, 1]
+    assert sessions['commits'].tolist() == [2, 1]
+    assert sessions['duration_minutes'].tolist() == [60, 0]
+    assert str(sessions['start'].iloc[0]) == '2024-03-01 09:00:00'
+    assert str(sessions['end'].iloc[0]) == '2024-03-01 10:00:00'
+
+
+def test_gap_boundary_is_inclusive():
+    # Exactly gap_minutes apart still belongs to the same session
+    sessions = detect_sessions(['2024-03-01T09:00:00Z', '2024-03-01T10:30:00Z'], gap_minutes=90)
+    assert sessions['size'].tolist() == [2]
+
+
+def test_intensity_floors_short_sessions():
+    sessions = detect_sessions(['2024-03-01T09:00:00Z'])
+    # One action over the 15 minute floor
+    assert sessions['intensity'].tolist() == [4.0]
+
+
+def test_accepts_datetimes_and_skips_missing():
+    from datetime import datetime
+
+    sessions = detect_sessions([datetime(2024, 3, 1, 9), None, datetime(2024, 3, 1, 9, 10)])
+    assert sessions['size'].tolist() == [2]
@@ -0,0 +1,52 @@
+import pytest
+from sketches import HyperLogLog, QuantileSketch, UserSketches
+
+
+def test_hll_small_counts_are_exact_enough():
+    assert HyperLogLog().count() == 0
+    assert HyperLogLog().add(['a', 'b', 'a', None]).count() == 2
+
+
+def test_hll_estimate_and_merge():
+    left = HyperLogLog().add(range(0, 30000))
+    right = HyperLogLog().add(range(20000, 50000))
+    assert left.count() == pytest.approx(30000, rel=0.05)
+    assert left.merge(right).count() == pytest.approx(50000, rel=0.05)
+
+
+def test_hll_document_round_trip():
+    sketch = HyperLogLog().add(range(1000))
+    assert HyperLogLog.from_document(sketch.to_document()).count() == sketch.count()
+
+
+def test_quantiles_within_accuracy():
+    values = list(range(1, 10001))
+    sketch = QuantileSketch().add(values)
+    for q, expected in zip((0.5, 0.9, 0.99), (5000, 9000, 9900)):
+        assert sketch.quantiles([q])[0] == pytest.approx(expected, rel=0.02)
+
+
+def test_quantiles_merge_and_zeros():
+    assert QuantileSketch().quantiles([0.5]) == [None]
+    merged = QuantileSketch().add([0, 0, 0]).merge(QuantileSketch().add([100]))
+    assert merged.total == 4
+    assert merged.quantiles([0.0, 1.0]) == [0.0, pytest.approx(100, rel=0.01)]
+
+
+def test_quantiles_document_round_trip():
+    sketch = QuantileSketch().add([0, 3, 50, 50, 700])
+    restored = QuantileSketch.from_document(sketch.to_document())
+    assert restored.quantiles([0.25, 0.5, 1.0]) == sketch.quantiles([0.25, 0.5, 1.0])
+
+
+def test_user_sketches_summary(db):
+    sketches = UserSketches(db)
+    sketches.add('alice', 'contributors', ['alice', 'bob'])
+    sketches.add('carol', 'contributors', ['bob', 'carol'])
+    sketches.replace_quantiles('alice', 'repo_size', [10, 20, 30])
+
+    summary = sketches.summary()
+    assert summary['distinct_contributors'] == 3
+    assert summary['distinct_repos_touched'] == 0
+    assert summary['repo_size_kb']['p50'] == pytest.approx(20, rel=0.01)
+    assert sketches.summary(['carol'])['repo_size_kb']['p50'] is None
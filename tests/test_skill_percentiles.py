@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+import pytest
+import skill_percentiles
+from skill_percentiles import MIN_POPULATION, RADAR_AXES, PercentileTables, skill_values
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    skill_percentiles.table_cache.clear()
+    yield
+    skill_percentiles.table_cache.clear()
+
+
+@pytest.fixture
+def population(db):
+    """MIN_POPULATION users whose Stars are 0, 10, 20, ..."""
+    for i in range(MIN_POPULATION):
+        db.users.insert_one({'username': f'u{i}', 'followers': i})
+        db.repos.insert_one({'username': f'u{i}', 'repo_name': 'r', 'is_fork': False, 'stars': 10 * i, 'forks': 0})
+    return db
+
+
+@pytest.fixture
+def no_background(monkeypatch):
+    """Record background refreshes instead of starting threads"""
+    started = []
+    monkeypatch.setattr(PercentileTables, '_refresh_in_background', lambda self: started.append(True))
+    return started
+
+
+def _hold_lease(db, minutes):
+    db.skill_percentiles.update_one(
+        {'_id': 'rebuild_lease'}, {'$set': {'until': datetime.utcnow() + timedelta(minutes=minutes)}}, upsert=True
+    )
+
+
+def test_percentiles_rank_against_population(population):
+    tables = PercentileTables(population)
+    tables.rebuild()
+    values = skill_values(population, 'u2')
+    assert values['Stars'] == 20
+    assert tables.percentiles(values)['Stars'] == 50.0
+    assert tables.percentiles(dict.fromkeys(RADAR_AXES, 10 ** 9))['Stars'] == 100.0
+
+
+def test_render_never_builds_a_missing_table(population, no_background):
+    tables = PercentileTables(population)
+    assert tables.percentiles(skill_values(population, 'u0')) is None
+    assert population.skill_percentiles.find_one({'_id': 'population'}) is None
+    assert no_background == [True]
+
+
+def test_stale_table_is_served_and_refreshed_in_background(population, no_background):
+    tables = PercentileTables(population)
+    tables.rebuild()
+    old = datetime.utcnow() - timedelta(hours=7)
+    population.skill_percentiles.update_one({'_id': 'population'}, {'$set': {'built_at': old}})
+    skill_percentiles.table_cache.clear()
+
+    assert tables.table()['built_at'] < datetime.utcnow() - timedelta(hours=6)
+    assert no_background == [True]
+
+
+def test_refresh_respects_the_lease(population):
+    tables = PercentileTables(population)
+    _hold_lease(population, 5)
+    assert tables.refresh() is None
+    assert population.skill_percentiles.find_one({'_id': 'population'}) is None
+
+    _hold_lease(population, -1)
+    assert tables.refresh()['users'] == MIN_POPULATION
+    # Released after the rebuild, and a fresh table is not rebuilt again
+    assert population.skill_percentiles.find_one({'_id': 'rebuild_lease'})['until'] < datetime.utcnow()
+    assert tables.refresh() is None
+
+
+def test_background_refresh_builds_the_table(population):
+    tables = PercentileTables(population)
+    assert tables.table() is None
+    # The refresh thread holds the lock until it finishes
+    assert skill_percentiles._refreshing.acquire(timeout=5)
+    skill_percentiles._refreshing.release()
+    assert tables.table()['users'] == MIN_POPULATION
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+from fetch_data import GitHubFetcher
+from records import RepoRecord
+from star_history import StarHistory, STARGAZERS_PER_PAGE
+
+
+def _fetcher(db, stars):
+    """GitHubFetcher serving `stars` stargazers of repo 'web' (one a day), recording the pages requested"""
+    fetcher = GitHubFetcher(db)
+    fetcher.pages = []
+    entries = [{'starred_at': f'2024-{1 + n // 28:02d}-{1 + n % 28:02d}T00:00:00Z'} for n in range(stars)]
+
+    def get(url, endpoint, headers=None):
+        page = int(parse_qs(urlparse(url).query)['page'][0])
+        fetcher.pages.append(page)
+        start = (page - 1) * STARGAZERS_PER_PAGE
+        return SimpleNamespace(status_code=200, json=lambda: entries[start:start + STARGAZERS_PER_PAGE])
+    fetcher._get = get
+    return fetcher
+
+
+def _fetch(db, stars):
+    fetcher = _fetcher(db, stars)
+    added = fetcher.fetch_stargazers('alice', [RepoRecord('alice', 'web', stars=stars)])
+    return added, fetcher.pages
+
+
+def _total(db):
+    return int(StarHistory(db, 'alice').daily()['stars'].sum())
+
+
+def test_refresh_resumes_on_the_last_page(db):
+    assert _fetch(db, 150) == (150, [1, 2])
+    assert StarHistory(db, 'alice').progress()['web']['page'] == 2
+
+    # Only the partial last page is read again, and its first 50 entries are skipped
+    assert _fetch(db, 160) == (10, [2])
+    assert _fetch(db, 160) == (0, [])
+    assert _total(db) == 160
+
+
+def test_full_last_page_moves_on(db):
+    # Only an empty third page shows the second one was the last
+    assert _fetch(db, 200) == (200, [1, 2, 3])
+    assert _fetch(db, 205) == (5, [3])
+    assert _total(db) == 205
+
+
+def test_unstarred_repo_is_reread_from_the_first_page(db):
+    _fetch(db, 150)
+    assert _fetch(db, 120) == (120, [1, 2])
+    assert _total(db) == 120
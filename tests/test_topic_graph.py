@@ -0,0 +1,50 @@
+from api import AnalyticsService
+from topic_graph import TopicGraph
+
+DOCS = [
+    {'username': 'alice', 'repo': 'web', 'topics': ['python', 'django', 'web']},
+    {'username': 'alice', 'repo': 'api', 'topics': ['python', 'django']},
+    {'username': 'bob', 'repo': 'cli', 'topics': ['rust', 'cli']},
+    {'username': 'bob', 'repo': 'lib', 'topics': ['python']},
+]
+
+
+def _edges(graph):
+    i, j, w = graph.cooccurrence()
+    return {(graph.topics[a], graph.topics[b]): int(c) for a, b, c in zip(i, j, w)}
+
+
+def test_cooccurrence_counts_shared_repos():
+    graph = TopicGraph.from_documents(DOCS)
+    assert _edges(graph) == {
+        ('django', 'python'): 2, ('django', 'web'): 1, ('python', 'web'): 1, ('cli', 'rust'): 1,
+    }
+    assert dict(zip(graph.topics, graph.counts())) == {'cli': 1, 'django': 2, 'python': 3, 'rust': 1, 'web': 1}
+
+
+def test_network_clusters_and_min_weight():
+    network = TopicGraph.from_documents(DOCS).to_dict()
+    cluster = {t['topic']: t['cluster'] for t in network['topics']}
+    assert network['topics'][0] == {'topic': 'python', 'repos': 3, 'cluster': cluster['python']}
+    assert cluster['python'] == cluster['django'] == cluster['web'] != cluster['rust'] == cluster['cli']
+    assert network['links'][0] == {'source': 'django', 'target': 'python', 'repos': 2}
+
+    strong = TopicGraph.from_documents(DOCS).to_dict(max_edges=10, min_weight=2)
+    assert strong['links'] == [{'source': 'django', 'target': 'python', 'repos': 2}]
+
+
+def test_org_topics_span_users(db):
+    db.topics.insert_many([dict(doc) for doc in DOCS])
+    db.users.insert_many([{'username': 'alice'}, {'username': 'bob'}])
+    service = AnalyticsService(db, max_workers=1)
+    try:
+        everyone = service.topic_network([], 40, 120, 1)
+        assert everyone['users'] == 2
+        assert {t['topic'] for t in everyone['topics']} == {'python', 'django', 'web', 'rust', 'cli'}
+
+        alice = service.topic_network(['alice'], 2, 120, 1)
+        assert alice['users'] == 1
+        assert [t['topic'] for t in alice['topics']] == ['django', 'python']
+        assert alice['links'] == [{'source': 'django', 'target': 'python', 'repos': 2}]
+    finally:
+        service.close()
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from records import RepoRecord
+from repo_snapshots import RepoSnapshots, _today
+from trending import TrendingRanking
+
+
+def _seed(db, username, gains):
+    """Snapshots giving each repo its star gain over the last ten days"""
+    snapshots = RepoSnapshots(db, username)
+    snapshots.record([RepoRecord(username, repo) for repo in gains], day=_today() - timedelta(days=10))
+    snapshots.record([RepoRecord(username, repo, stars=gain) for repo, gain in gains.items()])
+
+
+def _ranked(entries):
+    return [(e['username'], e['repo'], e['gain']) for e in entries]
+
+
+def test_store_rejects_stale_version(db):
+    ranking = TrendingRanking(db)
+    assert ranking._store('stars', [{'username': 'a', 'repo': 'r', 'gain': 1}], 0)
+    assert not ranking._store('stars', [], 0)
+    assert ranking._read('stars') == ([{'username': 'a', 'repo': 'r', 'gain': 1}], 1)
+    assert ranking._store('stars', [], 1)
+    assert ranking._read('stars') == ([], 2)
+
+
+def test_concurrent_ingest_retries_instead_of_overwriting(db):
+    _seed(db, 'alice', {'a1': 50, 'a2': 5})
+    _seed(db, 'bob', {'b1': 30})
+    ranking = TrendingRanking(db, k=3)
+    store = ranking._store
+    interleaved = []
+
+    def racing_store(metric, entries, version):
+        # Bob's ingest lands between Alice's read and her write, once
+        if metric == 'stars' and not interleaved:
+            interleaved.append(version)
+            TrendingRanking(db, k=3).update_user('bob')
+        return store(metric, entries, version)
+
+    ranking._store = racing_store
+    ranking.update_user('alice')
+
+    expected = [('alice', 'a1', 50), ('bob', 'b1', 30), ('alice', 'a2', 5)]
+    assert _ranked(ranking.leaderboard('stars')) == expected
+    # Alice's first write, computed at version 0, lost to Bob's and was redone
+    assert interleaved == [0] and ranking._read('stars')[1] == 2
+    assert _ranked(TrendingRanking(db, k=3).rebuild('stars')) == expected
+
+
+def test_falling_out_of_a_full_list_rebuilds(db):
+    _seed(db, 'alice', {'a1': 50, 'a2': 40})
+    _seed(db, 'bob', {'b1': 30, 'b2': 20})
+    ranking = TrendingRanking(db, k=2)
+    ranking.update_user('bob')
+    assert ranking.update_user('alice') == []
+    assert _ranked(ranking.leaderboard('stars')) == [('alice', 'a1', 50), ('alice', 'a2', 40)]
+
+    # Alice's repos no longer gain: only a rebuild can bring Bob's back
+    db.repo_metrics.delete_many({'username': 'alice'})
+    _seed(db, 'alice', {'a1': 0, 'a2': 0})
+    assert ranking.update_user('alice') == ['stars']
+    assert _ranked(ranking.leaderboard('stars')) == [('bob', 'b1', 30), ('bob', 'b2', 20)]
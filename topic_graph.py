@@ -0,0 +1,135 @@
+from cache import TTLCache
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Topic graphs per (users, repos, data versions); a refresh bumps the version and misses
+graph_cache = TTLCache(maxsize=256, ttl=3600)
+# Topics drawn and strongest links kept in the network chart and the org API
+TOPIC_NETWORK_NODES = 40
+TOPIC_NETWORK_EDGES = 120
+
+
+class TopicGraph:
+    """Topic co-occurrence over a sparse repo × topic incidence matrix
+
+    The matrix is kept as parallel (repo, topic) index arrays sorted by repo.
+    Co-occurrence (AᵀA off the diagonal) pairs every entry with the later
+    entries of the same repo by array offsets, and the pair codes are
+    counted with one np.unique, so no Python loop runs per repo or topic.
+    """
+
+    def __init__(self, topics, repo_index, topic_index):
+        self.topics = topics
+        self.repo_index = repo_index
+        self.topic_index = topic_index
+        self._edges = None
+
+    @classmethod
+    def from_documents(cls, docs):
+        """Build from topics documents ({'username', 'repo', 'topics'}), one repo each"""
+        repo_index, names = [], []
+        for number, doc in enumerate(docs):
+            topics = list(dict.fromkeys(doc.get('topics') or []))
+            repo_index.extend([number] * len(topics))
+            names.extend(topics)
+        if not names:
+            return cls(np.array([], dtype=object), np.zeros(0, dtype='int64'), np.zeros(0, dtype='int64'))
+
+        topics, topic_index = np.unique(np.array(names, dtype=object), return_inverse=True)
+        return cls(topics, np.array(repo_index, dtype='int64'), topic_index.astype('int64'))
+
+    @classmethod
+    def load(cls, db, usernames, repo_names=None, versions=None):
+        """Graph over the topics of one or more users (an org), cached per data versions"""
+        usernames = sorted([usernames] if isinstance(usernames, str) else usernames)
+        key = None
+        if versions is not None:
+            key = (tuple(usernames), tuple(sorted(repo_names)) if repo_names is not None else None, tuple(versions))
+            cached = graph_cache.get(key)
+            if cached is not None:
+                return cached
+
+        query = {'username': {'$in': usernames}}
+        if repo_names is not None:
+            query['repo'] = {'$in': list(repo_names)}
+        graph = cls.from_documents(db.topics.find(query, {'_id': 0, 'username': 1, 'repo': 1, 'topics': 1}))
+        if key is not None:
+            graph_cache.set(key, graph)
+        return graph
+
+    def counts(self):
+        """Repos tagged with each topic (the diagonal of AᵀA)"""
+        return np.bincount(self.topic_index, minlength=len(self.topics))
+
+    def cooccurrence(self):
+        """Sparse upper triangle of AᵀA as (topic i, topic j, repos with both) arrays, i < j"""
+        if self._edges is not None:
+            return self._edges
+        n = self.repo_index.size
+        if n == 0:
+            self._edges = (np.zeros(0, dtype='int64'),) * 3
+            return self._edges
+
+        # Each entry pairs with the entries after it in the same repo
+        starts = np.flatnonzero(np.r_[True, self.repo_index[1:] != self.repo_index[:-1]])
+        ends = np.r_[starts[1:], n]
+        group_end = np.repeat(ends, ends - starts)
+        later = group_end - np.arange(n) - 1
+        first = np.repeat(np.arange(n), later)
+        # Offset of each pair within its entry's run: 1, 2, ... later[i]
+        runs = np.cumsum(later) - later
+        second = first + np.arange(first.size) - np.repeat(runs, later) + 1
+
+        a, b = self.topic_index[first], self.topic_index[second]
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        codes, weights = np.unique(lo * len(self.topics) + hi, return_counts=True)
+        self._edges = (codes // len(self.topics), codes % len(self.topics), weights)
+        return self._edges
+
+    def top(self, n):
+        """Indices of the n most used topics, most used first"""
+        counts = self.counts()
+        return np.argsort(-counts, kind='stable')[:n]
+
+    def subgraph(self, nodes, min_weight=1):
+        """Edges among nodes (topic indices) with at least min_weight shared repos, re-indexed to positions in nodes"""
+        i, j, w = self.cooccurrence()
+        position = np.full(len(self.topics), -1, dtype='int64')
+        position[nodes] = np.arange(len(nodes))
+        keep = (position[i] >= 0) & (position[j] >= 0) & (w >= min_weight)
+        return position[i[keep]], position[j[keep]], w[keep]
+
+    def network(self, max_topics=TOPIC_NETWORK_NODES, max_edges=TOPIC_NETWORK_EDGES, min_weight=1):
+        """Most used topics with their strongest links, as (nodes, i, j, weights, cluster per node)"""
+        nodes = self.top(max_topics)
+        i, j, weights = self.subgraph(nodes, min_weight)
+        strongest = np.argsort(-weights, kind='stable')[:max_edges]
+        i, j, weights = i[strongest], j[strongest], weights[strongest]
+        return nodes, i, j, weights, self.clusters(len(nodes), i, j)
+
+    def to_dict(self, max_topics=TOPIC_NETWORK_NODES, max_edges=TOPIC_NETWORK_EDGES, min_weight=1):
+        """JSON-ready network: topics with repo counts and cluster, links by topic name"""
+        nodes, i, j, weights, cluster = self.network(max_topics, max_edges, min_weight)
+        names = [str(t) for t in self.topics[nodes]]
+        counts = self.counts()[nodes]
+        return {
+            'topics': [{'topic': name, 'repos': int(count), 'cluster': int(c)}
+                       for name, count, c in zip(names, counts, cluster)],
+            'links': [{'source': names[a], 'target': names[b], 'repos': int(w)}
+                      for a, b, w in zip(i, j, weights)],
+        }
+
+    @staticmethod
+    def clusters(n_nodes, i, j):
+        """Connected-component label per node, by vectorized min-label propagation"""
+        labels = np.arange(n_nodes)
+        while True:
+            updated = labels.copy()
+            np.minimum.at(updated, i, labels[j])
+            np.minimum.at(updated, j, labels[i])
+            # Jump to the label's own label so long chains collapse quickly
+            updated = updated[updated]
+            if np.array_equal(updated, labels):
+                return np.unique(labels, return_inverse=True)[1]
+            labels = updated
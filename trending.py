@@ -0,0 +1,107 @@
+import heapq
+from datetime import datetime
+from itertools import islice
+from lazy import lazy_import
+from repo_snapshots import RepoSnapshots
+
+pymongo = lazy_import('pymongo')
+
+# Leaderboard length, and the window velocities are measured over
+TRENDING_K = 100
+TRENDING_WINDOW_DAYS = 30
+TRENDING_METRICS = ('stars', 'forks')
+
+
+def _rank(entry):
+    return (-entry['gain'], entry['username'], entry['repo'])
+
+
+class TrendingRanking:
+    """Fleet-wide top-K repos by star and fork velocity (trending, trending_users collections)
+
+    At ingest a user's own top K is recomputed from their repo snapshots
+    and merged into the materialized global list with a heap. Only when the
+    user's repos fell far enough to leave empty places, which entries that
+    never made the list could fill, is the list rebuilt by heap-merging
+    every user's top K. Reading the leaderboard is a single document fetch.
+    Each list carries a version, and writes are compare-and-set against the
+    version they were computed from, so parallel ingests retry instead of
+    overwriting each other's entries.
+    """
+
+    def __init__(self, db, k=TRENDING_K, window=TRENDING_WINDOW_DAYS):
+        self.db = db
+        self.k = k
+        self.window = window
+
+    def _user_top(self, username):
+        """metric -> the user's repos with a positive gain over the window, best first"""
+        gains = RepoSnapshots(self.db, username).gains(self.window)
+        top = {}
+        for metric in TRENDING_METRICS:
+            rows = gains[gains[metric] > 0]
+            entries = [
+                {'username': username, 'repo': repo, 'gain': int(gain)}
+                for repo, gain in zip(rows['repo'], rows[metric])
+            ]
+            top[metric] = heapq.nsmallest(self.k, entries, key=_rank)
+        return top
+
+    def _read(self, metric):
+        """The stored list and the version it was read at (0 before the first write)"""
+        doc = self.db.trending.find_one({'_id': metric}, {'entries': 1, 'version': 1})
+        return (doc['entries'], doc.get('version', 0)) if doc else ([], 0)
+
+    def leaderboard(self, metric, limit=None):
+        """The materialized top K for a metric, best first"""
+        entries = self._read(metric)[0]
+        return entries[:limit] if limit else entries
+
+    def _store(self, metric, entries, version):
+        """Write the list if it is still at version; False when another ingest wrote first"""
+        # A list stored before versions were kept counts as version 0
+        expected = version if version else {'$in': [0, None]}
+        try:
+            self.db.trending.update_one(
+                {'_id': metric, 'version': expected},
+                {'$set': {'entries': entries, 'updated_at': datetime.utcnow()}, '$inc': {'version': 1}},
+                upsert=True
+            )
+        except pymongo.errors.DuplicateKeyError:
+            # No match at that version, and the upsert collided with the newer list
+            return False
+        return True
+
+    def update_user(self, username):
+        """Refresh one user's entries after an ingest; returns the metrics that needed a full rebuild"""
+        top = self._user_top(username)
+        rebuilt = []
+        for metric, entries in top.items():
+            self.db.trending_users.replace_one(
+                {'metric': metric, 'username': username},
+                {'metric': metric, 'username': username, 'entries': entries},
+                upsert=True
+            )
+            while True:
+                current, version = self._read(metric)
+                others = [e for e in current if e['username'] != username]
+                merged = heapq.nsmallest(self.k, others + entries, key=_rank)
+                # Entries left off a full list all rank below its last one; they can
+                # only belong in the new list if it is short or its tail fell below that
+                full = len(current) >= self.k
+                if full and (len(merged) < self.k or _rank(merged[-1]) > _rank(current[-1])):
+                    self.rebuild(metric)
+                    rebuilt.append(metric)
+                    break
+                if self._store(metric, merged, version):
+                    break
+        return rebuilt
+
+    def rebuild(self, metric):
+        """Recompute the global list by heap-merging every user's sorted top K"""
+        while True:
+            version = self._read(metric)[1]
+            lists = [doc['entries'] for doc in self.db.trending_users.find({'metric': metric}, {'entries': 1})]
+            entries = list(islice(heapq.merge(*lists, key=_rank), self.k))
+            if self._store(metric, entries, version):
+                return entries
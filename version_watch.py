@@ -0,0 +1,96 @@
+import threading
+from lazy import lazy_import
+
+pymongo = lazy_import('pymongo')
+
+# Seconds between polls of data_versions when change streams aren't available
+POLL_INTERVAL = 2.0
+
+
+class VersionWatcher:
+    """Latest data version of every user, pushed from the data_versions collection
+
+    Follows a change stream when the server supports them (replica sets,
+    Atlas) and otherwise polls for versions updated since the last poll.
+    Subscribers are called with (username, version) as soon as a write is
+    seen, so caches keyed on the version invalidate immediately.
+    """
+
+    def __init__(self, db, poll_interval=POLL_INTERVAL):
+        self.db = db
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._versions = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='version-watch', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def version(self, username):
+        """Last seen version of a user, read from the database the first time"""
+        with self._lock:
+            known = self._versions.get(username)
+        if known is not None:
+            return known
+        self._update(username, self.db.data_version(username))
+        with self._lock:
+            return self._versions[username]
+
+    def _update(self, username, version):
+        with self._lock:
+            if version <= self._versions.get(username, -1):
+                return
+            self._versions[username] = version
+        for callback in self._subscribers:
+            callback(username, version)
+
+    def _load(self, since=None):
+        """Apply versions updated since a time (all of them for None); returns the newest updated_at"""
+        query = {'updated_at': {'$gte': since}} if since else {}
+        for doc in self.db.data_versions.find(query, {'_id': 0}).sort('updated_at', pymongo.ASCENDING):
+            self._update(doc['username'], doc['version'])
+            since = doc['updated_at']
+        return since
+
+    def _run(self):
+        try:
+            self._watch()
+        except Exception as e:
+            # Standalone servers (and stream errors later on) fall back to polling
+            print(f"Change streams unavailable ({e}), polling data versions every {self.poll_interval}s")
+            self._poll()
+
+    def _watch(self):
+        pipeline = [{'$match': {'operationType': {'$in': ['insert', 'update', 'replace']}}}]
+        with self.db.data_versions.watch(pipeline, full_document='updateLookup', max_await_time_ms=500) as stream:
+            self.mode = 'change_stream'
+            # Stream opened first, so nothing written during the initial load is missed
+            self._load()
+            while not self._stop.is_set():
+                change = stream.try_next()
+                doc = change and change.get('fullDocument')
+                if doc:
+                    self._update(doc['username'], doc['version'])
+
+    def _poll(self):
+        self.mode = 'poll'
+        since = None
+        while not self._stop.is_set():
+            try:
+                since = self._load(since)
+            except pymongo.errors.PyMongoError as e:
+                print(f"Error polling data versions: {str(e)}")
+            self._stop.wait(self.poll_interval)
@@ -1,16 +1,34 @@
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-from db import Database
+import logging
+from lazy import lazy_import
 from preprocess import DataPreprocessor
+from commit_series import DailyCommitSeries, rolling_from_timestamps
+from calendar_grid import ContributionCalendar, WEEKDAY_LABELS
+from star_history import StarHistory
+from repo_snapshots import RepoSnapshots
+from filters import DataFilters, TIME_RANGES
+from topic_graph import TOPIC_NETWORK_NODES, TOPIC_NETWORK_EDGES
+from skill_percentiles import PercentileTables, RADAR_AXES, skill_values
+from metrics import metrics, timed_chart
+from figure_cache import cached_chart
+
+# Heavy chart dependencies load on the first chart, not at import
+go = lazy_import('plotly.graph_objects')
+px = lazy_import('plotly.express')
+subplots = lazy_import('plotly.subplots')
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
 
 def get_now():
     """Get current datetime without timezone info"""
     return pd.Timestamp.now().tz_localize(None)
 
+# Radar score per unit of each axis when too few users are tracked for percentiles
+RADAR_FIXED_SCALES = {'Stars': 0.1, 'Forks': 0.2, 'Repos': 5, 'Commits': 0.1, 'Languages': 10, 'Followers': 0.5}
+# Largest coding sessions marked on the sessions chart
+PEAK_SESSIONS = 5
+
 LANGUAGE_COLORS = {
     'Python': '#3776ab', 'JavaScript': '#f7df1e', 'TypeScript': '#3178c6',
     'Java': '#b07219', 'C++': '#f34b7d', 'C': '#555555', 'C#': '#178600',
@@ -20,28 +38,83 @@ LANGUAGE_COLORS = {
 }
 
 class Visualizations:
-    def __init__(self, db, username):
+    def __init__(self, db, username, filters=None, figure_cache=None, data_version=None):
         self.db = db
         self.username = username
-        self.preprocessor = DataPreprocessor(db, username)
+        self.filters = filters or DataFilters()
+        self.preprocessor = DataPreprocessor(db, username, self.filters)
+        # Shared FigureCache, or None to always build
+        self.figure_cache = figure_cache
+        self._data_version = data_version
+    
+    @property
+    def data_version(self):
+        """The user's data version, read once per instance"""
+        if self._data_version is None:
+            self._data_version = self.db.data_version(self.username)
+        return self._data_version
+    
+    def figure_key(self, chart, args=(), kwargs=None):
+        return self.figure_cache.key(self.username, chart, self.filters, self.data_version, args, kwargs)
+    
+    def chart_json(self, chart):
+        """A chart's figure JSON (b'null' without data), served as stored when the figure cache has it"""
+        if self.figure_cache is None or not getattr(getattr(type(self), chart), 'figure_cached', False):
+            fig = getattr(self, chart)()
+            return fig.to_json().encode('utf-8') if fig is not None else b'null'
+        key = self.figure_key(chart)
+        body = self.figure_cache.get_json(key)
+        if body is None:
+            # Build past the @cached_chart lookup that just missed
+            fig = getattr(type(self), chart).__wrapped__(self)
+            body = self.figure_cache.set(key, fig, self.username, chart)
+        return body
+    
+    def _star_history(self, repos):
+        """Cumulative stars per day for the given repos from stargazer timestamps, or None before they're fetched"""
+        history = StarHistory(self.db, self.username)
+        if not history.has_data():
+            return None
+        daily = history.daily(list(repos['repo_name']))
+        if daily.empty:
+            return None
+        if self.filters.since:
+            daily = daily[daily['date'] >= pd.Timestamp(self.filters.since)]
+        return daily
+    
+    def _star_gains(self, repos):
+        """Stars and forks gained per repo over the selected window (30 days for all time) from
+        the metric snapshots, or None until they cover at least a day"""
+        window = TIME_RANGES[self.filters.time_range] or 30
+        gains = RepoSnapshots(self.db, self.username).gains(window, list(repos['repo_name']))
+        if gains.empty or not (gains['days'] > 0).any():
+            return None
+        return window, gains
     
     # ========== OVERVIEW SECTION ==========
     
+    @cached_chart
+    @timed_chart
     def overview_star_growth_line(self):
         """Line Chart: Star Growth Over Time"""
         df = self.preprocessor.get_clean_repos()
         if df.empty:
             return None
         
-        df['created_at'] = pd.to_datetime(df['created_at'])
-        df = df.sort_values('created_at')
-        df['cumulative_stars'] = df['stars'].cumsum()
+        daily = self._star_history(df)
+        if daily is not None:
+            x, y, mode = daily['date'], daily['cumulative'], 'lines'
+        else:
+            # Stargazers not fetched yet: today's stars stacked by repo creation date
+            df['created_at'] = pd.to_datetime(df['created_at'])
+            df = df.sort_values('created_at')
+            x, y, mode = df['created_at'], df['stars'].cumsum(), 'lines+markers'
         
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=df['created_at'], 
-            y=df['cumulative_stars'],
-            mode='lines+markers',
+            x=x, 
+            y=y,
+            mode=mode,
             line=dict(color='#e94560', width=3),
             marker=dict(size=8),
             fill='tozeroy',
@@ -61,9 +134,11 @@ class Visualizations:
         return fig
 
     
+    @cached_chart
+    @timed_chart
     def overview_monthly_commits_bar(self):
         """Simple Bar Chart: Monthly Commits"""
-        commits = list(self.db.commits.find({'username': self.username}))
+        commits = self.preprocessor.get_commits()
         if not commits:
             return None
         
@@ -89,33 +164,56 @@ class Visualizations:
         )
         return fig
     
-    def overview_contribution_calendar(self):
-        """Calendar Heatmap: Contribution Calendar"""
-        commits = list(self.db.commits.find({'username': self.username}))
-        if not commits:
-            return None
-        
-        df = pd.DataFrame(commits)
-        df['date'] = pd.to_datetime(df['commit_timestamp']).dt.date
-        daily_commits = df.groupby('date').size().reset_index(name='commits')
-        daily_commits['date'] = pd.to_datetime(daily_commits['date'])
-        daily_commits['week'] = daily_commits['date'].dt.isocalendar().week
-        daily_commits['day_of_week'] = daily_commits['date'].dt.dayofweek
-        
-        # Aggregate by week and day to handle duplicates
-        weekly_commits = daily_commits.groupby(['day_of_week', 'week'])['commits'].sum().reset_index()
-        pivot = weekly_commits.pivot(index='day_of_week', columns='week', values='commits').fillna(0)
+    @cached_chart
+    @timed_chart
+    def overview_contribution_calendar(self, max_years=5):
+        """Calendar Heatmap: Contribution Calendar, one row per year for comparison"""
+        if self.filters.languages or self.filters.repos:
+            commits = self.preprocessor.get_commits()
+            calendar = ContributionCalendar.from_timestamps(c.get('commit_timestamp') for c in commits)
+        else:
+            series = DailyCommitSeries(self.db, self.username)
+            if series.is_empty() and not series.rebuild():
+                return None
+            daily = series.daily_counts(start=self.filters.since)
+            if daily.empty:
+                return None
+            calendar = ContributionCalendar.from_days(daily['date'].values.astype('datetime64[D]'),
+                                                      daily['commits'].values)
         
-        fig = go.Figure(data=go.Heatmap(
-            z=pivot.values,
-            colorscale='Reds',
-            showscale=True
-        ))
+        if not calendar.grid.any():
+            return None
         
+        calendar = calendar.recent(max_years)
+        totals = calendar.totals()
+        rows = len(calendar.years)
+        # Most recent year on top
+        order = list(reversed(range(rows)))
+        fig = subplots.make_subplots(
+            rows=rows, cols=1, shared_xaxes=True, vertical_spacing=0.25 / rows,
+            subplot_titles=[f"{calendar.years[i]} · {int(totals[i])} commits" for i in order]
+        )
+        zmax = calendar.grid.max()
+        for row, index in enumerate(order, start=1):
+            fig.add_trace(go.Heatmap(
+                z=calendar.year_matrix(index),
+                x=list(range(1, 54)),
+                y=WEEKDAY_LABELS,
+                customdata=calendar.year_dates(index),
+                hovertemplate='%{customdata}: %{z} commits<extra></extra>',
+                colorscale='Reds',
+                zmin=0,
+                zmax=zmax,
+                showscale=row == 1,
+                xgap=2,
+                ygap=2
+            ), row=row, col=1)
+            fig.update_yaxes(autorange='reversed', row=row, col=1)
+        
+        fig.update_xaxes(title_text='Week of Year', row=rows, col=1)
         fig.update_layout(
             title='Contribution Calendar',
-            xaxis_title='Week of Year',
-            yaxis_title='Day of Week',
+            height=120 + 170 * rows,
             template='plotly_white',
             paper_bgcolor='rgba(0,0,0,0)',
             plot_bgcolor='rgba(0,0,0,0)'
@@ -125,6 +223,7 @@ class Visualizations:
     
     # ========== REPOSITORIES SECTION ==========
     
+    @timed_chart
     def repo_leaderboard_table(self):
         """Leaderboard Table: Top Repos"""
         df = self.preprocessor.get_clean_repos()
@@ -141,6 +240,8 @@ class Visualizations:
             'size': df.nlargest(10, 'size')[['repo_name', 'size', 'language']]
         }
     
+    @cached_chart
+    @timed_chart
     def repo_size_histogram(self):
         """Histogram: Repository Size Distribution"""
         df = self.preprocessor.get_clean_repos()
@@ -161,22 +262,15 @@ class Visualizations:
         )
         return fig
     
+    @cached_chart
+    @timed_chart
     def repo_topics_treemap(self):
         """Treemap: Repository Topics"""
-        topics_data = list(self.db.topics.find({'username': self.username}))
-        if not topics_data:
-            return None
-        
-        topic_list = []
-        for item in topics_data:
-            for topic in item['topics']:
-                topic_list.append({'topic': topic, 'repo': item['repo']})
-        
-        if not topic_list:
+        graph = self.preprocessor.topic_graph()
+        if not len(graph.topics):
             return None
         
-        df = pd.DataFrame(topic_list)
-        topic_counts = df.groupby('topic').size().reset_index(name='count')
+        topic_counts = pd.DataFrame({'topic': graph.topics, 'count': graph.counts()})
         
         fig = px.treemap(
             topic_counts,
@@ -192,21 +286,68 @@ class Visualizations:
             plot_bgcolor='rgba(0,0,0,0)'
         )
         return fig
+    
+    @cached_chart
+    @timed_chart
+    def repo_topics_network(self, max_topics=TOPIC_NETWORK_NODES, max_edges=TOPIC_NETWORK_EDGES):
+        """Network: Topic Co-occurrence Clusters"""
+        graph = self.preprocessor.topic_graph()
+        nodes, i, j, weights, cluster = graph.network(max_topics, max_edges)
+        if len(nodes) < 2 or not len(weights):
+            return None
+        
+        # Circle layout with each cluster on one arc
+        order = np.lexsort((np.arange(len(nodes)), cluster))
+        angle = np.empty(len(nodes))
+        angle[order] = np.linspace(0, 2 * np.pi, len(nodes), endpoint=False)
+        x, y = np.cos(angle), np.sin(angle)
+        counts = graph.counts()[nodes]
+        
+        edge_x = np.column_stack([x[i], x[j], np.full(len(i), np.nan)]).ravel()
+        edge_y = np.column_stack([y[i], y[j], np.full(len(i), np.nan)]).ravel()
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=edge_x, y=edge_y, mode='lines',
+            line=dict(color='rgba(150,150,150,0.4)', width=1),
+            hoverinfo='skip', showlegend=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=x, y=y, mode='markers+text',
+            text=graph.topics[nodes], textposition='top center',
+            marker=dict(size=10 + 30 * np.sqrt(counts / counts.max()), color=cluster,
+                        colorscale='Turbo', line=dict(color='white', width=1)),
+            customdata=np.column_stack([counts, cluster + 1]),
+            hovertemplate='%{text}<br>%{customdata[0]} repos<br>cluster %{customdata[1]}<extra></extra>',
+            showlegend=False
+        ))
+        
+        fig.update_layout(
+            title='Topic Co-occurrence',
+            xaxis=dict(visible=False), yaxis=dict(visible=False, scaleanchor='x'),
+            template='plotly_white',
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig
 
     
     # ========== SKILLS SECTION ==========
     
+    @cached_chart
+    @timed_chart
     def skills_language_pie(self):
         """Pie Chart: Language Usage %"""
-        langs = list(self.db.languages.find({'username': self.username}))
+        langs = self.preprocessor.get_languages()
         if not langs:
             return None
         
         df = pd.DataFrame(langs)
+        # Byte-weighted once per-repo /languages data is stored
+        value = 'bytes' if 'bytes' in df else 'repo_count'
         
         fig = px.pie(
             df, 
-            values='repo_count', 
+            values=value, 
             names='language',
             title='Programming Languages',
             color='language',
@@ -219,29 +360,30 @@ class Visualizations:
         )
         return fig
     
+    # Not figure-cached: the population tables change without the user's data version
+    @timed_chart
     def skills_radar_chart(self):
         """Radar Chart: Developer Skill Profile"""
-        user = self.db.users.find_one({'username': self.username})
-        repos = list(self.db.repos.find({'username': self.username, 'is_fork': False}))
-        commits = list(self.db.commits.find({'username': self.username}))
-        langs = list(self.db.languages.find({'username': self.username}))
-        
-        if not user or not repos:
+        values = skill_values(self.db, self.username)
+        if values is None:
             return None
         
-        metrics = {
-            'Stars': min(sum(r['stars'] for r in repos) / 10, 100),
-            'Forks': min(sum(r['forks'] for r in repos) / 5, 100),
-            'Repos': min(len(repos) * 5, 100),
-            'Commits': min(len(commits) / 10, 100),
-            'Languages': min(len(langs) * 10, 100),
-            'Followers': min(user['followers'] / 2, 100)
-        }
+        tables = PercentileTables(self.db)
+        percentiles = tables.percentiles(values)
+        if percentiles is not None:
+            scores = percentiles
+            title = f"Developer Skill Radar (percentile among {tables.table()['users']} users)"
+        else:
+            # Too few users tracked to rank against
+            scores = {axis: min(value * RADAR_FIXED_SCALES[axis], 100) for axis, value in values.items()}
+            title = 'Developer Skill Radar'
         
         fig = go.Figure()
         fig.add_trace(go.Scatterpolar(
-            r=list(metrics.values()),
-            theta=list(metrics.keys()),
+            r=[scores[axis] for axis in RADAR_AXES],
+            theta=list(RADAR_AXES),
+            customdata=[values[axis] for axis in RADAR_AXES],
+            hovertemplate='%{theta}: %{customdata:,} (score %{r})<extra></extra>',
             fill='toself',
             line_color='#e94560',
             fillcolor='rgba(233, 69, 96, 0.3)'
@@ -249,32 +391,37 @@ class Visualizations:
         
         fig.update_layout(
             polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-            title='Developer Skill Radar',
+            title=title,
             paper_bgcolor='rgba(0,0,0,0)',
             plot_bgcolor='rgba(0,0,0,0)'
         )
         return fig
     
+    @cached_chart
+    @timed_chart
     def skills_language_horizontal_bar(self):
         """Horizontal Bar: Language Popularity"""
-        langs = list(self.db.languages.find({'username': self.username}))
+        langs = self.preprocessor.get_languages()
         if not langs:
             return None
         
-        df = pd.DataFrame(langs).sort_values('repo_count', ascending=True)
+        df = pd.DataFrame(langs)
+        by_bytes = 'bytes' in df
+        value = 'bytes' if by_bytes else 'repo_count'
+        df = df.sort_values(value, ascending=True)
         
         fig = go.Figure(data=[
             go.Bar(
                 y=df['language'], 
-                x=df['repo_count'], 
+                x=df[value], 
                 orientation='h',
                 marker_color='#e94560'
             )
         ])
         
         fig.update_layout(
-            title='Languages by Repo Count',
-            xaxis_title='Number of Repos',
+            title='Languages by Code Size' if by_bytes else 'Languages by Repo Count',
+            xaxis_title='Bytes of Code' if by_bytes else 'Number of Repos',
             yaxis_title='Language',
             template='plotly_white',
             paper_bgcolor='rgba(0,0,0,0)',
@@ -285,9 +432,11 @@ class Visualizations:
     
     # ========== ACTIVITY SECTION ==========
     
+    @cached_chart
+    @timed_chart
     def activity_commit_heatmap(self):
         """Day × Hour Heatmap: Commit Activity"""
-        commits = list(self.db.commits.find({'username': self.username}))
+        commits = self.preprocessor.get_commits()
         if not commits:
             return None
         
@@ -318,9 +467,11 @@ class Visualizations:
         )
         return fig
     
+    @cached_chart
+    @timed_chart
     def activity_timeline_scatter(self):
         """Scatter Timeline: GitHub Activity"""
-        events = list(self.db.activity.find({'username': self.username}))
+        events = self.preprocessor.get_events()
         if not events:
             return None
         
@@ -345,9 +496,11 @@ class Visualizations:
         )
         return fig
     
+    @cached_chart
+    @timed_chart
     def activity_event_bars(self):
         """Bar Chart: Event Type Breakdown"""
-        events = list(self.db.activity.find({'username': self.username}))
+        events = self.preprocessor.get_events()
         if not events:
             return None
         
@@ -371,19 +524,25 @@ class Visualizations:
     
     # ========== PRODUCTIVITY SECTION ==========
     
-    def productivity_commit_trend(self):
+    @cached_chart
+    @timed_chart
+    def productivity_commit_trend(self, window=7):
         """Smoothed Line: Commit Trend with Rolling Average"""
-        commits = list(self.db.commits.find({'username': self.username}))
-        if not commits:
+        if self.filters.languages or self.filters.repos:
+            # The stored series spans every repo, so narrow down from the commits themselves
+            commits = self.preprocessor.get_commits(lookback_days=window)
+            daily = rolling_from_timestamps([c.get('commit_timestamp') for c in commits], window, self.filters.since)
+        else:
+            series = DailyCommitSeries(self.db, self.username)
+            if series.is_empty():
+                # Data stored before the daily series existed
+                if not series.rebuild():
+                    return None
+            daily = series.rolling(window, start=self.filters.since)
+        
+        if daily.empty:
             return None
         
-        df = pd.DataFrame(commits)
-        df['timestamp'] = pd.to_datetime(df['commit_timestamp'])
-        df['date'] = df['timestamp'].dt.date
-        daily = df.groupby('date').size().reset_index(name='commits')
-        daily['date'] = pd.to_datetime(daily['date'])
-        daily['rolling_avg'] = daily['commits'].rolling(window=7, min_periods=1).mean()
-        
         fig = go.Figure()
         fig.add_trace(go.Scatter(
             x=daily['date'], 
@@ -396,12 +555,12 @@ class Visualizations:
             x=daily['date'], 
             y=daily['rolling_avg'], 
             mode='lines',
-            name='7-Day Avg',
+            name=f'{window}-Day Avg',
             line=dict(color='#e94560', width=3)
         ))
         
         fig.update_layout(
-            title='Commit Trend (7-Day Rolling Average)',
+            title=f'Commit Trend ({window}-Day Rolling Average)',
             xaxis_title='Date',
             yaxis_title='Commits',
             template='plotly_white',
@@ -410,9 +569,55 @@ class Visualizations:
         )
         return fig
     
+    @cached_chart
+    @timed_chart
+    def productivity_coding_sessions(self, peaks=PEAK_SESSIONS):
+        """Area Chart: Peak Coding Sessions"""
+        sessions = self.preprocessor.coding_sessions()
+        if sessions.empty:
+            return None
+        
+        daily = sessions.groupby(sessions['start'].dt.floor('D'))['size'].sum()
+        top = sessions.nlargest(peaks, 'size')
+        
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=daily.index,
+            y=daily.values,
+            mode='lines',
+            name='Actions in Sessions',
+            fill='tozeroy',
+            line=dict(color='#4ecca3', width=2)
+        ))
+        fig.add_trace(go.Scatter(
+            x=top['start'].dt.floor('D'),
+            y=daily.reindex(top['start'].dt.floor('D')).values,
+            mode='markers',
+            name=f'Top {len(top)} Sessions',
+            marker=dict(color='#e94560', size=12, symbol='star'),
+            customdata=top[['size', 'commits', 'duration_minutes', 'intensity']].round(1).values,
+            text=top['start'].dt.strftime('%H:%M') + '–' + top['end'].dt.strftime('%H:%M'),
+            hovertemplate='%{x|%Y-%m-%d} %{text}<br>%{customdata[0]} actions (%{customdata[1]} commits)'
+                          '<br>%{customdata[2]} min, %{customdata[3]} per hour<extra></extra>'
+        ))
+        
+        peak_day = daily.idxmax()
+        fig.add_annotation(x=peak_day, y=daily.max(), text=f"Peak: {peak_day:%Y-%m-%d}", showarrow=True, arrowhead=2)
+        fig.update_layout(
+            title='Peak Coding Sessions',
+            xaxis_title='Date',
+            yaxis_title='Commits & Events in Sessions',
+            template='plotly_white',
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig
+    
+    @cached_chart
+    @timed_chart
     def productivity_pr_donut(self):
         """Donut Chart: Issue Status"""
-        repos = list(self.db.repos.find({'username': self.username, 'is_fork': False}))
+        repos = list(self.db.repos.find(self.filters.repo_query(self.username, is_fork=False)))
         if not repos:
             return None
         
@@ -441,21 +646,27 @@ class Visualizations:
     
     # ========== GROWTH SECTION ==========
     
+    @cached_chart
+    @timed_chart
     def growth_star_line(self):
         """Line Chart: Star Growth"""
         df = self.preprocessor.get_clean_repos()
         if df.empty:
             return None
         
-        df['created_at'] = pd.to_datetime(df['created_at'])
-        df = df.sort_values('created_at')
-        df['cumulative_stars'] = df['stars'].cumsum()
+        daily = self._star_history(df)
+        if daily is not None:
+            x, y, mode = daily['date'], daily['cumulative'], 'lines'
+        else:
+            df['created_at'] = pd.to_datetime(df['created_at'])
+            df = df.sort_values('created_at')
+            x, y, mode = df['created_at'], df['stars'].cumsum(), 'lines+markers'
         
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=df['created_at'], 
-            y=df['cumulative_stars'],
-            mode='lines+markers',
+            x=x, 
+            y=y,
+            mode=mode,
             line=dict(color='#e94560', width=3),
             marker=dict(size=10)
         ))
@@ -470,21 +681,28 @@ class Visualizations:
         )
         return fig
     
+    @cached_chart
+    @timed_chart
     def growth_fork_line(self):
         """Line Chart: Fork Growth"""
         df = self.preprocessor.get_clean_repos()
         if df.empty:
             return None
         
-        df['created_at'] = pd.to_datetime(df['created_at'])
-        df = df.sort_values('created_at')
-        df['cumulative_forks'] = df['forks'].cumsum()
+        totals = RepoSnapshots(self.db, self.username).totals('forks', list(df['repo_name']), self.filters.since)
+        if len(totals) > 1:
+            x, y, mode = totals.index, totals.values, 'lines'
+        else:
+            # Fewer than two days of snapshots: today's forks stacked by repo creation date
+            df['created_at'] = pd.to_datetime(df['created_at'])
+            df = df.sort_values('created_at')
+            x, y, mode = df['created_at'], df['forks'].cumsum(), 'lines+markers'
         
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=df['created_at'], 
-            y=df['cumulative_forks'],
-            mode='lines+markers',
+            x=x, 
+            y=y,
+            mode=mode,
             line=dict(color='#4ecca3', width=3),
             marker=dict(size=10)
         ))
@@ -499,6 +717,8 @@ class Visualizations:
         )
         return fig
     
+    @cached_chart
+    @timed_chart
     def growth_trending_repos(self):
         """Bubble Chart: Trending Repos"""
         df = self.preprocessor.get_clean_repos()
@@ -512,8 +732,17 @@ class Visualizations:
         
         try:
             df['created_at'] = pd.to_datetime(df['created_at']).dt.tz_localize(None)
-            df['age_days'] = (get_now() - df['created_at']).dt.days + 1
-            df['star_velocity'] = (df['stars'] / df['age_days'] * 30).round(2)
+            measured = self._star_gains(df)
+            if measured is not None:
+                window, gains = measured
+                df = df.merge(gains[['repo', 'stars']].rename(columns={'repo': 'repo_name', 'stars': 'star_velocity'}),
+                              on='repo_name', how='inner')
+                y_title = f'Stars in Last {window} Days'
+            else:
+                # No snapshot history yet: lifetime average as a monthly rate
+                df['age_days'] = (get_now() - df['created_at']).dt.days + 1
+                df['star_velocity'] = (df['stars'] / df['age_days'] * 30).round(2)
+                y_title = 'Stars per Month'
             
             # Filter out repos with 0 velocity
             df = df[df['star_velocity'] > 0]
@@ -536,16 +765,19 @@ class Visualizations:
             
             fig.update_layout(
                 xaxis_title='Creation Date',
-                yaxis_title='Stars per Month',
+                yaxis_title=y_title,
                 paper_bgcolor='rgba(0,0,0,0)',
                 plot_bgcolor='rgba(0,0,0,0)'
             )
             return fig
-        except Exception as e:
-            print(f"Error in growth_trending_repos: {str(e)}")
+        except Exception:
+            metrics.inc('chart_errors_total', chart='growth_trending_repos')
+            logger.exception("Error in growth_trending_repos for %s", self.username)
             return None
 
     
+    @cached_chart
+    @timed_chart
     def repo_language_relationship(self):
         """Grouped Bar Chart: Repositories by Language"""
         df = self.preprocessor.get_clean_repos()
@@ -0,0 +1,141 @@
+import argparse
+import os
+import socket
+import threading
+import time
+from db import Database
+from fetch_data import GitHubFetcher
+from job_queue import JobQueue, LeaseLostError, FINISH, REPO_STAGES
+from metrics import metrics
+from records import RepoRecord
+
+POLL_INTERVAL = 2.0
+
+# Queue endpoint -> GitHubFetcher method
+FETCH_METHODS = {
+    'user': 'fetch_user',
+    'repos': 'fetch_repos',
+    'events': 'fetch_events',
+    'commits': 'fetch_commits',
+    'topics': 'fetch_repo_topics',
+    'languages': 'fetch_repo_languages',
+    'stargazers': 'fetch_stargazers',
+}
+
+
+class Worker:
+    """Claims fetch tasks from the JobQueue and runs them with a GitHubFetcher
+
+    Any number of workers, on any number of machines, can share one queue.
+    While a task runs a background thread renews its lease; a worker that
+    dies stops renewing, and another one picks the task up once the lease
+    expires. The fetcher checks the lease before each write, so a worker
+    that stalled past its lease abandons the task instead of writing
+    alongside the new holder.
+    """
+
+    def __init__(self, db, queue=None, fetcher=None, worker_id=None, poll_interval=POLL_INTERVAL):
+        self.db = db
+        self.queue = queue or JobQueue(db)
+        self.fetcher = fetcher or GitHubFetcher(db)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+
+    def stored_repos(self, username):
+        return [RepoRecord(**doc) for doc in self.db.repos.find({'username': username}, {'_id': 0})]
+
+    def run_task(self, task):
+        """Run one task and return the partial-results reasons of its fetch"""
+        username, endpoint = task['username'], task['endpoint']
+        self.fetcher.partial = {}
+        if endpoint == FINISH:
+            self.queue.check_lease(task)
+            self.db.set_fetch_status(username, self.queue.run_partial(task['run']))
+        elif endpoint in REPO_STAGES:
+            getattr(self.fetcher, FETCH_METHODS[endpoint])(username, self.stored_repos(username))
+        else:
+            getattr(self.fetcher, FETCH_METHODS[endpoint])(username)
+        return self.fetcher.partial
+
+    def _keep_lease(self, task, stop):
+        while not stop.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(task):
+                print(f"⚠️ Lost the lease on {task['username']}/{task['endpoint']}")
+                return
+
+    def process(self, task):
+        """Run a claimed task under heartbeats, then queue whatever it unblocks"""
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._keep_lease, args=(task, stop), daemon=True)
+        heartbeat.start()
+        self.fetcher.lease_guard = lambda: self.queue.check_lease(task)
+        try:
+            partial = self.run_task(task)
+        except LeaseLostError as e:
+            # Another worker owns the task now, or will once it claims the expired lease
+            print(f"⚠️ {str(e)}, abandoned the task")
+            metrics.inc('fetch_jobs_total', endpoint=task['endpoint'], outcome='lease_lost')
+            return
+        except Exception as e:
+            print(f"Error running {task['username']}/{task['endpoint']}: {str(e)}")
+            self.queue.fail(task, str(e))
+            metrics.inc('fetch_jobs_total', endpoint=task['endpoint'], outcome='error')
+            return
+        finally:
+            self.fetcher.lease_guard = None
+            stop.set()
+            heartbeat.join()
+
+        # Follow-ups are queued before completing, so the run never looks finished early
+        if task['endpoint'] == 'repos':
+            for endpoint in REPO_STAGES:
+                self.queue.enqueue(task['run'], task['username'], endpoint)
+        if not self.queue.complete(task, partial):
+            metrics.inc('fetch_jobs_total', endpoint=task['endpoint'], outcome='lease_lost')
+            return
+        metrics.inc('fetch_jobs_total', endpoint=task['endpoint'], outcome='done')
+        if task['endpoint'] != FINISH and self.queue.pending(task['run']) == 0:
+            self.queue.enqueue(task['run'], task['username'], FINISH)
+
+    def run_once(self):
+        """Process one task; False when none was runnable"""
+        task = self.queue.claim(self.worker_id)
+        if task is None:
+            return False
+        self.process(task)
+        return True
+
+    def run(self, burst=False):
+        """Process tasks until stopped, or until the queue is drained with burst"""
+        print(f"👷 Worker {self.worker_id} started")
+        while True:
+            if self.run_once():
+                continue
+            if burst:
+                return
+            time.sleep(self.poll_interval)
+
+
+def main():
+    from config import MONGODB_CONNECTION_STRING
+
+    parser = argparse.ArgumentParser(description='Run GitHub fetch tasks from the shared job queue')
+    parser.add_argument('--enqueue', nargs='+', metavar='USERNAME', help='queue a refresh of these users and exit')
+    parser.add_argument('--burst', action='store_true', help='exit once the queue is drained')
+    parser.add_argument('--poll', type=float, default=POLL_INTERVAL, help='seconds between polls of an empty queue')
+    args = parser.parse_args()
+
+    db = Database(MONGODB_CONNECTION_STRING)
+    try:
+        if args.enqueue:
+            queue = JobQueue(db)
+            for username in args.enqueue:
+                print(f"✓ Queued refresh of {username}: run {queue.enqueue_refresh(username)}")
+            return
+        Worker(db, poll_interval=args.poll).run(burst=args.burst)
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()